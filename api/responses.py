@@ -0,0 +1,26 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is the fallback
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for already-validated content
+
+    Returning it from a route skips FastAPI's response_model pass (dump,
+    re-validate, jsonable_encoder, json.dumps). Pydantic models are serialized
+    straight to bytes by pydantic-core, anything else by orjson when installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -1,199 +1,267 @@
-from fastapi import APIRouter, HTTPException, Depends
-from models.user_model import PlanRequest, UserProfile
-from models.plan_model import PlanResponse, FitnessPlan
-from templates.generate_plan import PromptTemplates
-from llm_models.gemini import GeminiModel
-from llm_models.anthropic import AnthropicModel
-from llm_models.groq import GroqModel
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from api.responses import FastJSONResponse
+from models.user_model import PlanRequest, BulkPlanRequest, RegeneratePlanRequest
+from models.plan_model import PlanResponse, PlanJob, RegenerationResponse
+from models.admin_model import ProfilerSettings
+from llm_models import provider_registry, ProviderUnavailable
+from llm_models.base import BaseLLMModel
+from llm_models.json_extract import extraction_stats
+from services.plan_cache import plan_cache, make_cache_key
+from services.plan_index import plan_index
+from services.plan_jobs import plan_job_runner, JobQueueFull
+from services.admission import AdmissionRejected, client_rate_limiter
+from services.single_flight import plan_single_flight
+from services.hedging import plan_hedger
+from services.plan_service import (
+    get_model, get_or_generate_plan, get_or_regenerate_plan, create_fallback_response, open_plan_stream, stream_bulk_plans
+)
+from services.local_planner import LOCAL_PROVIDER
+from services.plan_stream import format_sse, format_ndjson
+from services.profiling import sampling_profiler
+from services.request_timing import span
+from config.env_config import config
+import hashlib
 import logging
-from typing import Optional
+import math
+import secrets
+from typing import Literal
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Model instances
-gemini_model = None
-anthropic_model = None
-groq_model = None
-
-def get_gemini_model():
-    global gemini_model
-    if gemini_model is None:
-        try:
-            gemini_model = GeminiModel()
-        except ValueError as e:
-            logger.error(f"Failed to initialize Gemini model: {str(e)}")
-            raise HTTPException(status_code=500, detail="Gemini model not available")
-    return gemini_model
-
-def get_anthropic_model():
-    global anthropic_model
-    if anthropic_model is None:
-        try:
-            anthropic_model = AnthropicModel()
-        except ValueError as e:
-            logger.error(f"Failed to initialize Anthropic model: {str(e)}")
-            raise HTTPException(status_code=500, detail="Anthropic model not available")
-    return anthropic_model
-
-def get_groq_model():
-    global groq_model
-    if groq_model is None:
-        try:
-            groq_model = GroqModel()
-        except ValueError as e:
-            logger.error(f"Failed to initialize Groq model: {str(e)}")
-            raise HTTPException(status_code=500, detail="Groq model not available")
-    return groq_model
-
-def create_fallback_response(user_profile: UserProfile) -> FitnessPlan:
-    """Create a basic fallback response when AI models fail"""
-    return FitnessPlan(
-        meal_plan={
-            "goal": f"Support {user_profile.goal.lower()} goals",
-            "calorie_target": "Calculate based on BMR and activity level",
-            "macronutrient_breakdown": {
-                "protein": "25-30%",
-                "carbohydrates": "40-50%", 
-                "fats": "25-30%"
-            },
-            "meal_frequency": "3 main meals + 2 snacks",
-            "sample_meals": {
-                "breakfast": ["Oatmeal with protein powder and berries", "Greek yogurt with nuts and honey"],
-                "lunch": ["Grilled chicken with quinoa and vegetables", "Salmon salad with mixed greens"],
-                "dinner": ["Lean beef with sweet potato and broccoli", "Tofu stir-fry with brown rice"],
-                "snacks": ["Apple with almond butter", "Protein shake with banana"]
-            },
-            "nutrition_tips": [
-                "Stay hydrated with 8-10 glasses of water daily",
-                "Eat protein with every meal",
-                "Include colorful vegetables for micronutrients"
-            ],
-            "supplements": ["Whey protein", "Multivitamin", "Omega-3"]
-        },
-        workout_plan={
-            "goal": f"Support {user_profile.goal.lower()} through structured training",
-            "frequency": f"{user_profile.workout_days} days per week",
-            "split": user_profile.workout_split,
-            "weekly_schedule": [
-                {
-                    "day_name": "Day 1",
-                    "focus": "Upper Body",
-                    "exercises": [
-                        {
-                            "name": "Push-ups",
-                            "sets": "3",
-                            "reps": "8-12",
-                            "rest": "60 seconds",
-                            "notes": "Modify on knees if needed"
-                        },
-                        {
-                            "name": "Squats",
-                            "sets": "3", 
-                            "reps": "12-15",
-                            "rest": "60 seconds",
-                            "notes": "Focus on proper form"
-                        }
-                    ],
-                    "duration": f"{user_profile.time_per_session} minutes",
-                    "warm_up": ["5 minutes light cardio", "Dynamic stretching"],
-                    "cool_down": ["5 minutes walking", "Static stretching"]
-                }
-            ],
-            "progression_notes": [
-                "Increase weight/reps when you can complete all sets easily",
-                "Track your workouts for consistent progress"
-            ],
-            "safety_tips": [
-                "Always warm up before exercising",
-                "Stop if you feel pain or discomfort"
-            ]
-        },
-        general_recommendations=[
-            "Get 7-9 hours of quality sleep",
-            "Manage stress through relaxation techniques",
-            "Be consistent with your routine"
-        ],
-        progress_tracking={
-            "weight": "Weekly weigh-ins at the same time",
-            "measurements": "Monthly body measurements",
-            "performance": "Track weights, reps, and workout duration"
-        }
-    )
+def too_many_requests(error: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(math.ceil(error.retry_after))})
+
+def client_key(request: Request) -> str:
+    """Rate-limit identity: the API key if one is sent (hashed), otherwise the client IP"""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return "ip:" + (request.client.host if request.client else "unknown")
 
-@router.post("/generate-plan", response_model=PlanResponse)
-async def generate_plan_gemini(request: PlanRequest, model: GeminiModel = Depends(get_gemini_model)):
+async def limit_client(request: Request):
     try:
-        prompt = PromptTemplates.generate_fitness_plan_prompt(request.user_profile)
-        result = await model.generate_plan(prompt)
-        
-        if result:
-            return PlanResponse(
-                status="200",
-                message="Plan generated successfully",
-                data=FitnessPlan(**result)
-            )
-        else:
-            # Fallback response
-            fallback_data = create_fallback_response(request.user_profile)
-            return PlanResponse(
-                status="200",
-                message="Plan generated with fallback data",
-                data=fallback_data
-            )
-            
-    except Exception as e:
-        logger.error(f"Error in generate_plan_gemini: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        await client_rate_limiter.check(client_key(request))
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+
+async def require_admin(request: Request):
+    """Admin endpoints answer 404 unless ADMIN_TOKEN is set and sent as X-Admin-Token"""
+    token = request.headers.get("x-admin-token", "")
+    if not config.ADMIN_TOKEN or not secrets.compare_digest(token.encode("utf-8"), config.ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+def resolve_model(provider: str) -> BaseLLMModel:
+    try:
+        return get_model(provider)
+    except ProviderUnavailable as e:
+        logger.error(f"Failed to initialize {provider} model: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"{provider.title()} model not available")
+
+async def generate_plan_response(request: PlanRequest, model: BaseLLMModel, provider: str) -> FastJSONResponse:
+    """Serve a plan from the cache or generate it with the given model"""
+    plan, cache_hit = await get_or_generate_plan(request, model, provider)
+    
+    if plan:
+        content = PlanResponse(
+            status="200",
+            message=f"Plan generated successfully with {model.display_name}",
+            data=plan,
+            plan_id=plan_id(request.user_profile, model, provider)
+        )
+    else:
+        # Fallback response (never cached, so the next request retries the model)
+        fallback_data = create_fallback_response(request.user_profile, provider)
+        content = PlanResponse(
+            status="200",
+            message="Plan generated with fallback data",
+            data=fallback_data
+        )
+    
+    # The plan was validated once when it was built; serialize it as is instead of
+    # letting response_model validate and encode it again
+    with span("serialize"):
+        response = FastJSONResponse(content)
+    if config.PLAN_CACHE_ENABLED:
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+    return response
+
+def plan_id(user_profile, model: BaseLLMModel, provider: str):
+    """Cache id of a generated plan, None when it isn't cached"""
+    if not config.PLAN_CACHE_ENABLED or provider == LOCAL_PROVIDER:
+        return None
+    return make_cache_key(user_profile, provider, model.model_name, config.TEMPERATURE)
 
-@router.post("/generate-plan-anthropic", response_model=PlanResponse)
-async def generate_plan_anthropic(request: PlanRequest, model: AnthropicModel = Depends(get_anthropic_model)):
+async def generate_plan_for_provider(request: PlanRequest, provider: str) -> FastJSONResponse:
+    model = resolve_model(provider)
     try:
-        prompt = PromptTemplates.generate_fitness_plan_prompt(request.user_profile)
-        result = await model.generate_plan(prompt)
-        
-        if result:
-            return PlanResponse(
-                status="200",
-                message="Plan generated successfully with Anthropic",
-                data=FitnessPlan(**result)
-            )
-        else:
-            fallback_data = create_fallback_response(request.user_profile)
-            return PlanResponse(
-                status="200", 
-                message="Plan generated with fallback data",
-                data=fallback_data
-            )
-            
+        return await generate_plan_response(request, model, provider)
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except Exception as e:
-        logger.error(f"Error in generate_plan_anthropic: {str(e)}")
+        logger.error(f"Error generating plan with {provider}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/generate-plan-groq", response_model=PlanResponse)
-async def generate_plan_groq(request: PlanRequest, model: GroqModel = Depends(get_groq_model)):
+@router.post("/generate-plan", response_model=PlanResponse, response_class=FastJSONResponse, dependencies=[Depends(limit_client)])
+async def generate_plan(request: PlanRequest):
+    """Generate a plan with the provider named in ai_provider"""
+    return await generate_plan_for_provider(request, request.ai_provider)
+
+# Provider-specific paths kept for existing clients
+@router.post("/generate-plan-anthropic", response_model=PlanResponse, response_class=FastJSONResponse, dependencies=[Depends(limit_client)])
+async def generate_plan_anthropic(request: PlanRequest):
+    return await generate_plan_for_provider(request, "anthropic")
+
+@router.post("/generate-plan-groq", response_model=PlanResponse, response_class=FastJSONResponse, dependencies=[Depends(limit_client)])
+async def generate_plan_groq(request: PlanRequest):
+    return await generate_plan_for_provider(request, "groq")
+
+@router.post("/regenerate-plan", response_model=RegenerationResponse, response_class=FastJSONResponse, dependencies=[Depends(limit_client)])
+async def regenerate_plan(request: RegeneratePlanRequest):
+    """Update a previous plan for a changed profile, re-prompting only the affected sections"""
+    provider = request.ai_provider
+    model = resolve_model(provider)
     try:
-        prompt = PromptTemplates.generate_fitness_plan_prompt(request.user_profile)
-        result = await model.generate_plan(prompt)
-        
-        if result:
-            return PlanResponse(
-                status="200",
-                message="Plan generated successfully with Groq",
-                data=FitnessPlan(**result)
-            )
-        else:
-            fallback_data = create_fallback_response(request.user_profile)
-            return PlanResponse(
-                status="200",
-                message="Plan generated with fallback data", 
-                data=fallback_data
-            )
-            
+        plan, cache_hit, regenerated, fell_back = await get_or_regenerate_plan(request, model, provider)
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except Exception as e:
-        logger.error(f"Error in generate_plan_groq: {str(e)}")
+        logger.error(f"Error regenerating plan with {provider}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if plan and fell_back:
+        # Not cached, so there is no plan_id to regenerate from later
+        content = RegenerationResponse(
+            status="200",
+            message=f"Plan updated with {model.display_name}, with fallback data for {', '.join(fell_back)}",
+            data=plan,
+            regenerated=regenerated
+        )
+    elif plan:
+        content = RegenerationResponse(
+            status="200",
+            message=f"Plan updated successfully with {model.display_name}",
+            data=plan,
+            plan_id=plan_id(request.user_profile, model, provider),
+            regenerated=regenerated
+        )
+    else:
+        content = RegenerationResponse(
+            status="200",
+            message="Plan generated with fallback data",
+            data=create_fallback_response(request.user_profile, provider)
+        )
+    with span("serialize"):
+        response = FastJSONResponse(content)
+    if config.PLAN_CACHE_ENABLED:
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+    return response
+
+@router.post("/generate-plans", dependencies=[Depends(limit_client)])
+async def generate_plans_bulk(request: BulkPlanRequest):
+    """Generate plans for a whole cohort, streamed back as NDJSON in completion order"""
+    if len(request.requests) > config.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {config.BULK_MAX_ITEMS} plans per batch")
+
+    return StreamingResponse(
+        stream_bulk_plans(request.requests),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+@router.post("/generate-plan/stream", dependencies=[Depends(limit_client)])
+async def generate_plan_stream(request: PlanRequest, stream_format: Literal["sse", "ndjson"] = Query("sse", alias="format")):
+    """Stream plan sections as server-sent events (or NDJSON) while the model generates"""
+    model = resolve_model(request.ai_provider)
+    formatter = format_sse if stream_format == "sse" else format_ndjson
+    try:
+        # Quota and failover are settled here, while the response can still be a 429
+        events = await open_plan_stream(request, model, request.ai_provider)
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+
+    async def body():
+        async for event, payload in events:
+            yield formatter(event, payload)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if stream_format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs", response_model=PlanJob, status_code=202, dependencies=[Depends(limit_client)])
+async def submit_plan_job(request: PlanRequest, response: Response):
+    """Queue a plan generation and return its job id at once; poll GET /jobs/{job_id} for the result"""
+    resolve_model(request.ai_provider)
+    try:
+        job = await plan_job_runner.submit(request)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    response.headers["Location"] = f"/api/jobs/{job['job_id']}"
+    return job
+
+@router.get("/jobs/stats")
+async def plan_job_stats():
+    return await plan_job_runner.stats()
+
+@router.get("/jobs/{job_id}", response_model=PlanJob)
+async def get_plan_job(job_id: str, wait: float = Query(0, ge=0, description="Seconds to long-poll for the job to finish")):
+    """Job status, and the plan once it has succeeded"""
+    job = await plan_job_runner.wait(job_id, min(wait, config.JOB_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "FitPlanner API is running"}
+    breakers = provider_registry.breakers()
+    degraded = any(breaker["state"] != "closed" for breaker in breakers.values())
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "message": "FitPlanner API is running",
+        "providers": provider_registry.status(),
+        "breakers": breakers,
+    }
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return plan_cache.stats()
+
+@router.get("/plan-index/stats")
+async def plan_index_stats():
+    return plan_index.stats()
+
+@router.get("/admission/stats")
+async def admission_stats():
+    return {"clients": await client_rate_limiter.stats(), "providers": provider_registry.admission()}
+
+@router.get("/single-flight/stats")
+async def single_flight_stats():
+    return plan_single_flight.stats()
+
+@router.get("/hedging/stats")
+async def hedging_stats():
+    return plan_hedger.stats()
+
+@router.get("/extraction/stats")
+async def extraction_stats_endpoint():
+    return dict(extraction_stats)
+
+@router.get("/admin/profiler", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def profiler_status():
+    return sampling_profiler.stats()
+
+@router.post("/admin/profiler", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def configure_profiler(settings: ProfilerSettings):
+    """Profile a share of the requests this worker serves, writing one collapsed-stack file each"""
+    sampling_profiler.configure(settings.sample_rate, settings.max_profiles, settings.interval_ms / 1000)
+    return sampling_profiler.stats()
+
+@router.get("/admin/profiler/profiles/{name}", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def download_profile(name: str):
+    profile = sampling_profiler.read(name)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile)
@@ -0,0 +1,96 @@
+"""Import time of the API app, with a budget check against cold-start regressions
+
+Imports `main` in fresh interpreters under `-X importtime` and reports the
+median import time, process wall time and the slowest top-level packages.
+Exits with status 1 when the median import time is over --budget-ms.
+
+    python -m benchmarks.bench_import_time --runs 5 --budget-ms 2000
+    python -m benchmarks.bench_import_time --providers --env GROQ_API_KEY=x
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# About 1.45 s measured under -X importtime on a slow container, where fastapi alone takes ~0.9 s
+DEFAULT_BUDGET_MS = 2000
+
+IMPORT_APP = "import main"
+# What gunicorn's master does on top: import the SDKs of the configured providers
+IMPORT_PROVIDERS = "from llm_models import provider_registry; provider_registry.load_modules()"
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Total import time and cumulative time per top-level package, in ms"""
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            # Imported by the statement itself rather than by another module
+            total += int(cumulative) / 1000
+        name = name.strip()
+        if "." not in name:
+            packages[name] = int(cumulative) / 1000
+    return total, packages
+
+
+def run_once(statement: str, env: Dict[str, str]) -> Tuple[float, float, Dict[str, float]]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, packages = parse_importtime(result.stderr)
+    return total, wall, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="largest acceptable median import time")
+    parser.add_argument("--providers", action="store_true", help="also import the configured provider SDKs")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE", help="extra environment, e.g. API keys")
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list")
+    args = parser.parse_args()
+
+    env = dict(os.environ, **dict(item.split("=", 1) for item in args.env))
+    statement = f"{IMPORT_APP}; {IMPORT_PROVIDERS}" if args.providers else IMPORT_APP
+
+    totals, walls = [], []
+    packages: Dict[str, list] = defaultdict(list)
+    for _ in range(args.runs):
+        total, wall, per_package = run_once(statement, env)
+        totals.append(total)
+        walls.append(wall)
+        for name, cumulative in per_package.items():
+            packages[name].append(cumulative)
+
+    median = statistics.median(totals)
+    print(f"{statement}")
+    print(f"import p50 {median:.0f} ms  max {max(totals):.0f} ms   process wall p50 {statistics.median(walls):.0f} ms  ({args.runs} runs)\n")
+    print(f"{'package':<28} {'cumulative ms':>13}")
+    slowest = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, times in [item for item in slowest if item[0] != "main"][:args.top]:
+        print(f"{name:<28} {statistics.median(times):>13.0f}")
+
+    if median > args.budget_ms:
+        print(f"\nOVER BUDGET: {median:.0f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\nwithin budget ({args.budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Fallback rate and speed of JSON extraction on sample model outputs
+
+Compares the original find('{')/rfind('}') + json.loads extractor with
+llm_models.json_extract on the outputs in benchmarks/fixtures/model_outputs.
+A response "falls back" when no FitnessPlan can be validated from it.
+
+    python -m benchmarks.bench_json_extract --iterations 2000
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+from pydantic import ValidationError
+
+from llm_models import json_extract
+from models.plan_model import FitnessPlan
+
+FIXTURES = Path(__file__).parent / "fixtures" / "model_outputs"
+
+
+def legacy_extract(text: str) -> Optional[dict]:
+    """The per-provider _extract_json this module replaced"""
+    try:
+        start_idx = text.find('{')
+        end_idx = text.rfind('}') + 1
+        if start_idx != -1 and end_idx != 0:
+            return json.loads(text[start_idx:end_idx])
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+
+def new_extract(text: str) -> Optional[dict]:
+    return json_extract.extract_json(text).data
+
+
+def validates(data: Optional[dict]) -> bool:
+    if data is None:
+        return False
+    try:
+        FitnessPlan(**data)
+        return True
+    except (ValidationError, TypeError):
+        return False
+
+
+def time_per_call(fn, text: str, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(text)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    samples = sorted(FIXTURES.glob("*.txt"))
+    legacy_fallbacks = new_fallbacks = partials = 0
+    backend = "orjson" if json_extract.orjson is not None else "json"
+
+    print(f"{len(samples)} samples, backend: {backend}\n")
+    print(f"{'sample':<40} {'legacy':>8} {'new':>8} {'legacy µs':>10} {'new µs':>10}  repairs")
+    for path in samples:
+        text = path.read_text()
+        legacy_ok = validates(legacy_extract(text))
+        result = json_extract.extract_json(text)
+        new_ok = validates(result.data)
+        # Closed after a cut-off: served, but may be missing days or meals, so never cached
+        partial = new_ok and "closed_truncated" in result.repairs
+        legacy_fallbacks += not legacy_ok
+        new_fallbacks += not new_ok
+        partials += partial
+        new_outcome = "partial" if partial else "ok" if new_ok else "FALLBACK"
+        print(
+            f"{path.name:<40} {'ok' if legacy_ok else 'FALLBACK':>8} {new_outcome:>8} "
+            f"{time_per_call(legacy_extract, text, args.iterations):>10.1f} "
+            f"{time_per_call(new_extract, text, args.iterations):>10.1f}  {', '.join(result.repairs) or '-'}"
+        )
+
+    print(f"\nfallback rate: legacy {legacy_fallbacks / len(samples):.0%} -> new {new_fallbacks / len(samples):.0%}")
+    print(f"complete plans: legacy {1 - legacy_fallbacks / len(samples):.0%} -> new {1 - (new_fallbacks + partials) / len(samples):.0%} "
+          f"({partials / len(samples):.0%} truncated, served uncached)")
+
+
+if __name__ == "__main__":
+    main()
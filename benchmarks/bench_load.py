@@ -0,0 +1,245 @@
+"""Load test of the plan API against the offline stub provider
+
+Starts the app in-process with every provider bound to llm_models.stub, drives
+/api/generate-plan (or the streaming endpoint) at a fixed concurrency and reports
+throughput, latency percentiles, fallback rate and event-loop lag of the server.
+
+    python -m benchmarks.bench_load --requests 500 --concurrency 50
+    python -m benchmarks.bench_load --endpoint stream --malformed-rate 0.1 --json
+
+With --url it drives an already running server instead (its loop lag and stub
+settings are then out of reach).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+FALLBACK_MESSAGE = "Plan generated with fallback data"
+LAG_INTERVAL = 0.01
+
+
+def stub_environment(args) -> Dict[str, str]:
+    return {
+        "STUB_PROVIDERS": "gemini,anthropic,groq",
+        "STUB_LATENCY_MEDIAN": str(args.latency_median),
+        "STUB_LATENCY_SIGMA": str(args.latency_sigma),
+        "STUB_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "STUB_ERROR_RATE": str(args.error_rate),
+        "STUB_MALFORMED_RATE": str(args.malformed_rate),
+        "STUB_SEED": str(args.seed),
+        "PLAN_CACHE_ENABLED": "false" if args.no_cache else "true",
+        "PLAN_CACHE_DB_PATH": "",
+        "PROVIDER_WARMUP": "false",
+    }
+
+
+def random_profile(rng: random.Random) -> dict:
+    return {
+        "age": rng.randint(18, 70),
+        "gender": rng.choice(["Male", "Female", "Other"]),
+        "height": round(rng.uniform(150, 200), 1),
+        "weight": round(rng.uniform(50, 120), 1),
+        "activity_level": rng.choice(["Sedentary", "Lightly Active", "Moderately Active", "Very Active"]),
+        "goal": rng.choice(["Weight Loss", "Muscle Building", "Maintenance", "Lean Bulk"]),
+        "meal_preference": rng.choice(["Vegetarian", "Non-Vegetarian", "Vegan", "Pescatarian"]),
+        "meal_type": rng.choice(["High Protein", "Balanced", "Low Carb"]),
+        "workout_days": rng.randint(2, 6),
+        "workout_location": rng.choice(["Home", "Gym"]),
+        "workout_split": rng.choice(["Full Body", "Upper/Lower", "Push Pull Legs"]),
+        "workout_experience": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+    }
+
+
+def request_bodies(args) -> List[dict]:
+    """One body per request; with --distinct-profiles N they cycle through N profiles"""
+    rng = random.Random(args.seed)
+    distinct = args.distinct_profiles or args.requests
+    profiles = [random_profile(rng) for _ in range(min(distinct, args.requests))]
+    return [
+        {"user_profile": profiles[i % len(profiles)], "ai_provider": args.provider}
+        for i in range(args.requests)
+    ]
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    values = np.array(samples) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2), "max": round(values.max(), 2)}
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event):
+    """How late a short sleep wakes up: time the loop spent busy with other work"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL))
+
+
+class InProcessServer:
+    """The FastAPI app served by uvicorn on its own thread and event loop"""
+
+    def __init__(self, port: int):
+        import uvicorn
+        from main import app
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self.lag_samples: List[float] = []
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self):
+        stop = asyncio.Event()
+        monitor = asyncio.ensure_future(monitor_loop_lag(self.lag_samples, stop))
+        try:
+            await self.server.serve()
+        finally:
+            stop.set()
+            await monitor
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Server failed to start")
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, body: dict) -> dict:
+    started = time.perf_counter()
+    if endpoint == "stream":
+        first_byte = None
+        last_line = ""
+        async with client.stream("POST", "/api/generate-plan/stream", params={"format": "ndjson"}, json=body) as response:
+            async for line in response.aiter_lines():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                if line:
+                    last_line = line
+        complete = json.loads(last_line) if response.status_code == 200 and last_line else {}
+        message = complete.get("message", "")
+    else:
+        response = await client.post("/api/generate-plan", json=body)
+        first_byte = None
+        message = response.json().get("message", "") if response.status_code == 200 else ""
+    return {
+        "status": response.status_code,
+        "latency": time.perf_counter() - started,
+        "first_byte": first_byte,
+        "fallback": message == FALLBACK_MESSAGE,
+    }
+
+
+async def drive(base_url: str, endpoint: str, bodies: List[dict], concurrency: int) -> Dict:
+    results = []
+    next_index = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        async def worker():
+            nonlocal next_index
+            while next_index < len(bodies):
+                body = bodies[next_index]
+                next_index += 1
+                try:
+                    results.append(await send(client, endpoint, body))
+                except httpx.HTTPError as e:
+                    results.append({"status": 0, "latency": 0.0, "first_byte": None, "fallback": False, "error": repr(e)})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["status"] == 200]
+    report = {
+        "endpoint": endpoint,
+        "requests": len(results),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(results) / elapsed, 2),
+        "errors": len(results) - len(ok),
+        "fallback_rate": round(sum(r["fallback"] for r in ok) / len(ok), 4) if ok else None,
+        "latency_ms": percentiles([r["latency"] for r in ok]),
+    }
+    if endpoint == "stream":
+        report["first_byte_ms"] = percentiles([r["first_byte"] for r in ok if r["first_byte"] is not None])
+    return report
+
+
+def print_report(report: Dict):
+    print(f"{report['requests']} requests to {report['endpoint']} at concurrency {report['concurrency']}")
+    print(f"  throughput      {report['requests_per_s']:>10.1f} req/s ({report['elapsed_s']:.1f} s)")
+    print(f"  errors          {report['errors']:>10}")
+    if report["fallback_rate"] is not None:
+        print(f"  fallback rate   {report['fallback_rate']:>10.1%}")
+    for label, key in (("latency", "latency_ms"), ("first byte", "first_byte_ms"), ("loop lag", "loop_lag_ms")):
+        values = report.get(key)
+        if values and values["p50"] is not None:
+            print(
+                f"  {label:<15} p50 {values['p50']:>8.1f} ms  p95 {values['p95']:>8.1f} ms  "
+                f"p99 {values['p99']:>8.1f} ms  max {values['max']:>8.1f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", choices=["plan", "stream"], default="plan")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--provider", choices=["gemini", "anthropic", "groq"], default="gemini")
+    parser.add_argument("--distinct-profiles", type=int, default=0, help="cycle through N profiles (0 = all distinct)")
+    parser.add_argument("--no-cache", action="store_true", help="disable the plan cache")
+    parser.add_argument("--latency-median", type=float, default=0.2, help="stub time to first token (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal spread of the stub latency")
+    parser.add_argument("--tokens-per-second", type=float, default=2000, help="stub generation speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="drive an already running server instead of an in-process one")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    bodies = request_bodies(args)
+    if args.url:
+        report = asyncio.run(drive(args.url, args.endpoint, bodies, args.concurrency))
+    else:
+        # Config is read at import time, so the stub settings go in before the app is imported
+        os.environ.update(stub_environment(args))
+        server = InProcessServer(free_port())
+        logging.disable(logging.ERROR)
+        server.start()
+        server.lag_samples.clear()
+        try:
+            report = asyncio.run(drive(f"http://127.0.0.1:{server.server.config.port}", args.endpoint, bodies, args.concurrency))
+        finally:
+            server.stop()
+        report["loop_lag_ms"] = percentiles(server.lag_samples)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
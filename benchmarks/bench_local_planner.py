@@ -0,0 +1,31 @@
+"""Latency of the local rule-based planner over varied synthetic profiles
+
+    python -m benchmarks.bench_local_planner --profiles 20000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.bench_plan_index import percentile, synthetic_profiles
+from services.local_planner import build_local_plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=20000)
+    args = parser.parse_args()
+
+    profiles = list(synthetic_profiles(args.profiles, single_bucket=False))
+    latencies = []
+    for profile in profiles:
+        started = time.perf_counter()
+        build_local_plan(profile)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    days = sum(profile.workout_days for profile in profiles) / len(profiles)
+    print(f"{args.profiles:,} plans, {days:.1f} workout days on average")
+    print(f"p50 {statistics.median(latencies):.3f} ms  p99 {percentile(latencies, 0.99):.3f} ms  max {max(latencies):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Throughput of the nutrition engine: per-profile loop vs the NumPy batch path
+
+Run from the repository root:
+
+    python -m benchmarks.bench_nutrition --profiles 100000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from models.user_model import UserProfile
+from services.nutrition import (
+    ACTIVITY_MULTIPLIERS, GOAL_FACTORS, MEAL_TYPE_MACROS, SEX_CONSTANTS,
+    calculate_targets, calculate_targets_arrays, calculate_targets_batch, profiles_to_arrays,
+)
+
+DIETS = ["Vegetarian", "Non-Vegetarian", "Vegan", "Pescatarian", "Keto", "Paleo"]
+
+
+def random_profiles(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        UserProfile(
+            age=rng.randint(13, 100),
+            gender=rng.choice(list(SEX_CONSTANTS)),
+            height=rng.uniform(140, 210),
+            weight=rng.uniform(40, 160),
+            activity_level=rng.choice(list(ACTIVITY_MULTIPLIERS)),
+            goal=rng.choice(list(GOAL_FACTORS)),
+            meal_preference=rng.choice(DIETS),
+            meal_type=rng.choice(list(MEAL_TYPE_MACROS)),
+            workout_days=rng.randint(1, 7),
+            workout_location="Gym",
+            workout_split="Full Body",
+            workout_experience="Beginner",
+        )
+        for _ in range(count)
+    ]
+
+
+def timed(label: str, count: int, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {elapsed * 1000:9.1f} ms  {count / elapsed:>14,.0f} profiles/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100_000)
+    args = parser.parse_args()
+
+    profiles = random_profiles(args.profiles)
+    print(f"{args.profiles:,} profiles\n")
+
+    scalar = timed("scalar calculate_targets loop", args.profiles, lambda: [calculate_targets(p) for p in profiles])
+    arrays = timed("profiles_to_arrays", args.profiles, lambda: profiles_to_arrays(profiles))
+    columns = timed("calculate_targets_arrays (NumPy)", args.profiles, lambda: calculate_targets_arrays(arrays))
+    batch = timed("calculate_targets_batch (end to end)", args.profiles, lambda: calculate_targets_batch(profiles))
+
+    assert batch == scalar, "batch and scalar paths disagree"
+    assert np.array_equal(columns["calorie_target"], [t.calorie_target for t in scalar])
+    print("\nbatch and scalar results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Plan index lookup latency with up to millions of stored plans
+
+Fills a PlanIndex with synthetic profiles and times nearest-neighbour lookups.
+Categorical fields follow a skewed distribution (most users report no allergies
+or conditions), so some buckets grow much larger than others; --single-bucket
+puts every plan in one bucket for the brute-force worst case.
+
+    python -m benchmarks.bench_plan_index --plans 1000000
+    python -m benchmarks.bench_plan_index --plans 1000000 --single-bucket
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from benchmarks.bench_nutrition import DIETS
+from models.user_model import UserProfile
+from services.nutrition import ACTIVITY_MULTIPLIERS, GOAL_FACTORS, MEAL_TYPE_MACROS, SEX_CONSTANTS
+from services.plan_index import PlanIndex
+from services.plan_sections import SPLIT_FOCUSES
+
+LOCATIONS = ["Gym", "Home", "Outdoor"]
+EXPERIENCE = ["Beginner", "Intermediate", "Advanced"]
+ALLERGIES = ["None"] * 8 + ["Peanuts", "Lactose"]
+
+# Payload size does not affect lookup cost beyond decoding the k results
+PLAN = {"meal_plan": {}, "workout_plan": {}}
+
+
+def synthetic_profiles(count: int, single_bucket: bool, seed: int = 11):
+    rng = random.Random(seed)
+    for _ in range(count):
+        fields = dict(
+            age=rng.randint(16, 80),
+            height=rng.uniform(150, 200),
+            weight=rng.uniform(45, 140),
+            activity_level=rng.choice(list(ACTIVITY_MULTIPLIERS)),
+            time_per_session=rng.choice([30, 45, 60, 75, 90]),
+        )
+        if single_bucket:
+            categorical = dict(
+                gender="Male", goal="Muscle Building", meal_preference="Non-Vegetarian", meal_type="Balanced",
+                workout_days=4, workout_location="Gym", workout_split="Upper/Lower", workout_experience="Intermediate",
+            )
+        else:
+            categorical = dict(
+                gender=rng.choice(list(SEX_CONSTANTS)),
+                goal=rng.choice(list(GOAL_FACTORS)),
+                meal_preference=rng.choice(DIETS),
+                meal_type=rng.choice(list(MEAL_TYPE_MACROS)),
+                workout_days=rng.randint(2, 6),
+                workout_location=rng.choice(LOCATIONS),
+                workout_split=rng.choice(list(SPLIT_FOCUSES)),
+                workout_experience=rng.choice(EXPERIENCE),
+                allergies=rng.choice(ALLERGIES),
+            )
+        yield UserProfile(**fields, **categorical)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(args):
+    index = PlanIndex(max_plans=args.plans)
+    started = time.perf_counter()
+    for profile in synthetic_profiles(args.plans, args.single_bucket):
+        await index.add(profile, PLAN)
+    elapsed = time.perf_counter() - started
+    stats = index.stats()
+    print(f"{stats['plans']:,} plans in {stats['buckets']:,} buckets (largest {stats['largest_bucket']:,})")
+    print(f"build: {elapsed:.1f} s ({args.plans / elapsed:,.0f} plans/s)\n")
+
+    queries = list(synthetic_profiles(args.lookups, args.single_bucket, seed=23))
+    latencies = []
+    found = 0
+    for profile in queries:
+        started = time.perf_counter()
+        found += bool(await index.nearest(profile, args.k))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"{args.lookups:,} lookups, k={args.k}, {found / args.lookups:.0%} found a neighbour")
+    print(f"p50 {statistics.median(latencies):.3f} ms  p99 {percentile(latencies, 0.99):.3f} ms  max {max(latencies):.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=3, help="neighbours per lookup")
+    parser.add_argument("--single-bucket", action="store_true", help="all plans share one categorical bucket")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
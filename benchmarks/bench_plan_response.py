@@ -0,0 +1,82 @@
+"""CPU time of the plan response path per plan, by weekly_schedule size
+
+Compares the previous path (FitnessPlan(**data), then FastAPI's response_model
+validation and JSONResponse encoding) with validate_plan plus FastJSONResponse,
+from model-output dict to response body bytes.
+
+    python -m benchmarks.bench_plan_response --iterations 2000
+"""
+import argparse
+import asyncio
+import copy
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from api.responses import FastJSONResponse
+from models.plan_model import FitnessPlan, PlanResponse, validate_plan
+from models.user_model import UserProfile
+from services.plan_service import build_fallback_plan
+
+PROFILE = UserProfile(
+    age=30, gender="Male", height=180, weight=80, activity_level="Moderately Active", goal="Muscle Building",
+    meal_preference="Non-Vegetarian", meal_type="Balanced", workout_days=7, workout_location="Gym",
+    workout_split="Push Pull Legs", workout_experience="Intermediate",
+)
+
+# Stands in for the route's response_model=PlanResponse handling
+RESPONSE_FIELD = APIRoute("/generate-plan", lambda: None, response_model=PlanResponse).response_field
+
+
+def model_output(days: int, exercises: int) -> dict:
+    """A plan dict shaped like model output, with `days` workout days of `exercises` exercises"""
+    plan = build_fallback_plan(PROFILE).model_dump()
+    day = plan["workout_plan"]["weekly_schedule"][0]
+    exercise = day["exercises"][0]
+    day["exercises"] = [dict(exercise, name=f"{exercise['name']} {i + 1}") for i in range(exercises)]
+    plan["workout_plan"]["weekly_schedule"] = [dict(copy.deepcopy(day), day_name=f"Day {i + 1}") for i in range(days)]
+    return plan
+
+
+async def legacy_path(data: dict) -> bytes:
+    content = PlanResponse(status="200", message="Plan generated successfully", data=FitnessPlan(**data))
+    encoded = await serialize_response(field=RESPONSE_FIELD, response_content=content, is_coroutine=True)
+    return JSONResponse(encoded).body
+
+
+async def fast_path(data: dict) -> bytes:
+    content = PlanResponse(status="200", message="Plan generated successfully", data=validate_plan(data))
+    return FastJSONResponse(content).body
+
+
+async def cpu_per_call(path, data: dict, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        await path(data)
+    return (time.process_time() - started) / iterations * 1e6
+
+
+async def run(args):
+    print(f"{'days':>4} {'exercises':>9} {'body KB':>8} {'before us':>10} {'after us':>9} {'speedup':>8}")
+    for days in args.days:
+        data = model_output(days, args.exercises)
+        before_body, after_body = await legacy_path(data), await fast_path(data)
+        assert json.loads(before_body) == json.loads(after_body), "paths produced different responses"
+        before = await cpu_per_call(legacy_path, data, args.iterations)
+        after = await cpu_per_call(fast_path, data, args.iterations)
+        print(f"{days:>4} {args.exercises:>9} {len(after_body) / 1024:>8.1f} {before:>10.1f} {after:>9.1f} {before / after:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 3, 5, 7, 14])
+    parser.add_argument("--exercises", type=int, default=6, help="exercises per workout day")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
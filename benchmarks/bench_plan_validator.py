@@ -0,0 +1,90 @@
+"""Latency and failure rates of the plan rule checks over varied synthetic profiles
+
+Local plans are built for each profile and should pass every rule. The recorded
+model plans are checked against profiles they weren't written for, so their
+failure rates show what the rules catch and how many plans "escalate" mode
+would send back to the model. They are also checked against the profile they
+were written for, with distance work and nut/egg look-alikes in the profile
+text, where any failure is a false positive (exit status 1).
+
+    python -m benchmarks.bench_plan_validator --profiles 5000
+"""
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+
+from benchmarks.bench_plan_index import percentile, synthetic_profiles
+from llm_models.json_extract import extract_json
+from llm_models.stub import DEFAULT_RESPONSES_DIR, load_responses
+from models.plan_model import validate_plan
+from models.user_model import UserProfile
+from services.local_planner import build_local_plan
+from services.plan_validator import RULES, check_plan
+
+# The profile the recorded plans were written for: a 2700-2750 kcal lean bulk, 4 x 60 min push/pull/legs
+MATCHED_PROFILE = dict(
+    age=28, gender="Male", height=178, weight=70, activity_level="Moderately Active", goal="Lean Bulk",
+    meal_preference="Non-Vegetarian", meal_type="High Protein", workout_days=4, workout_location="Gym",
+    workout_split="Push Pull Legs", workout_experience="Intermediate", time_per_session=60,
+)
+# Profile text that names no food the plans contain
+MATCHED_NOTES = [
+    dict(medical_conditions="Sees a nutritionist monthly"),
+    dict(medical_conditions="Nutrition counselling for IBS"),
+    dict(food_restrictions="Eggplant"),
+]
+DISTANCE_REPS = ("400m", "5km", "1 mile", "800 meters", "1.5 km")
+
+
+def matched_pairs(recorded):
+    """Recorded plans on their own profile: as recorded, with distance reps, and with look-alike profile text"""
+    profile = UserProfile(**MATCHED_PROFILE)
+    for plan in recorded:
+        yield plan, profile
+        distance = plan.model_copy(deep=True)
+        for index, exercise in enumerate(distance.workout_plan.weekly_schedule[-1].exercises):
+            exercise.reps = DISTANCE_REPS[index % len(DISTANCE_REPS)]
+        yield distance, profile
+        for notes in MATCHED_NOTES:
+            yield plan, UserProfile(**MATCHED_PROFILE, **notes)
+
+
+def run(label: str, pairs) -> int:
+    latencies = []
+    failed_plans = 0
+    failures: Counter = Counter()
+    examples = []
+    for plan, profile in pairs:
+        started = time.perf_counter()
+        issues = check_plan(plan, profile)
+        latencies.append((time.perf_counter() - started) * 1000)
+        failed_plans += bool(issues)
+        failures.update({issue.rule for issue in issues})
+        examples.extend(issue.message for issue in issues[:1] if len(examples) < 3)
+
+    print(f"{label}: {len(latencies):,} plans, p50 {statistics.median(latencies):.3f} ms  p99 {percentile(latencies, 0.99):.3f} ms  "
+          f"failed {failed_plans / len(latencies):.1%}")
+    print("    " + "  ".join(f"{rule} {failures[rule] / len(latencies):.1%}" for rule in RULES))
+    for message in examples:
+        print(f"    e.g. {message}")
+    return failed_plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=5000)
+    args = parser.parse_args()
+
+    profiles = list(synthetic_profiles(args.profiles, single_bucket=False))
+    recorded = [validate_plan(extract_json(text).data) for text in load_responses(DEFAULT_RESPONSES_DIR)]
+
+    run("local plans", ((build_local_plan(profile), profile) for profile in profiles))
+    run("recorded plans", ((recorded[index % len(recorded)], profile) for index, profile in enumerate(profiles)))
+    if run("recorded plans, matched profile", matched_pairs(recorded)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
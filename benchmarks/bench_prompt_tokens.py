@@ -0,0 +1,117 @@
+"""Input/output tokens and latency: verbose prompt vs compact structured-output mode
+
+Offline (default) it estimates input tokens per provider from what each request
+sends (prompt text, plus the tool or response schema in compact mode) at ~4
+characters per token. With --live it calls every configured provider in both
+modes and reports the usage the provider itself returns, plus latency.
+
+    python -m benchmarks.bench_prompt_tokens
+    python -m benchmarks.bench_prompt_tokens --live --samples 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.bench_nutrition import random_profiles
+from config.env_config import config
+from models.plan_schema import plan_json_schema, plan_response_schema, plan_schema_outline
+from templates.generate_plan import PlanPrompt, PromptTemplates
+
+CHARS_PER_TOKEN = 4
+MODES = ["verbose", "compact"]
+
+
+def build_prompt(profile, mode: str) -> PlanPrompt:
+    config.PROMPT_MODE = mode
+    return PromptTemplates.build_plan_prompt(profile)
+
+
+def estimated_input_chars(provider: str, prompt: PlanPrompt) -> int:
+    """Characters each provider is sent for one request"""
+    chars = len(prompt.system) + len(prompt.user)
+    if not prompt.structured:
+        return chars
+    if provider == "anthropic":
+        return chars + len(json.dumps(plan_json_schema(), separators=(",", ":")))
+    if provider == "gemini":
+        return chars + len(json.dumps(plan_response_schema(), separators=(",", ":")))
+    return chars + len(plan_schema_outline())
+
+
+def delta(before: float, after: float) -> str:
+    return f"{(after - before) / before:+.0%}" if before else "n/a"
+
+
+def offline(samples: int):
+    profiles = random_profiles(samples)
+    print(f"Estimated input tokens per request ({samples} profiles, ~{CHARS_PER_TOKEN} chars/token)\n")
+    print(f"{'provider':<10} {'verbose':>9} {'compact':>9} {'delta':>7}  {'static prefix':>13}")
+    for provider in ("gemini", "anthropic", "groq"):
+        tokens = {
+            mode: statistics.mean(estimated_input_chars(provider, build_prompt(p, mode)) for p in profiles) / CHARS_PER_TOKEN
+            for mode in MODES
+        }
+        # The part every request shares, which Anthropic serves from its prompt cache
+        prompt = build_prompt(profiles[0], "compact")
+        static = (estimated_input_chars(provider, prompt) - len(prompt.user)) / CHARS_PER_TOKEN
+        print(f"{provider:<10} {tokens['verbose']:>9.0f} {tokens['compact']:>9.0f} {delta(tokens['verbose'], tokens['compact']):>7}  {static:>13.0f}")
+
+
+async def live(samples: int):
+    from llm_models import provider_registry, ProviderUnavailable
+    from services.metrics import provider_tokens
+
+    profiles = random_profiles(samples)
+    print(f"Provider-reported usage, mean of {samples} generations per mode\n")
+    print(f"{'provider':<10} {'mode':<8} {'input':>7} {'cached':>7} {'output':>7} {'p50 s':>7} {'ok':>5}")
+    for provider in provider_registry.providers:
+        try:
+            model = provider_registry.get(provider)
+        except ProviderUnavailable as e:
+            print(f"{provider:<10} skipped: {str(e)}")
+            continue
+
+        results: Dict[str, Dict[str, float]] = {}
+        for mode in MODES:
+            before = dict(provider_tokens.values)
+            latencies: List[float] = []
+            successes = 0
+            for profile in profiles:
+                started = time.perf_counter()
+                successes += bool(await model.generate_plan(build_prompt(profile, mode)))
+                latencies.append(time.perf_counter() - started)
+            used = {
+                kind: (provider_tokens.values.get((provider, kind), 0) - before.get((provider, kind), 0)) / samples
+                for kind in ("prompt", "cached_prompt", "completion")
+            }
+            results[mode] = {**used, "latency": statistics.median(latencies)}
+            print(
+                f"{provider:<10} {mode:<8} {used['prompt']:>7.0f} {used['cached_prompt']:>7.0f} "
+                f"{used['completion']:>7.0f} {results[mode]['latency']:>7.2f} {successes:>3}/{samples}"
+            )
+
+        verbose, compact = results["verbose"], results["compact"]
+        print(
+            f"{provider:<10} {'delta':<8} {delta(verbose['prompt'], compact['prompt']):>7} {'':>7} "
+            f"{delta(verbose['completion'], compact['completion']):>7} {delta(verbose['latency'], compact['latency']):>7}"
+        )
+    await provider_registry.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="call the configured providers (uses API quota)")
+    args = parser.parse_args()
+
+    if args.live:
+        asyncio.run(live(args.samples))
+    else:
+        offline(args.samples)
+
+
+if __name__ == "__main__":
+    main()
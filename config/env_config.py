@@ -11,10 +11,156 @@ class Config:
     # API Configuration
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", "5000"))
+    # Auto-reload for `python main.py` during development
+    API_RELOAD = os.getenv("API_RELOAD", "false").lower() == "true"
+
+    # Multi-worker serving (gunicorn.conf.py): worker processes, and the directory of the
+    # SQLite files they share; when set, the plan cache, plan index, jobs and shared state default to it
+    WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+    # Single-flight leases and client rate-limit buckets shared across workers (off when empty)
+    SHARED_STATE_DB_PATH = os.getenv("SHARED_STATE_DB_PATH", os.path.join(SHARED_STATE_DIR, "shared_state.db") if SHARED_STATE_DIR else "")
+    # Seconds a worker waits on a SQLite file locked by another before giving up
+    SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "5"))
+    # Longest a generation may hold its cross-worker lease; others take over after a crash
+    SINGLE_FLIGHT_LEASE_TTL = float(os.getenv("SINGLE_FLIGHT_LEASE_TTL", "300"))
     
+    # Providers the API may use (empty = every provider with an API key); the SDKs of
+    # the others are never imported
+    ENABLED_PROVIDERS = [p.strip() for p in os.getenv("ENABLED_PROVIDERS", "").split(",") if p.strip()]
+
     # Model Configuration
     DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gemini")
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4000"))
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
+    # "verbose": schema example in the prompt, free-text parsing; "compact": short
+    # prompt plus each provider's native structured output
+    PROMPT_MODE = os.getenv("PROMPT_MODE", "verbose").lower()
+    # "single": one completion per plan; "sectioned": meal plan, extras and workout
+    # (per day from SECTION_FANOUT_MIN_DAYS days) generated concurrently
+    GENERATION_MODE = os.getenv("GENERATION_MODE", "single").lower()
+    SECTION_FANOUT_MIN_DAYS = int(os.getenv("SECTION_FANOUT_MIN_DAYS", "5"))
+    # Rule checks of each generated plan against its profile: "off"; "local": count
+    # and log failures; "escalate": also send failing plans to the model's validation prompt
+    PLAN_VALIDATION = os.getenv("PLAN_VALIDATION", "local").lower()
+
+    # Provider Concurrency & Timeouts (seconds)
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+    GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", str(LLM_TIMEOUT)))
+    ANTHROPIC_MAX_CONCURRENCY = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+    ANTHROPIC_TIMEOUT = float(os.getenv("ANTHROPIC_TIMEOUT", str(LLM_TIMEOUT)))
+    GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", str(LLM_MAX_CONCURRENCY)))
+    GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", str(LLM_TIMEOUT)))
+
+    # Provider quotas (0 = unlimited), kept under with a sliding 60 s window
+    GEMINI_RPM = int(os.getenv("GEMINI_RPM", "0"))
+    GEMINI_TPM = int(os.getenv("GEMINI_TPM", "0"))
+    ANTHROPIC_RPM = int(os.getenv("ANTHROPIC_RPM", "0"))
+    ANTHROPIC_TPM = int(os.getenv("ANTHROPIC_TPM", "0"))
+    GROQ_RPM = int(os.getenv("GROQ_RPM", "0"))
+    GROQ_TPM = int(os.getenv("GROQ_TPM", "0"))
+    # Share of each quota to use, leaving room for estimation error and other clients of the same key
+    PROVIDER_QUOTA_HEADROOM = float(os.getenv("PROVIDER_QUOTA_HEADROOM", "0.95"))
+    # Calls that may wait for quota, and how long, before being refused with 429
+    PROVIDER_QUEUE_MAX = int(os.getenv("PROVIDER_QUEUE_MAX", "256"))
+    PROVIDER_QUEUE_MAX_WAIT = float(os.getenv("PROVIDER_QUEUE_MAX_WAIT", "30"))
+
+    # Per-client token bucket on plan endpoints, keyed by X-API-Key or client IP (0 = off)
+    CLIENT_RATE_LIMIT_PER_MINUTE = float(os.getenv("CLIENT_RATE_LIMIT_PER_MINUTE", "0"))
+    CLIENT_RATE_LIMIT_BURST = int(os.getenv("CLIENT_RATE_LIMIT_BURST", "10"))
+
+    # Retries of transient provider errors (429, 5xx, dropped connections), with full-jitter backoff
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+
+    # Adaptive timeouts: a multiple of the recent latency percentile, between the minimum and *_TIMEOUT
+    ADAPTIVE_TIMEOUT_ENABLED = os.getenv("ADAPTIVE_TIMEOUT_ENABLED", "true").lower() == "true"
+    ADAPTIVE_TIMEOUT_PERCENTILE = float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", "0.99"))
+    ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2.0"))
+    ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "10"))
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "20"))
+
+    # Circuit breakers: open after this many consecutive failures, try again after the reset timeout
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+    BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv("BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+    # While a provider's breaker is open, generate with the first available HEDGE_PROVIDERS entry instead
+    BREAKER_FAILOVER = os.getenv("BREAKER_FAILOVER", "true").lower() == "true"
+
+    # Model names (empty = provider default)
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "")
+    ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "")
+    GROQ_MODEL = os.getenv("GROQ_MODEL", "")
+
+    # Shared HTTP connection pool for provider SDKs
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "100"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    PROVIDER_WARMUP = os.getenv("PROVIDER_WARMUP", "true").lower() == "true"
+
+    # Plan Cache
+    PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+    PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "86400"))
+    PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1000"))
+    PLAN_CACHE_MAX_BYTES = int(os.getenv("PLAN_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    PLAN_CACHE_DB_PATH = os.getenv("PLAN_CACHE_DB_PATH", os.path.join(SHARED_STATE_DIR, "plan_cache.db") if SHARED_STATE_DIR else "")
+    PLAN_CACHE_DB_MAX_BYTES = int(os.getenv("PLAN_CACHE_DB_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # Async Plan Jobs
+    JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(SHARED_STATE_DIR, "plan_jobs.db") if SHARED_STATE_DIR else "fitplan_jobs.db")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+    JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "1000"))
+    # Seconds finished jobs (and their plans) are kept
+    JOB_TTL = float(os.getenv("JOB_TTL", "86400"))
+    # Longest long-poll a GET /api/jobs/{id}?wait= may hold, kept under proxy timeouts
+    JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "25"))
+
+    # Plan Index: reuse plans generated for near-identical profiles
+    PLAN_INDEX_ENABLED = os.getenv("PLAN_INDEX_ENABLED", "false").lower() == "true"
+    # Serve the nearest plan (with recomputed targets) up to this feature distance
+    PLAN_INDEX_MAX_DISTANCE = float(os.getenv("PLAN_INDEX_MAX_DISTANCE", "1.0"))
+    # Nearest plans passed as examples to the prompt when none is close enough
+    PLAN_INDEX_SEEDS = int(os.getenv("PLAN_INDEX_SEEDS", "1"))
+    PLAN_INDEX_MAX_PLANS = int(os.getenv("PLAN_INDEX_MAX_PLANS", "1000000"))
+    PLAN_INDEX_DB_PATH = os.getenv("PLAN_INDEX_DB_PATH", os.path.join(SHARED_STATE_DIR, "plan_index.db") if SHARED_STATE_DIR else "")
+
+    # Request Coalescing
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+    # Hedged Requests
+    HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+    HEDGE_PROVIDERS = [p.strip() for p in os.getenv("HEDGE_PROVIDERS", "gemini,anthropic,groq").split(",") if p.strip()]
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "20"))
+    HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1"))
+    HEDGE_LATENCY_WINDOW = int(os.getenv("HEDGE_LATENCY_WINDOW", "200"))
+
+    # Bulk Generation
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "5000"))
+    BULK_CONCURRENCY_PER_PROVIDER = int(os.getenv("BULK_CONCURRENCY_PER_PROVIDER", "16"))
+
+    # Per-request stage timings: Server-Timing response header, and one structured log line per request
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+    SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "false").lower() == "true"
+
+    # Admin endpoints (sampling profiler switch) require this X-Admin-Token; disabled when empty
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    # Where profiled requests' collapsed stacks are written, and the sampling interval in seconds
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+    # Offline stub provider (load testing); listed providers replay recorded responses
+    STUB_PROVIDERS = [p.strip() for p in os.getenv("STUB_PROVIDERS", "").split(",") if p.strip()]
+    STUB_RESPONSES_DIR = os.getenv("STUB_RESPONSES_DIR", "")
+    STUB_LATENCY_MEDIAN = float(os.getenv("STUB_LATENCY_MEDIAN", "1.0"))
+    STUB_LATENCY_SIGMA = float(os.getenv("STUB_LATENCY_SIGMA", "0.5"))
+    STUB_TOKENS_PER_SECOND = float(os.getenv("STUB_TOKENS_PER_SECOND", "200"))
+    STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+    STUB_MALFORMED_RATE = float(os.getenv("STUB_MALFORMED_RATE", "0"))
+    STUB_SEED = int(os.environ["STUB_SEED"]) if os.getenv("STUB_SEED") else None
 
 config = Config()
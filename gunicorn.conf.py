@@ -0,0 +1,47 @@
+"""Production server: gunicorn -c gunicorn.conf.py main:app
+
+Runs WEB_CONCURRENCY uvicorn worker processes forked from a master that has
+already imported the app. Workers share the plan cache, async jobs,
+single-flight leases and client rate limits through SQLite files in
+SHARED_STATE_DIR, so adding workers doesn't add provider calls.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+proc_name = "fitplanner"
+
+# Import the app once in the master; workers fork with it (and its schemas and prompts) loaded
+preload_app = True
+
+# Pending connections the kernel queues while every worker is busy
+backlog = int(os.getenv("BACKLOG", "2048"))
+# Seconds an idle client connection is kept open (uvicorn's timeout_keep_alive). It must
+# exceed a fronting load balancer's idle timeout, commonly 60 s, or the balancer may
+# reuse a connection the worker is closing and answer 502
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+# On SIGTERM workers stop accepting and get this long to finish in-flight generations
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "90"))
+# A worker silent for this long is killed and replaced
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+# Read by config.env_config when the app is preloaded below: provider quotas are split
+# across the workers, and state is shared through files in SHARED_STATE_DIR
+os.environ["WEB_CONCURRENCY"] = str(workers)
+if workers > 1:
+    os.makedirs(os.environ.setdefault("SHARED_STATE_DIR", "fitplan_state"), exist_ok=True)
+
+
+def when_ready(server):
+    # Provider SDKs are imported lazily; import the configured ones once here, in the
+    # master, rather than in every worker after it forks
+    from llm_models import provider_registry
+
+    loaded = provider_registry.load_modules()
+    server.log.info(f"Preloaded provider SDKs: {', '.join(loaded) or 'none'}")
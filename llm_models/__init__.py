@@ -0,0 +1,6 @@
+from llm_models.registry import provider_registry, ProviderUnavailable
+
+# Provider modules, and the SDKs they wrap, are imported when the provider is first built
+provider_registry.declare("gemini", "llm_models.gemini", "GOOGLE_API_KEY")
+provider_registry.declare("anthropic", "llm_models.anthropic", "ANTHROPIC_API_KEY")
+provider_registry.declare("groq", "llm_models.groq", "GROQ_API_KEY")
@@ -1,55 +1,78 @@
 import anthropic
 from config.env_config import config
+from llm_models.base import BaseLLMModel
+from llm_models.registry import provider_registry
+from models.plan_schema import plan_json_schema
+from templates.generate_plan import PlanPrompt
 import json
-import logging
-from typing import Optional
-
-logger = logging.getLogger(__name__)
-
-class AnthropicModel:
-    def __init__(self):
-        if not config.ANTHROPIC_API_KEY:
-            raise ValueError("Anthropic API key not found in environment variables")
-        
-        self.client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
-        
-    async def generate_plan(self, prompt: str) -> Optional[dict]:
-        try:
-            logger.info("Generating plan with Anthropic Claude")
-            
-            response = self.client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=config.MAX_TOKENS,
-                temperature=config.TEMPERATURE,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-            
-            response_text = response.content[0].text
-            logger.info(f"Anthropic response length: {len(response_text)}")
-            
-            return self._extract_json(response_text)
-            
-        except Exception as e:
-            logger.error(f"Error generating plan with Anthropic: {str(e)}")
-            return None
-    
-    def _extract_json(self, text: str) -> Optional[dict]:
-        """Extract JSON from response text"""
-        try:
-            start_idx = text.find('{')
-            end_idx = text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = text[start_idx:end_idx]
-                return json.loads(json_str)
-            
-            return json.loads(text)
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            return None
+from typing import AsyncIterator
+
+PLAN_TOOL_NAME = "submit_fitness_plan"
+
+@provider_registry.register
+class AnthropicModel(BaseLLMModel):
+    provider = "anthropic"
+    display_name = "Anthropic"
+    api_key_setting = "ANTHROPIC_API_KEY"
+    default_model_name = "claude-3-opus-20240229"
+
+    def _setup(self, api_key: str):
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            timeout=self.timeout,
+            max_retries=0,
+            http_client=self.http_client
+        )
+        # Structured mode: the plan comes back as the input of a forced tool call
+        self.plan_tool = {
+            "name": PLAN_TOOL_NAME,
+            "description": "Submit the complete fitness plan for the user.",
+            "input_schema": plan_json_schema()
+        }
+
+    def _request(self, prompt: PlanPrompt) -> dict:
+        request = {
+            "model": self.model_name,
+            "max_tokens": config.MAX_TOKENS,
+            "temperature": config.TEMPERATURE,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt.user
+                }
+            ]
+        }
+        if prompt.structured:
+            # Tools then system form the cached prefix; the breakpoint goes on the last static block
+            request["system"] = [{"type": "text", "text": prompt.system, "cache_control": {"type": "ephemeral"}}]
+            request["tools"] = [self.plan_tool]
+            request["tool_choice"] = {"type": "tool", "name": PLAN_TOOL_NAME}
+        return request
+
+    def _record_anthropic_usage(self, usage):
+        cached = (usage.cache_read_input_tokens or 0) + (usage.cache_creation_input_tokens or 0)
+        self._record_usage(usage.input_tokens + cached, usage.output_tokens, usage.cache_read_input_tokens)
+
+    async def _complete(self, prompt: PlanPrompt) -> str:
+        response = await self.client.messages.create(**self._request(prompt))
+        self._record_anthropic_usage(response.usage)
+        if prompt.structured:
+            for block in response.content:
+                if block.type == "tool_use":
+                    return json.dumps(block.input)
+        return response.content[0].text
+
+    async def _stream(self, prompt: PlanPrompt) -> AsyncIterator[str]:
+        async with self.client.messages.stream(**self._request(prompt)) as stream:
+            if prompt.structured:
+                async for event in stream:
+                    if event.type == "input_json":
+                        yield event.partial_json
+            else:
+                async for text in stream.text_stream:
+                    yield text
+            message = await stream.get_final_message()
+            self._record_anthropic_usage(message.usage)
+
+    async def warm_up(self):
+        await self._warm_up_http(str(self.client.base_url))
@@ -0,0 +1,221 @@
+from config.env_config import config
+from llm_models.json_extract import ExtractionResult, extract_json_counted
+from services.metrics import provider_request_duration, provider_requests_in_flight, provider_retries, provider_tokens
+from services.resilience import CircuitBreaker, adaptive_timeout, call_latency, is_transient, retry_delay
+from services.admission import AdmissionRejected, ProviderAdmission, estimate_tokens, request_priority
+from services.plan_stream import iterate_with_timeout
+from services.request_timing import span
+from templates.generate_plan import PlanPrompt
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Admission ticket of the provider call running in this task, settled with the reported usage
+_admission_ticket: ContextVar[Optional[List[float]]] = ContextVar("admission_ticket", default=None)
+
+class ProviderCircuitOpen(Exception):
+    """Raised by stream_plan when the provider's circuit breaker is open"""
+
+class BaseLLMModel:
+    """Common plumbing for plan-generating providers
+
+    Subclasses set the class attributes, build their SDK client in `_setup` and
+    implement `_complete` (and `_stream` for the streaming endpoint). Both receive
+    a PlanPrompt; structured prompts should use the provider's native JSON output.
+    Providers that need no key leave `api_key_setting` empty. Calls go through a
+    per-provider circuit breaker and requests/min and tokens/min admission, and
+    are retried on transient errors, so SDK clients should be built with their
+    own retries disabled.
+    """
+    provider = ""
+    display_name = ""
+    api_key_setting = ""
+    default_model_name = ""
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        api_key = getattr(config, self.api_key_setting, None) if self.api_key_setting else ""
+        if self.api_key_setting and not api_key:
+            raise ValueError(f"{self.display_name} API key not found in environment variables")
+
+        prefix = self.provider.upper()
+        self.model_name = getattr(config, f"{prefix}_MODEL", None) or self.default_model_name
+        self.semaphore = asyncio.Semaphore(getattr(config, f"{prefix}_MAX_CONCURRENCY", config.LLM_MAX_CONCURRENCY))
+        self.timeout = getattr(config, f"{prefix}_TIMEOUT", config.LLM_TIMEOUT)
+        self.http_client = http_client
+        self.breaker = CircuitBreaker(
+            self.provider,
+            failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=config.BREAKER_RESET_TIMEOUT,
+            half_open_max_calls=config.BREAKER_HALF_OPEN_MAX_CALLS,
+        )
+        self.admission = ProviderAdmission(
+            self.provider,
+            rpm=getattr(config, f"{prefix}_RPM", 0),
+            tpm=getattr(config, f"{prefix}_TPM", 0),
+            max_queue=config.PROVIDER_QUEUE_MAX,
+            max_wait=config.PROVIDER_QUEUE_MAX_WAIT,
+            # Each worker process admits against an equal share of the key's quota
+            headroom=config.PROVIDER_QUOTA_HEADROOM / config.WEB_CONCURRENCY,
+        )
+        self._setup(api_key)
+
+    def _setup(self, api_key: str):
+        raise NotImplementedError
+
+    async def _complete(self, prompt: PlanPrompt) -> str:
+        raise NotImplementedError
+
+    def _stream(self, prompt: PlanPrompt) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def warm_up(self):
+        """Open the provider connection ahead of the first request"""
+
+    async def aclose(self):
+        """Release provider resources not owned by the shared HTTP client"""
+
+    async def generate_plan(self, prompt: PlanPrompt) -> Optional[dict]:
+        return (await self.generate_extraction(prompt)).data
+
+    async def generate_extraction(self, prompt: PlanPrompt) -> ExtractionResult:
+        """generate_plan plus the repairs extraction needed; "closed_truncated" means the output was cut off"""
+        if not self.breaker.allow():
+            logger.warning(f"{self.display_name} circuit is open, skipping the call")
+            return ExtractionResult(None, [])
+
+        outcome = "error"
+        started = time.perf_counter()
+        timeout = adaptive_timeout(self.provider, self.timeout)
+        try:
+            logger.info(f"Generating plan with {self.display_name}")
+            response_text = await self._complete_with_retries(prompt, timeout)
+            self.breaker.record_success()
+            call_latency.record(self.provider, time.perf_counter() - started)
+
+            logger.info(f"{self.display_name} response length: {len(response_text)}")
+
+            # Try to extract JSON from the response
+            with span("extract"):
+                result = self.extract(response_text)
+            outcome = "success" if result.data else "unparsed"
+            return result
+
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            self.breaker.record_failure()
+            call_latency.record(self.provider, timeout)
+            logger.error(f"{self.display_name} request timed out after {timeout:.1f}s")
+            return ExtractionResult(None, [])
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            self.breaker.release()
+            raise
+        except AdmissionRejected:
+            # Our own quota limit, not a provider failure; the caller answers 429
+            outcome = "rejected"
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error generating plan with {self.display_name}: {str(e)}")
+            return ExtractionResult(None, [])
+        finally:
+            provider_request_duration.observe(time.perf_counter() - started, self.provider, outcome)
+
+    async def _complete_with_retries(self, prompt: PlanPrompt, timeout: float) -> str:
+        """_complete with a per-attempt timeout, retrying transient errors with jittered backoff"""
+        for attempt in range(config.LLM_MAX_RETRIES + 1):
+            try:
+                await self.admit(prompt)
+                # The concurrency slot is only held while a request is in flight, not during backoff
+                with span("queue"):
+                    await self.semaphore.acquire()
+                try:
+                    provider_requests_in_flight.inc(self.provider)
+                    with span("provider"):
+                        return await asyncio.wait_for(self._complete(prompt), timeout=timeout)
+                finally:
+                    provider_requests_in_flight.dec(self.provider)
+                    self.semaphore.release()
+            except Exception as e:
+                if attempt == config.LLM_MAX_RETRIES or not is_transient(e):
+                    raise
+                delay = retry_delay(attempt, e)
+                provider_retries.inc(self.provider)
+                logger.warning(f"{self.display_name} transient error ({str(e)}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def stream_plan(self, prompt: PlanPrompt, admitted: bool = False) -> AsyncIterator[str]:
+        """Yield response text chunks as the provider generates them
+
+        Raises asyncio.TimeoutError if the provider goes quiet for longer than
+        the timeout; that and provider errors count as breaker failures. Pass
+        `admitted` when `admit` was already called for this prompt.
+        """
+        if not self.breaker.allow():
+            raise ProviderCircuitOpen(f"{self.display_name} circuit is open")
+        logger.info(f"Streaming plan with {self.display_name}")
+
+        completed = False
+        try:
+            if not admitted:
+                await self.admit(prompt)
+        except BaseException:
+            self.breaker.release()
+            raise
+        async with self.semaphore:
+            provider_requests_in_flight.inc(self.provider)
+            try:
+                async for text in iterate_with_timeout(self._stream(prompt), self.timeout):
+                    if text:
+                        yield text
+                completed = True
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            finally:
+                provider_requests_in_flight.dec(self.provider)
+                if completed:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.release()
+
+    async def admit(self, prompt: PlanPrompt):
+        """Wait for this provider's quota, at the priority of the current request; raises AdmissionRejected if it can't be had in time"""
+        tokens = estimate_tokens(len(prompt.system) + len(prompt.user), config.MAX_TOKENS)
+        with span("queue"):
+            _admission_ticket.set(await self.admission.acquire(tokens, request_priority.get()))
+
+    def _record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int], cached_prompt_tokens: Optional[int] = None):
+        """Count tokens from the provider's usage fields (None when it doesn't report them)
+
+        `prompt_tokens` includes any `cached_prompt_tokens` served from the provider's prompt cache.
+        """
+        if prompt_tokens:
+            provider_tokens.inc(self.provider, "prompt", amount=prompt_tokens)
+        if completion_tokens:
+            provider_tokens.inc(self.provider, "completion", amount=completion_tokens)
+        if cached_prompt_tokens:
+            provider_tokens.inc(self.provider, "cached_prompt", amount=cached_prompt_tokens)
+        ticket = _admission_ticket.get()
+        if ticket is not None and (prompt_tokens or completion_tokens):
+            self.admission.settle(ticket, (prompt_tokens or 0) + (completion_tokens or 0))
+
+    def extract(self, text: str) -> ExtractionResult:
+        """Extract JSON from response text, repairing fences, trailing commas and truncation"""
+        return extract_json_counted(text, self.provider)
+
+    async def _warm_up_http(self, base_url: str):
+        """Establish a pooled keep-alive connection (TCP + TLS) to base_url"""
+        if self.http_client is None:
+            return
+        try:
+            await self.http_client.head(base_url, timeout=5)
+        except httpx.HTTPError as e:
+            logger.warning(f"{self.display_name} warm-up failed: {e!r}")
@@ -1,55 +1,91 @@
 import google.generativeai as genai
+from google.generativeai import client as genai_client
 from config.env_config import config
-import json
+from llm_models.base import BaseLLMModel
+from llm_models.registry import provider_registry
+from models.plan_schema import plan_response_schema, plan_schema_outline
+from templates.generate_plan import PlanPrompt, PLAN_SYSTEM_PROMPT
+import asyncio
 import logging
-from typing import Optional
+from typing import AsyncIterator
 
 logger = logging.getLogger(__name__)
 
-class GeminiModel:
-    def __init__(self):
-        if not config.GOOGLE_API_KEY:
-            raise ValueError("Google API key not found in environment variables")
-        
-        genai.configure(api_key=config.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel('gemini-pro')
-        
-    async def generate_plan(self, prompt: str) -> Optional[dict]:
-        try:
-            logger.info("Generating plan with Gemini")
-            
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=config.TEMPERATURE,
-                    max_output_tokens=config.MAX_TOKENS,
-                )
+# Gemini 1.0 models take neither a system instruction nor a response schema
+_NO_SCHEMA_MODELS = ("gemini-pro", "gemini-1.0")
+
+@provider_registry.register
+class GeminiModel(BaseLLMModel):
+    provider = "gemini"
+    display_name = "Gemini"
+    api_key_setting = "GOOGLE_API_KEY"
+    default_model_name = "gemini-1.5-flash"
+
+    def _setup(self, api_key: str):
+        # Gemini talks gRPC, so it keeps its own channel instead of the shared HTTP pool
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(self.model_name)
+        self.supports_schema = not self.model_name.startswith(_NO_SCHEMA_MODELS)
+        if not self.supports_schema:
+            logger.warning(f"{self.model_name} has no response schema support; compact prompts are sent as plain text")
+        # Structured mode: static system instruction plus a response schema
+        self.structured_model = genai.GenerativeModel(self.model_name, system_instruction=PLAN_SYSTEM_PROMPT)
+        self.structured_config = genai.types.GenerationConfig(
+            temperature=config.TEMPERATURE,
+            max_output_tokens=config.MAX_TOKENS,
+            response_mime_type="application/json",
+            response_schema=plan_response_schema(),
+        )
+
+    def _generation_config(self):
+        return genai.types.GenerationConfig(
+            temperature=config.TEMPERATURE,
+            max_output_tokens=config.MAX_TOKENS,
+        )
+
+    def _generate(self, prompt: PlanPrompt, **kwargs):
+        if prompt.structured and not self.supports_schema:
+            # Same fallback as Groq's JSON mode: instructions and a type outline in the prompt itself
+            text = f"{prompt.system}\n\nRespond with a JSON object of this shape (? = optional):\n{plan_schema_outline()}\n\n{prompt.user}"
+            return self.model.generate_content_async(text, generation_config=self._generation_config(), **kwargs)
+        if prompt.structured:
+            return self.structured_model.generate_content_async(
+                prompt.user,
+                generation_config=self.structured_config,
+                **kwargs
             )
-            
-            response_text = response.text
-            logger.info(f"Gemini response length: {len(response_text)}")
-            
-            # Try to extract JSON from the response
-            return self._extract_json(response_text)
-            
-        except Exception as e:
-            logger.error(f"Error generating plan with Gemini: {str(e)}")
-            return None
-    
-    def _extract_json(self, text: str) -> Optional[dict]:
-        """Extract JSON from response text"""
+        return self.model.generate_content_async(
+            prompt.user,
+            generation_config=self._generation_config(),
+            **kwargs
+        )
+
+    async def _complete(self, prompt: PlanPrompt) -> str:
+        response = await self._generate(prompt)
+        self._record_gemini_usage(response)
+        return response.text
+
+    async def _stream(self, prompt: PlanPrompt) -> AsyncIterator[str]:
+        response = await self._generate(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+        self._record_gemini_usage(response)
+
+    def _record_gemini_usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self._record_usage(
+                usage.prompt_token_count,
+                usage.candidates_token_count,
+                getattr(usage, "cached_content_token_count", None)
+            )
+
+    async def warm_up(self):
         try:
-            # Try to find JSON in the response
-            start_idx = text.find('{')
-            end_idx = text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = text[start_idx:end_idx]
-                return json.loads(json_str)
-            
-            # If no JSON found, try to parse the entire response
-            return json.loads(text)
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            return None
+            # The async client binds to the running loop, so it is created here rather than in _setup
+            async_client = genai_client.get_default_generative_async_client()
+            channel = getattr(async_client.transport, "grpc_channel", None)
+            if channel is not None:
+                await asyncio.wait_for(channel.channel_ready(), timeout=5)
+        except Exception as e:
+            logger.warning(f"Gemini warm-up failed: {e!r}")
@@ -1,55 +1,56 @@
-from groq import Groq
+from groq import AsyncGroq
 from config.env_config import config
-import json
-import logging
-from typing import Optional
+from llm_models.base import BaseLLMModel
+from llm_models.registry import provider_registry
+from models.plan_schema import plan_schema_outline
+from templates.generate_plan import PlanPrompt
+from typing import AsyncIterator
 
-logger = logging.getLogger(__name__)
+@provider_registry.register
+class GroqModel(BaseLLMModel):
+    provider = "groq"
+    display_name = "Groq"
+    api_key_setting = "GROQ_API_KEY"
+    default_model_name = "llama3-70b-8192"
 
-class GroqModel:
-    def __init__(self):
-        if not config.GROQ_API_KEY:
-            raise ValueError("Groq API key not found in environment variables")
-        
-        self.client = Groq(api_key=config.GROQ_API_KEY)
-        
-    async def generate_plan(self, prompt: str) -> Optional[dict]:
-        try:
-            logger.info("Generating plan with Groq")
-            
-            response = self.client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=config.TEMPERATURE,
-                max_tokens=config.MAX_TOKENS,
-            )
-            
-            response_text = response.choices[0].message.content
-            logger.info(f"Groq response length: {len(response_text)}")
-            
-            return self._extract_json(response_text)
-            
-        except Exception as e:
-            logger.error(f"Error generating plan with Groq: {str(e)}")
-            return None
-    
-    def _extract_json(self, text: str) -> Optional[dict]:
-        """Extract JSON from response text"""
-        try:
-            start_idx = text.find('{')
-            end_idx = text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = text[start_idx:end_idx]
-                return json.loads(json_str)
-            
-            return json.loads(text)
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            return None
+    def _setup(self, api_key: str):
+        self.client = AsyncGroq(api_key=api_key, timeout=self.timeout, max_retries=0, http_client=self.http_client)
+
+    def _request(self, prompt: PlanPrompt) -> dict:
+        request = {
+            "model": self.model_name,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt.user
+                }
+            ],
+            "temperature": config.TEMPERATURE,
+            "max_tokens": config.MAX_TOKENS,
+        }
+        if prompt.structured:
+            # JSON mode guarantees valid JSON but takes no schema, so the outline goes in the system message
+            system = f"{prompt.system}\n\nRespond with a JSON object of this shape (? = optional):\n{plan_schema_outline()}"
+            request["messages"].insert(0, {"role": "system", "content": system})
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    async def _complete(self, prompt: PlanPrompt) -> str:
+        response = await self.client.chat.completions.create(**self._request(prompt))
+        if response.usage is not None:
+            self._record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    async def _stream(self, prompt: PlanPrompt) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(**self._request(prompt), stream=True)
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content
+            # The last chunk carries usage in the untyped x_groq extension field
+            x_groq = getattr(chunk, "x_groq", None)
+            usage = x_groq.get("usage") if isinstance(x_groq, dict) else None
+            if usage:
+                self._record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+
+    async def warm_up(self):
+        await self._warm_up_http(str(self.client.base_url))
@@ -0,0 +1,214 @@
+import json
+import logging
+import re
+from collections import Counter
+from typing import List, NamedTuple, Optional
+
+from services.metrics import json_extractions
+
+try:
+    import orjson
+except ImportError:  # optional, stdlib json is the fallback
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Whole strings, structural characters, an unterminated opening quote, or a bare
+# literal (number, true, false, null)
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\],:]|"|[^\s"{}\[\],:]+')
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|\Z)", re.DOTALL)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# How many '{' positions to try before giving up on a response
+MAX_START_ATTEMPTS = 5
+
+# Outcome counters: clean, repaired, failed
+extraction_stats = Counter()
+
+
+class ExtractionResult(NamedTuple):
+    data: Optional[dict]
+    repairs: List[str]
+
+
+def loads(text: str):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _try_loads(text: str) -> Optional[dict]:
+    try:
+        value = loads(text)
+    except ValueError:  # orjson.JSONDecodeError and json.JSONDecodeError both subclass it
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _scan(text: str, start: int):
+    """Single pass over one JSON object starting at text[start] == '{'
+
+    Returns (end, comma_removals, safe_end, safe_closers): `end` is the index just past
+    the balancing '}' or None if the text ran out first. `safe_end`/`safe_closers` mark
+    where cutting and closing the open containers yields valid JSON: before the
+    innermost half-written array element if there is one (a partial record is usually
+    missing required fields), otherwise after the last complete value.
+    """
+    stack = []
+    expect_key = []
+    # For each open container: the safe point just before it if it is an array element
+    element_cuts = []
+    removals = []
+    last_comma = None
+    # Every pop records a new safe point, so stack[:safe_depth] is still what it was then
+    safe_end, safe_depth = start, 0
+
+    for match in _TOKEN.finditer(text, start):
+        token = match.group()
+        pos = match.start()
+
+        if token[0] == '"':
+            if len(token) == 1 or token[-1] != '"' or match.end() - pos < 2:
+                break  # unterminated string, output was cut off
+            last_comma = None
+            if not (stack and stack[-1] == "{" and expect_key[-1]):
+                safe_end, safe_depth = match.end(), len(stack)
+        elif token == "{" or token == "[":
+            in_array = bool(stack) and stack[-1] == "["
+            element_cuts.append((safe_end, len(stack)) if in_array else None)
+            stack.append(token)
+            expect_key.append(token == "{")
+            last_comma = None
+            safe_end, safe_depth = pos + 1, len(stack)
+        elif token == "}" or token == "]":
+            if last_comma is not None:
+                removals.append(last_comma)
+                last_comma = None
+            if not stack:
+                break
+            stack.pop()
+            expect_key.pop()
+            element_cuts.pop()
+            if not stack:
+                return pos + 1, removals, safe_end, ""
+            safe_end, safe_depth = pos + 1, len(stack)
+        elif token == ",":
+            # Everything before this comma is a complete value
+            if last_comma is None:
+                safe_end, safe_depth = pos, len(stack)
+            last_comma = pos
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+        elif token == ":":
+            if stack and stack[-1] == "{":
+                expect_key[-1] = False
+            last_comma = None
+        else:
+            # A literal is an element, so a comma before it isn't trailing; it may be cut
+            # off ("12" of "125"), so it only counts as complete once a ',' or closer follows
+            last_comma = None
+
+    for cut in reversed(element_cuts):
+        if cut is not None:
+            safe_end, safe_depth = cut
+            break
+    closers = "".join(_CLOSERS[c] for c in reversed(stack[:safe_depth]))
+    return None, removals, safe_end, closers
+
+
+def _strip_removals(text: str, removals: List[int]) -> str:
+    if not removals:
+        return text
+    parts = []
+    previous = 0
+    for index in removals:
+        parts.append(text[previous:index])
+        previous = index + 1
+    parts.append(text[previous:])
+    return "".join(parts)
+
+
+def _unfence(text: str) -> Optional[str]:
+    """Body of the first markdown code fence that contains an object"""
+    for match in _FENCE.finditer(text):
+        body = match.group(1)
+        if "{" in body:
+            return body
+    return None
+
+
+def extract_json(text: str) -> ExtractionResult:
+    """Pull the plan object out of model output, repairing common defects
+
+    Handles prose and stray braces around the object, markdown fences, trailing
+    commas and output truncated mid-object (e.g. at the max token limit).
+    """
+    if not text:
+        return ExtractionResult(None, [])
+    repairs = []
+
+    # Fast path: the object spans the first '{' to the last '}' and parses as is
+    first = text.find("{")
+    last = text.rfind("}")
+    if first != -1 and last > first:
+        data = _try_loads(text[first:last + 1])
+        if data is not None:
+            return ExtractionResult(data, repairs)
+
+    if "```" in text:
+        fenced = _unfence(text)
+        if fenced is not None:
+            text = fenced
+            repairs.append("markdown_fence")
+            first = text.find("{")
+
+    attempts = 0
+    while first != -1 and attempts < MAX_START_ATTEMPTS:
+        attempts += 1
+        end, removals, safe_end, safe_closers = _scan(text, first)
+        if end is not None:
+            data = _try_loads(_strip_removals(text[first:end], [i - first for i in removals]))
+            if data is not None:
+                if attempts > 1:
+                    repairs.append("skipped_stray_braces")
+                if removals:
+                    repairs.append("trailing_comma")
+                return ExtractionResult(data, repairs)
+        elif safe_end > first:
+            # Truncated: cut back to the last complete value and close what's open
+            body = _strip_removals(text[first:safe_end], [i - first for i in removals if i < safe_end])
+            data = _try_loads(body + safe_closers)
+            if data:
+                if attempts > 1:
+                    repairs.append("skipped_stray_braces")
+                if removals:
+                    repairs.append("trailing_comma")
+                repairs.append("closed_truncated")
+                return ExtractionResult(data, repairs)
+        # Stray brace in prose: try the next candidate, skipping a balanced
+        # region whole so an inner object is never mistaken for the plan
+        first = text.find("{", end if end is not None else first + 1)
+
+    # Last resort, the whole response
+    data = _try_loads(text)
+    return ExtractionResult(data, repairs)
+
+
+def extract_json_counted(text: str, source: str = "model") -> ExtractionResult:
+    """extract_json plus outcome counters and logging"""
+    result = extract_json(text)
+    if result.data is None:
+        extraction_stats["failed"] += 1
+        json_extractions.inc(source, "failed")
+        logger.error(f"Could not extract JSON from {source} response ({len(text or '')} chars)")
+    elif result.repairs:
+        extraction_stats["repaired"] += 1
+        json_extractions.inc(source, "repaired")
+        for repair in result.repairs:
+            extraction_stats[f"repair:{repair}"] += 1
+        logger.warning(f"Repaired {source} JSON: {', '.join(result.repairs)}")
+    else:
+        extraction_stats["clean"] += 1
+        json_extractions.inc(source, "clean")
+    return result
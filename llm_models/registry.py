@@ -0,0 +1,158 @@
+from config.env_config import config
+import asyncio
+import importlib
+import logging
+from typing import Dict, List, Optional, Tuple, Type
+
+import httpx
+
+from llm_models.base import BaseLLMModel
+from llm_models.stub import StubModel
+
+logger = logging.getLogger(__name__)
+
+class ProviderUnavailable(Exception):
+    pass
+
+class ProviderRegistry:
+    """Provider classes by name, plus the model instances and shared HTTP pool built at startup
+
+    Providers are declared by module path; a provider's module, and the SDK it
+    wraps, is only imported once the provider is enabled and has an API key.
+    """
+
+    def __init__(self):
+        # provider -> (module registering its class, API key setting)
+        self._modules: Dict[str, Tuple[str, str]] = {}
+        self._classes: Dict[str, Type[BaseLLMModel]] = {}
+        self._models: Dict[str, BaseLLMModel] = {}
+        self._errors: Dict[str, str] = {}
+        self.http_client: Optional[httpx.AsyncClient] = None
+
+    def register(self, cls: Type[BaseLLMModel]) -> Type[BaseLLMModel]:
+        """Class decorator: make a provider available under cls.provider"""
+        self._classes[cls.provider] = cls
+        return cls
+
+    def declare(self, provider: str, module: str, api_key_setting: str = ""):
+        """Make a provider available without importing its module yet"""
+        self._modules[provider] = (module, api_key_setting)
+
+    @property
+    def providers(self) -> List[str]:
+        return list(self._modules)
+
+    def configured(self, provider: str) -> bool:
+        """Enabled in ENABLED_PROVIDERS (or no list given) and stubbed or holding an API key"""
+        if config.ENABLED_PROVIDERS and provider not in config.ENABLED_PROVIDERS:
+            return False
+        _, api_key_setting = self._modules[provider]
+        return provider in config.STUB_PROVIDERS or not api_key_setting or bool(getattr(config, api_key_setting, None))
+
+    def load_modules(self) -> List[str]:
+        """Import the modules of the configured providers without building them
+
+        gunicorn.conf.py calls this in the master, so workers fork with the SDKs already imported.
+        """
+        loaded = []
+        for provider in self._modules:
+            if provider in config.STUB_PROVIDERS or not self.configured(provider):
+                continue
+            try:
+                self._load(provider)
+                loaded.append(provider)
+            except ValueError as e:
+                logger.warning(str(e))
+        return loaded
+
+    def _load(self, provider: str) -> Type[BaseLLMModel]:
+        """The provider's class, importing its module on first use"""
+        if provider not in self._classes:
+            module, _ = self._modules[provider]
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                raise ValueError(f"{provider} SDK is not installed: {str(e)}")
+        return self._classes[provider]
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(config.LLM_TIMEOUT, connect=10.0),
+        )
+
+    def _build(self, provider: str) -> BaseLLMModel:
+        if self.http_client is None:
+            self.http_client = self._build_http_client()
+        try:
+            if config.ENABLED_PROVIDERS and provider not in config.ENABLED_PROVIDERS:
+                raise ValueError(f"{provider} is not in ENABLED_PROVIDERS")
+            if provider in config.STUB_PROVIDERS:
+                model = StubModel(provider, http_client=self.http_client)
+            elif not self.configured(provider):
+                raise ValueError(f"{self._modules[provider][1]} not found in environment variables")
+            else:
+                model = self._load(provider)(http_client=self.http_client)
+        except ValueError as e:
+            self._errors[provider] = str(e)
+            raise
+        self._models[provider] = model
+        self._errors.pop(provider, None)
+        return model
+
+    async def startup(self):
+        """Build every configured provider and warm its connections"""
+        for provider in self._modules:
+            if provider in self._models:
+                continue
+            try:
+                self._build(provider)
+            except ValueError as e:
+                logger.info(f"Provider {provider} not configured: {str(e)}")
+
+        if config.PROVIDER_WARMUP and self._models:
+            await asyncio.gather(*(model.warm_up() for model in self._models.values()), return_exceptions=True)
+        logger.info(f"Providers ready: {', '.join(self._models) or 'none'}")
+
+    async def shutdown(self):
+        for model in self._models.values():
+            try:
+                await model.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {model.provider}: {str(e)}")
+        self._models.clear()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    def get(self, provider: str) -> BaseLLMModel:
+        model = self._models.get(provider)
+        if model is not None:
+            return model
+        if provider not in self._modules:
+            raise ProviderUnavailable(f"Unknown provider: {provider}")
+        try:
+            # Built lazily when running without the app lifespan (e.g. scripts)
+            return self._build(provider)
+        except ValueError as e:
+            raise ProviderUnavailable(str(e))
+
+    def status(self) -> Dict[str, str]:
+        return {
+            provider: "ready" if provider in self._models else self._errors.get(provider, "not started")
+            for provider in self._modules
+        }
+
+    def breakers(self) -> Dict[str, dict]:
+        """Circuit breaker state of each built provider"""
+        return {provider: model.breaker.snapshot() for provider, model in self._models.items()}
+
+    def admission(self) -> Dict[str, dict]:
+        """Quota usage and queue of each built provider"""
+        return {provider: model.admission.stats() for provider, model in self._models.items()}
+
+provider_registry = ProviderRegistry()
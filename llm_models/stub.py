@@ -0,0 +1,142 @@
+import asyncio
+import json
+import random
+import re
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+import httpx
+
+from config.env_config import config
+from llm_models.base import BaseLLMModel
+from llm_models.json_extract import extract_json
+from models.plan_model import MealPlan, WorkoutDay, WorkoutPlan, WorkoutOverview, PlanExtras
+from models.plan_schema import schema_outline
+from templates.generate_plan import PlanPrompt
+
+DEFAULT_RESPONSES_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "model_outputs"
+
+# Roughly how many characters a model token covers, and tokens per streamed chunk
+CHARS_PER_TOKEN = 4
+TOKENS_PER_CHUNK = 4
+
+# A value followed by a closing bracket, for injecting trailing commas
+_VALUE_BEFORE_CLOSE = re.compile(r'(["\d\]}])(\s*[}\]])')
+
+
+# Section prompts (see services/plan_sections.py) carry their model's outline; the stub
+# answers them with that part of a recorded plan. WorkoutPlan's outline contains
+# WorkoutDay's, so it is checked first.
+SECTION_PARTS = [
+    (WorkoutPlan, lambda plan: plan["workout_plan"]),
+    (WorkoutDay, lambda plan: plan["workout_plan"]["weekly_schedule"][0]),
+    (WorkoutOverview, lambda plan: {k: v for k, v in plan["workout_plan"].items() if k != "weekly_schedule"}),
+    (MealPlan, lambda plan: plan["meal_plan"]),
+    (PlanExtras, lambda plan: {
+        "general_recommendations": plan.get("general_recommendations", []),
+        "progress_tracking": plan.get("progress_tracking", {}),
+    }),
+]
+
+
+def load_responses(directory: Path) -> List[str]:
+    """Recorded responses that parse without any repair"""
+    responses = []
+    for path in sorted(directory.glob("*.txt")):
+        text = path.read_text()
+        result = extract_json(text)
+        if result.data is not None and not result.repairs:
+            responses.append(text)
+    return responses
+
+
+def section_response(prompt: PlanPrompt, text: str) -> str:
+    """The part of a recorded plan a section prompt asks for, or the whole response"""
+    if prompt.structured:
+        return text
+    for section_model, part in SECTION_PARTS:
+        if schema_outline(section_model) in prompt.user:
+            return json.dumps(part(extract_json(text).data), indent=2)
+    return text
+
+
+class StubError(Exception):
+    # Injected errors look like a provider 503, so they are retried like one
+    status_code = 503
+
+
+class StubModel(BaseLLMModel):
+    """Offline stand-in for a provider, replaying recorded plan responses
+
+    Bound to real provider names through STUB_PROVIDERS so the whole request path
+    (cache, coalescing, hedging, extraction, fallback) runs without network access.
+    Latency is lognormal around STUB_LATENCY_MEDIAN to the first token, after which
+    the response streams at STUB_TOKENS_PER_SECOND. STUB_ERROR_RATE and
+    STUB_MALFORMED_RATE inject provider errors and damaged output. Section prompts
+    get the matching part of a recorded plan, so section-parallel generation works too.
+    """
+    display_name = "Stub"
+    default_model_name = "stub"
+
+    def __init__(self, provider: str, http_client: Optional[httpx.AsyncClient] = None):
+        self.provider = provider
+        self.display_name = f"Stub ({provider})"
+        super().__init__(http_client)
+        # Keep stub plans out of the real providers' cache entries
+        self.model_name = self.default_model_name
+
+    def _setup(self, api_key: str):
+        directory = Path(config.STUB_RESPONSES_DIR) if config.STUB_RESPONSES_DIR else DEFAULT_RESPONSES_DIR
+        self.responses = load_responses(directory)
+        if not self.responses:
+            raise ValueError(f"No clean recorded responses found in {directory}")
+        self.random = random.Random(config.STUB_SEED) if config.STUB_SEED is not None else random.Random()
+
+    def _first_token_delay(self) -> float:
+        if config.STUB_LATENCY_MEDIAN <= 0:
+            return 0.0
+        return self.random.lognormvariate(0.0, config.STUB_LATENCY_SIGMA) * config.STUB_LATENCY_MEDIAN
+
+    def _token_delay(self, text: str) -> float:
+        if config.STUB_TOKENS_PER_SECOND <= 0:
+            return 0.0
+        return len(text) / CHARS_PER_TOKEN / config.STUB_TOKENS_PER_SECOND
+
+    def _pick_response(self, prompt: PlanPrompt) -> str:
+        text = section_response(prompt, self.random.choice(self.responses))
+        if self.random.random() < config.STUB_MALFORMED_RATE:
+            return self._damage(text)
+        return text
+
+    def _damage(self, text: str) -> str:
+        kind = self.random.choice(["truncated", "trailing_comma", "prose"])
+        if kind == "truncated":
+            # Cut somewhere in the second half, like a max-token cutoff
+            return text[:self.random.randint(len(text) // 2, len(text) - 1)]
+        if kind == "trailing_comma":
+            return _VALUE_BEFORE_CLOSE.sub(r"\1,\2", text)
+        return "I'm sorry, I can't produce a structured plan for this profile right now."
+
+    def _maybe_fail(self):
+        if self.random.random() < config.STUB_ERROR_RATE:
+            raise StubError(f"{self.display_name} injected error")
+
+    async def _complete(self, prompt: PlanPrompt) -> str:
+        text = self._pick_response(prompt)
+        await asyncio.sleep(self._first_token_delay() + self._token_delay(text))
+        self._maybe_fail()
+        self._record_usage((len(prompt.system) + len(prompt.user)) // CHARS_PER_TOKEN, len(text) // CHARS_PER_TOKEN)
+        return text
+
+    async def _stream(self, prompt: PlanPrompt) -> AsyncIterator[str]:
+        text = self._pick_response(prompt)
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        chunk_size = CHARS_PER_TOKEN * TOKENS_PER_CHUNK
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start:start + chunk_size]
+            delay = self._token_delay(chunk)
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+        self._record_usage((len(prompt.system) + len(prompt.user)) // CHARS_PER_TOKEN, len(text) // CHARS_PER_TOKEN)
@@ -1,7 +1,16 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
 from api.routes import router
+from llm_models import provider_registry
+from services.plan_jobs import plan_job_runner
+from services.metrics import metrics_registry, http_request_duration, http_requests_in_flight
+from services.profiling import sampling_profiler
+from services.request_timing import RequestTiming, request_timing
+import json
 import logging
+import time
 import uvicorn
 from config.env_config import config
 
@@ -13,15 +22,101 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build provider clients and open their connections before serving traffic
+    await provider_registry.startup()
+    await plan_job_runner.start()
+    yield
+    await plan_job_runner.shutdown()
+    await provider_registry.shutdown()
+
 # Create FastAPI app
 app = FastAPI(
     title="FitPlanner API",
     description="A comprehensive fitness planning API with multiple AI providers",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each request, streamed bodies included, by route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _route(self, scope) -> str:
+        if self._route_paths is None:
+            # The router leaves the matched endpoint in the scope; label by its path template
+            self._route_paths = {route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")}
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], self._route(scope), str(status))
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware returning per-stage timings as a Server-Timing header
+
+    Also starts the sampling profiler on the requests it picks. With timing off
+    and no profiler sample rate, a request only pays two attribute reads here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (config.SERVER_TIMING_ENABLED or sampling_profiler.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming() if config.SERVER_TIMING_ENABLED else None
+        token = request_timing.set(timing)
+        recording = sampling_profiler.maybe_start(f"{scope['method']} {scope['path']}")
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                if timing is not None:
+                    headers.append((b"server-timing", timing.header().encode("latin-1")))
+                if recording is not None:
+                    headers.append((b"x-profile", recording.name.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timing.reset(token)
+            if recording is not None:
+                sampling_profiler.stop(recording)
+            if timing is not None and config.SERVER_TIMING_LOG:
+                record = {"method": scope["method"], "path": scope["path"], "status": status, **timing.summary()}
+                logger.info(f"Request timing {json.dumps(record, separators=(',', ':'))}")
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +126,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(RequestTimingMiddleware)
+
+# Outermost, so the timing covers the other middleware too
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(router, prefix="/api")
 
@@ -42,6 +142,11 @@ async def root():
         "health": "/api/health"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Global exception handler caught: {str(exc)}")
@@ -53,6 +158,6 @@ if __name__ == "__main__":
         "main:app",
         host=config.API_HOST,
         port=config.API_PORT,
-        reload=True,
+        reload=config.API_RELOAD,
         log_level="info"
     )
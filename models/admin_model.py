@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilerSettings(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1, description="Share of requests to profile; 0 turns the profiler off")
+    max_profiles: int = Field(20, ge=1, le=1000, description="Profiles to write before the profiler turns itself off")
+    interval_ms: float = Field(5, ge=1, le=100, description="Milliseconds between stack samples")
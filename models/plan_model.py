@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, TypeAdapter
+from typing import Dict, List, Literal, Optional, Any
 
 class MacronutrientBreakdown(BaseModel):
     protein: str
@@ -45,8 +45,48 @@ class FitnessPlan(BaseModel):
     general_recommendations: Optional[List[str]] = []
     progress_tracking: Optional[Dict[str, str]] = {}
 
+# Built once at import and shared by every path that validates plan dicts
+fitness_plan_adapter = TypeAdapter(FitnessPlan)
+
+def validate_plan(data: Dict[str, Any]) -> FitnessPlan:
+    """Validate a plan dict (model output, cache or index payload) into a FitnessPlan"""
+    return fitness_plan_adapter.validate_python(data)
+
+# Partial plans returned by section-parallel generation
+class WorkoutOverview(BaseModel):
+    goal: str
+    frequency: str
+    split: str
+    progression_notes: Optional[List[str]] = []
+    safety_tips: Optional[List[str]] = []
+
+class PlanExtras(BaseModel):
+    general_recommendations: Optional[List[str]] = []
+    progress_tracking: Optional[Dict[str, str]] = {}
+
 class PlanResponse(BaseModel):
     status: str
     message: Optional[str] = None
     data: Optional[FitnessPlan] = None
     error: Optional[str] = None
+    # Cache id of the plan, for /api/regenerate-plan
+    plan_id: Optional[str] = None
+
+class RegenerationResponse(PlanResponse):
+    # Parts re-prompted or recomputed; everything else was reused from the previous plan.
+    # A part that failed and was filled from the fallback is listed as "<part>:fallback".
+    regenerated: List[str] = []
+
+class PlanJobResult(PlanResponse):
+    cached: bool = False
+
+class PlanJob(BaseModel):
+    job_id: str
+    provider: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    result: Optional[PlanJobResult] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+from models.plan_model import FitnessPlan
+
+# Keys the plan prompt has always asked for in the free-form maps. Schema dialects
+# without open-ended objects (Gemini) get these as fixed properties instead.
+MAP_KEYS = {
+    "sample_meals": ["breakfast", "lunch", "dinner", "snacks"],
+    "progress_tracking": ["weight", "measurements", "performance"],
+}
+
+_DROPPED_KEYS = {"title", "default"}
+
+
+def _inline(node: Dict[str, Any], defs: Dict[str, Any], field: Optional[str], closed_maps: bool) -> Dict[str, Any]:
+    """Resolve $refs and Optional unions; with closed_maps, turn free-form maps into fixed properties"""
+    if "$ref" in node:
+        return _inline(defs[node["$ref"].rsplit("/", 1)[-1]], defs, field, closed_maps)
+
+    if "anyOf" in node:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        result = _inline(options[0], defs, field, closed_maps)
+        if closed_maps and len(options) < len(node["anyOf"]):
+            result["nullable"] = True
+        return result
+
+    result = {key: value for key, value in node.items() if key not in _DROPPED_KEYS and key != "$defs"}
+    if "properties" in node:
+        result["properties"] = {
+            name: _inline(child, defs, name, closed_maps) for name, child in node["properties"].items()
+        }
+        # An optional property may already be left out, so nullable only costs schema tokens
+        for name, child in result["properties"].items():
+            if name not in node.get("required", ()):
+                child.pop("nullable", None)
+    if "items" in node:
+        result["items"] = _inline(node["items"], defs, field, closed_maps)
+    if "additionalProperties" in node and isinstance(node["additionalProperties"], dict):
+        values = _inline(node["additionalProperties"], defs, None, closed_maps)
+        if closed_maps and field in MAP_KEYS:
+            del result["additionalProperties"]
+            result["properties"] = {key: dict(values) for key in MAP_KEYS[field]}
+            result["required"] = list(MAP_KEYS[field])
+        else:
+            result["additionalProperties"] = values
+    return result
+
+
+@lru_cache(maxsize=None)
+def _schema(model: Type[BaseModel], closed_maps: bool) -> Dict[str, Any]:
+    schema = model.model_json_schema()
+    return _inline(schema, schema.get("$defs", {}), None, closed_maps)
+
+
+def plan_json_schema() -> Dict[str, Any]:
+    """FitnessPlan as self-contained JSON Schema (no $refs), e.g. for a tool input schema"""
+    return _schema(FitnessPlan, False)
+
+
+def plan_response_schema() -> Dict[str, Any]:
+    """FitnessPlan in the OpenAPI subset Gemini accepts as a response schema"""
+    return _schema(FitnessPlan, True)
+
+
+def _outline(node: Dict[str, Any], field: Optional[str] = None) -> str:
+    kind = node.get("type")
+    if kind == "array":
+        return "[" + _outline(node["items"]) + "]"
+    if kind == "object":
+        if "properties" in node:
+            required = set(node.get("required", []))
+            fields = (
+                f"{name}{'' if name in required else '?'}:{_outline(child, name)}"
+                for name, child in node["properties"].items()
+            )
+            return "{" + ",".join(fields) + "}"
+        values = _outline(node.get("additionalProperties", {"type": "string"}))
+        return "{" + ",".join(f"{key}:{values}" for key in MAP_KEYS.get(field, ["<key>"])) + "}"
+    return {"string": "str", "integer": "int", "number": "num", "boolean": "bool"}.get(kind, "any")
+
+
+@lru_cache(maxsize=None)
+def schema_outline(model: Type[BaseModel]) -> str:
+    """One-line type outline of a model for prompts (`?` marks optional fields)"""
+    return _outline(_schema(model, False))
+
+
+def plan_schema_outline() -> str:
+    return schema_outline(FitnessPlan)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import List, Optional, Literal
+from models.plan_model import FitnessPlan
 
 class UserProfile(BaseModel):
     # Basic Info
@@ -73,6 +74,19 @@ class UserProfile(BaseModel):
     equipment_available: Optional[str] = Field("Basic gym equipment", description="Available equipment")
     time_per_session: Optional[int] = Field(60, ge=15, le=180, description="Minutes per workout session")
 
+AIProvider = Literal["gemini", "anthropic", "groq", "local"]
+
 class PlanRequest(BaseModel):
     user_profile: UserProfile
-    ai_provider: Literal["gemini", "anthropic", "groq"] = Field("gemini", description="AI provider to use")
+    ai_provider: AIProvider = Field("gemini", description="AI provider to use; \"local\" builds a rule-based plan instantly without a model")
+
+class RegeneratePlanRequest(BaseModel):
+    previous_profile: UserProfile = Field(..., description="Profile the previous plan was generated for")
+    user_profile: UserProfile = Field(..., description="Updated profile")
+    ai_provider: AIProvider = Field("gemini", description="AI provider to use")
+    previous_plan: Optional[FitnessPlan] = Field(None, description="The previous plan; or give plan_id")
+    plan_id: Optional[str] = Field(None, description="plan_id of a previous response, looked up in the plan cache")
+
+
+class BulkPlanRequest(BaseModel):
+    requests: List[PlanRequest] = Field(..., min_length=1, description="Plan requests to generate as one batch")
@@ -0,0 +1,322 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, List, Optional, Tuple
+
+from config.env_config import config
+from services.metrics import admission_rejections, admission_wait, admission_queue_depth
+from services.shared_state import SQLiteThread, after_fork, connect
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first when calls queue for provider quota
+PRIORITY_INTERACTIVE = 0
+PRIORITY_JOB = 1
+PRIORITY_BULK = 2
+
+# Priority of the provider calls made by the current request or worker task
+request_priority: ContextVar[int] = ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+# Provider quotas are per minute
+QUOTA_WINDOW = 60.0
+CHARS_PER_TOKEN = 4
+
+
+class AdmissionRejected(Exception):
+    """A call or request was refused for now; retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(prompt_chars: int, max_tokens: int) -> int:
+    """Quota cost of one call before it runs: prompt at ~4 chars/token plus the full output budget"""
+    return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+
+class ClientRateLimiter:
+    """Token bucket per client (API key or IP), `per_minute` refill with up to `burst` saved up
+
+    Buckets are kept in memory, or in SQLite at `db_path` so that every worker
+    process draws on the same bucket; those are read and written off the event
+    loop, on the limiter's SQLite thread.
+    """
+
+    def __init__(self, per_minute: float = 0, burst: int = 10, max_clients: int = 100000, db_path: Optional[str] = None):
+        self.per_minute = per_minute
+        self.burst = burst
+        self.max_clients = max_clients
+        self.db_path = db_path
+        # client -> [tokens, last refill (monotonic)], least recently seen first
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._db = None
+        self._thread = SQLiteThread("rate-limit")
+        self._checks = 0
+        self.rejected = 0
+
+        if db_path and self.enabled:
+            self._open_db(db_path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    async def check(self, client: str):
+        """Take one token for the client; raises AdmissionRejected when its bucket is empty"""
+        if not self.enabled:
+            return
+        tokens = await self._thread.run(self._take_shared, client) if self._db is not None else self._take(client)
+        if tokens < 1.0:
+            self.rejected += 1
+            admission_rejections.inc("client", "rate_limited")
+            raise AdmissionRejected("Too many requests from this client", (1.0 - tokens) / (self.per_minute / 60.0))
+
+    async def stats(self) -> dict:
+        return {
+            "per_minute": self.per_minute,
+            "burst": self.burst,
+            "clients": await self._thread.run(self._shared_clients) if self._db is not None else len(self._buckets),
+            "rejected": self.rejected,
+        }
+
+    def _take(self, client: str) -> float:
+        """Refill the client's bucket and take a token if there is one; returns the tokens it held"""
+        now = time.monotonic()
+        bucket = self._buckets.pop(client, None) or [float(self.burst), now]
+        bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.per_minute / 60.0)
+        bucket[1] = now
+        self._buckets[client] = bucket
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        tokens = bucket[0]
+        if tokens >= 1.0:
+            bucket[0] -= 1.0
+        return tokens
+
+    # Shared SQLite buckets, refilled by wall clock since workers don't share a monotonic clock
+
+    def _open_db(self, db_path: str):
+        self._db = connect(db_path)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS client_buckets (
+                client TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+        after_fork(self._reconnect)
+
+    def _reconnect(self):
+        self._thread.reset()
+        self._db = connect(self.db_path)
+
+    def _take_shared(self, client: str) -> float:
+        now = time.time()
+        try:
+            # Take the write lock up front so two workers can't both spend the same token
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT tokens, updated_at FROM client_buckets WHERE client = ?", (client,)
+            ).fetchone()
+            tokens = float(self.burst)
+            if row is not None:
+                tokens = min(tokens, row[0] + max(0.0, now - row[1]) * self.per_minute / 60.0)
+            self._db.execute(
+                "INSERT OR REPLACE INTO client_buckets (client, tokens, updated_at) VALUES (?, ?, ?)",
+                (client, tokens - 1.0 if tokens >= 1.0 else tokens, now),
+            )
+            self._checks += 1
+            if self._checks % 1000 == 0:
+                # Buckets idle long enough to have refilled are the same as no bucket
+                self._db.execute(
+                    "DELETE FROM client_buckets WHERE updated_at < ?", (now - self.burst * 60.0 / self.per_minute,)
+                )
+            self._db.commit()
+            return tokens
+        except sqlite3.Error as e:
+            # Fail open: a locked or broken store shouldn't turn away every request
+            self._db.rollback()
+            logger.error(f"Shared rate limit error: {str(e)}")
+            return float(self.burst)
+
+    def _shared_clients(self) -> int:
+        try:
+            return self._db.execute("SELECT COUNT(*) FROM client_buckets").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+class ProviderAdmission:
+    """Keeps one provider's calls within its requests/min and tokens/min quotas
+
+    Admitted calls are logged in a sliding 60 s window, so no 60 s span ever
+    holds more than the (headroom-scaled) quota. Calls that don't fit wait in a
+    bounded priority queue and are dispatched in (priority, arrival) order as
+    the window frees up. A full queue, or a wait longer than `max_wait`, raises
+    AdmissionRejected at once. Token costs are estimated up front and settled
+    to the provider-reported usage afterwards. Runs on the event loop thread only.
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0, max_queue: int = 256, max_wait: float = 30.0, headroom: float = 1.0):
+        self.name = name
+        # A quota scaled below one call still limits, rather than reading as 0 (unlimited)
+        self.rpm = max(1, int(rpm * headroom)) if rpm else 0
+        self.tpm = max(1, int(tpm * headroom)) if tpm else 0
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        # Admitted calls as [admitted_at, tokens]; tokens is updated when usage is settled
+        self._window: Deque[List[float]] = deque()
+        self._window_tokens = 0.0
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> List[float]:
+        """Wait for quota for one call; returns its ticket for `settle`"""
+        if not self.enabled:
+            return [time.monotonic(), tokens]
+        now = time.monotonic()
+        self._prune(now)
+        if not self._waiters and self._wait_time(tokens, now) == 0:
+            return self._admit(tokens, now)
+
+        wait = self._wait_time(tokens, now)
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+            raise AdmissionRejected(f"{self.name} quota exhausted and its wait queue is full", max(wait, 1.0))
+        if wait > self.max_wait:
+            self._reject("over_quota")
+            raise AdmissionRejected(f"{self.name} quota exhausted for the next {wait:.0f}s", wait)
+
+        started = now
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self.queued += 1
+        admission_queue_depth.set(self.name, value=len(self._waiters))
+        self._wake()
+        try:
+            # Shielded, so a timeout leaves the future alone and a last-moment admission isn't lost
+            ticket = await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                ticket = future.result()
+            else:
+                self._abandon(future)
+                self._reject("timeout")
+                raise AdmissionRejected(f"{self.name} quota wait exceeded {self.max_wait:.0f}s", max(self._wait_time(tokens, time.monotonic()), 1.0))
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        admission_wait.observe(time.monotonic() - started, self.name)
+        return ticket
+
+    def settle(self, ticket: List[float], tokens: int):
+        """Replace a call's estimated token cost with what the provider reported"""
+        if not self.enabled:
+            return
+        if time.monotonic() - ticket[0] < QUOTA_WINDOW:
+            self._window_tokens += tokens - ticket[1]
+            self._wake()
+        ticket[1] = tokens
+
+    def stats(self) -> dict:
+        self._prune(time.monotonic())
+        return {
+            "rpm_limit": self.rpm,
+            "tpm_limit": self.tpm,
+            "requests_in_window": len(self._window),
+            "tokens_in_window": round(self._window_tokens),
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+    def _admit(self, tokens: int, now: float) -> List[float]:
+        ticket = [now, tokens]
+        self._window.append(ticket)
+        self._window_tokens += tokens
+        self.admitted += 1
+        return ticket
+
+    def _prune(self, now: float):
+        while self._window and now - self._window[0][0] >= QUOTA_WINDOW:
+            self._window_tokens -= self._window.popleft()[1]
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a call of `tokens` fits both quotas (0 if it fits now)"""
+        if not self._window:
+            return 0.0
+        index = -1
+        if self.rpm and len(self._window) + 1 > self.rpm:
+            # The oldest calls that must expire to make room for one more
+            index = len(self._window) - self.rpm
+        if self.tpm and self._window_tokens + tokens > self.tpm:
+            excess = self._window_tokens + tokens - self.tpm
+            for position, (_, used) in enumerate(self._window):
+                excess -= used
+                if excess <= 0 or position == len(self._window) - 1:
+                    index = max(index, position)
+                    break
+        if index < 0:
+            return 0.0
+        return max(0.0, self._window[index][0] + QUOTA_WINDOW - now)
+
+    def _wake(self):
+        """(Re)start the dispatcher: a new waiter or settled usage may change who goes next, and when"""
+        if self._dispatcher is not None and not self._dispatcher.done():
+            self._dispatcher.cancel()
+        if self._waiters:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        """Admit waiters strictly in priority order as the window frees up"""
+        while self._waiters:
+            priority, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            self._prune(now)
+            wait = self._wait_time(tokens, now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            heapq.heappop(self._waiters)
+            future.set_result(self._admit(tokens, now))
+        admission_queue_depth.set(self.name, value=0)
+
+    def _abandon(self, future: asyncio.Future):
+        if not future.done():
+            future.cancel()
+        admission_queue_depth.set(self.name, value=sum(1 for *_, waiter in self._waiters if not waiter.done()))
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        admission_rejections.inc(self.name, reason)
+
+
+client_rate_limiter = ClientRateLimiter(
+    per_minute=config.CLIENT_RATE_LIMIT_PER_MINUTE,
+    burst=config.CLIENT_RATE_LIMIT_BURST,
+    db_path=config.SHARED_STATE_DB_PATH or None,
+)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from config.env_config import config
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling window of recent provider latencies (seconds)"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, provider: str, seconds: float):
+        self._samples[provider].append(seconds)
+
+    def count(self, provider: str) -> int:
+        return len(self._samples[provider])
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        samples = self._samples.get(provider)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            provider: {
+                "samples": len(samples),
+                "p50": self.percentile(provider, 0.5),
+                "p95": self.percentile(provider, 0.95),
+                "p99": self.percentile(provider, 0.99),
+            }
+            for provider, samples in self._samples.items()
+        }
+
+
+class Hedger:
+    """Fire a backup provider when the primary is slower than its usual tail latency"""
+
+    def __init__(
+        self,
+        tracker: LatencyTracker,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        default_delay: float = 20.0,
+        min_delay: float = 1.0,
+    ):
+        self.tracker = tracker
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+
+        self.requests = Counter()
+        self.triggered = Counter()
+        self.wins = Counter()
+        # Per primary: triggered hedges that the backup won
+        self.hedge_wins = Counter()
+
+    def hedge_delay(self, provider: str) -> float:
+        if self.tracker.count(provider) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.tracker.percentile(provider, self.percentile))
+
+    async def run(
+        self,
+        primary: str,
+        primary_fn: Callable[[], Awaitable[Optional[Any]]],
+        secondary: str,
+        secondary_fn: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Optional[Tuple[str, Any]]:
+        """Return (provider, result) for the first non-None result; the loser is cancelled"""
+        self.requests[primary] += 1
+        primary_task = asyncio.ensure_future(primary_fn())
+        tasks = {primary_task: primary}
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay(primary))
+            if done:
+                result = self._result(primary_task, primary)
+                if result is not None:
+                    self.wins[primary] += 1
+                    return primary, result
+
+            # Primary is slow or already failed: race the backup against it
+            self.triggered[primary] += 1
+            logger.info(f"Hedging {primary} request with {secondary}")
+            tasks[asyncio.ensure_future(secondary_fn())] = secondary
+
+            pending = {task for task in tasks if not task.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = self._result(task, tasks[task])
+                    if result is not None:
+                        self.wins[tasks[task]] += 1
+                        if tasks[task] == secondary:
+                            self.hedge_wins[primary] += 1
+                        return tasks[task], result
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @staticmethod
+    def _result(task: asyncio.Task, provider: str) -> Optional[Any]:
+        if task.cancelled():
+            return None
+        if task.exception() is not None:
+            logger.error(f"Hedged call to {provider} failed: {str(task.exception())}")
+            return None
+        return task.result()
+
+    def stats(self) -> Dict[str, Any]:
+        providers = set(self.requests) | set(self.wins)
+        return {
+            "providers": {
+                provider: {
+                    "requests": self.requests[provider],
+                    "hedges_triggered": self.triggered[provider],
+                    "wins": self.wins[provider],
+                    # How often the backup fired for this provider beat it
+                    "hedge_win_rate": self.hedge_wins[provider] / self.triggered[provider] if self.triggered[provider] else 0.0,
+                    "hedge_delay": self.hedge_delay(provider),
+                }
+                for provider in sorted(providers)
+            },
+            "latency": self.tracker.snapshot(),
+        }
+
+
+latency_tracker = LatencyTracker(window=config.HEDGE_LATENCY_WINDOW)
+
+plan_hedger = Hedger(
+    latency_tracker,
+    percentile=config.HEDGE_PERCENTILE,
+    min_samples=config.HEDGE_MIN_SAMPLES,
+    default_delay=config.HEDGE_DEFAULT_DELAY,
+    min_delay=config.HEDGE_MIN_DELAY,
+)
@@ -0,0 +1,119 @@
+import json
+import logging
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Path = Tuple[Any, ...]
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "expect_key", "index")
+
+    def __init__(self, kind: str, start: int, path: Path):
+        self.kind = kind
+        self.start = start
+        self.path = path
+        self.key = None
+        self.expect_key = kind == "{"
+        self.index = 0
+
+    def child_path(self) -> Path:
+        if self.kind == "{":
+            return self.path + (self.key,)
+        return self.path + (self.index,)
+
+
+class IncrementalJSONParser:
+    """Scan model output as it streams and report containers as soon as they close
+
+    Text before the first '{' (prose, markdown fences) is skipped. `feed` returns
+    (path, value) pairs for every completed object/array whose path matches one of
+    the `watch` predicates, e.g. ("meal_plan",) or ("workout_plan", "weekly_schedule", 2).
+    """
+
+    def __init__(self, watch):
+        self.watch = watch
+        self.text = ""
+        self.pos = 0
+        self.stack: List[_Frame] = []
+        self.started = False
+        self.finished = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        self.text += chunk
+        completed = []
+        text = self.text
+        end = len(text)
+        pos = self.pos
+
+        while pos < end and not self.finished:
+            ch = text[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    frame = self.stack[-1] if self.stack else None
+                    if frame is not None and frame.kind == "{" and frame.expect_key:
+                        frame.key = self._decode_key(text[self._string_start:pos + 1])
+                pos += 1
+                continue
+
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.stack.append(_Frame("{", pos, ()))
+                pos += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == "{" or ch == "[":
+                parent = self.stack[-1]
+                self.stack.append(_Frame(ch, pos, parent.child_path()))
+            elif ch == "}" or ch == "]":
+                frame = self.stack.pop()
+                if self._is_watched(frame.path):
+                    value = self._decode_value(text[frame.start:pos + 1], frame.path)
+                    if value is not None:
+                        completed.append((frame.path, value))
+                if not self.stack:
+                    self.finished = True
+            elif ch == ":":
+                self.stack[-1].expect_key = False
+            elif ch == ",":
+                frame = self.stack[-1]
+                if frame.kind == "{":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            pos += 1
+
+        self.pos = pos
+        return completed
+
+    def _is_watched(self, path: Path) -> bool:
+        return any(predicate(path) for predicate in self.watch)
+
+    @staticmethod
+    def _decode_key(raw: str) -> str:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return raw[1:-1]
+
+    @staticmethod
+    def _decode_value(raw: str, path: Path) -> Optional[Any]:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Could not decode streamed section {path}: {str(e)}")
+            return None
@@ -0,0 +1,344 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from models.plan_model import FitnessPlan, validate_plan
+from models.user_model import UserProfile
+from services.nutrition import calculate_targets
+from services.plan_catalog import (
+    AVOID_KEYWORDS, BASIC_EQUIPMENT, DIET_EXCLUSIONS, EQUIPMENT_KEYWORDS, EQUIPMENT_TAGS, EXERCISES,
+    EXPERIENCE_LEVELS, FOOD_TAGS, GENERIC_MEALS, GYM_EQUIPMENT, MEAL_SLOTS, MEAL_TYPE_STYLES, MEALS,
+)
+from services.plan_sections import workout_skeleton
+
+LOCAL_PROVIDER = "local"
+
+# Movement slots trained on each day focus (see plan_sections.SPLIT_FOCUSES), most important first
+FOCUS_SLOTS = {
+    "Full Body": ("squat", "horizontal_push", "horizontal_pull", "hinge", "vertical_push", "vertical_pull", "lunge", "core"),
+    "Upper Body": ("horizontal_push", "horizontal_pull", "vertical_push", "vertical_pull", "shoulders_iso", "biceps", "triceps"),
+    "Lower Body": ("squat", "hinge", "lunge", "hinge", "calves", "core"),
+    "Push (Chest, Shoulders, Triceps)": ("horizontal_push", "vertical_push", "horizontal_push", "chest_iso", "shoulders_iso", "triceps"),
+    "Pull (Back, Biceps)": ("vertical_pull", "horizontal_pull", "horizontal_pull", "rear_delt", "biceps", "biceps"),
+    "Legs": ("squat", "hinge", "lunge", "squat", "calves", "core"),
+    "Chest": ("horizontal_push", "horizontal_push", "chest_iso", "vertical_push", "triceps", "chest_iso"),
+    "Back": ("vertical_pull", "horizontal_pull", "hinge", "horizontal_pull", "rear_delt", "vertical_pull"),
+    "Shoulders": ("vertical_push", "shoulders_iso", "rear_delt", "vertical_push", "shoulders_iso", "core"),
+    "Arms": ("biceps", "triceps", "biceps", "triceps", "biceps", "triceps"),
+    "Core & Conditioning": ("core", "conditioning", "core", "conditioning", "carry", "core"),
+    "HIIT Intervals": ("conditioning",) * 8,
+    "HIIT Circuit": ("conditioning", "squat", "horizontal_push", "conditioning", "lunge", "core", "conditioning", "horizontal_pull"),
+    "Functional Strength": ("hinge", "squat", "carry", "horizontal_push", "horizontal_pull", "lunge", "core"),
+    "Mobility & Conditioning": ("mobility", "conditioning", "mobility", "core", "conditioning", "mobility"),
+}
+
+# How a slot is trained: compound lifts, accessories, timed intervals or mobility drills
+SLOT_KINDS = {
+    "squat": "compound", "hinge": "compound", "horizontal_push": "compound", "vertical_push": "compound",
+    "horizontal_pull": "compound", "vertical_pull": "compound", "lunge": "accessory", "chest_iso": "accessory",
+    "shoulders_iso": "accessory", "rear_delt": "accessory", "biceps": "accessory", "triceps": "accessory",
+    "calves": "accessory", "core": "accessory", "carry": "interval", "conditioning": "interval", "mobility": "mobility",
+}
+
+# Minutes one exercise of each kind takes, sets and rest included
+KIND_MINUTES = {"compound": 10, "accessory": 7, "interval": 4, "mobility": 3}
+WARM_UP_COOL_DOWN_MINUTES = 15
+MIN_EXERCISES = 3
+# Always doable without equipment; tops up days whose focus slots had too few options
+FILLER_SLOTS = ("core", "conditioning", "mobility", "core")
+
+# (sets, reps, rest) for compound lifts and accessories by goal
+GOAL_PRESCRIPTIONS = {
+    "Weight Loss": (("3", "10-12", "60 seconds"), ("3", "12-15", "45 seconds")),
+    "Weight Gain": (("4", "6-10", "2 minutes"), ("3", "10-12", "75 seconds")),
+    "Muscle Building": (("4", "8-12", "90 seconds"), ("3", "10-15", "60 seconds")),
+    "Lean Bulk": (("4", "6-10", "90 seconds"), ("3", "10-12", "60 seconds")),
+    "Maintenance": (("3", "8-12", "75 seconds"), ("3", "12-15", "60 seconds")),
+    "Athletic Performance": (("5", "3-5", "2-3 minutes"), ("3", "8-10", "60 seconds")),
+}
+INTERVAL_PRESCRIPTION = ("4", "30 seconds", "30 seconds")
+MOBILITY_PRESCRIPTION = ("2", "45 seconds", "15 seconds")
+
+SLOT_CUES = {
+    "squat": "Brace your core and keep knees tracking over your toes",
+    "hinge": "Keep a neutral spine and push your hips back",
+    "lunge": "Control the descent and keep your front heel down",
+    "horizontal_push": "Shoulder blades back and down, control the lowering",
+    "vertical_push": "Squeeze glutes and avoid arching the lower back",
+    "horizontal_pull": "Lead with the elbows and pause at the top",
+    "vertical_pull": "Pull your elbows to your ribs, full range of motion",
+    "core": "Breathe steadily and keep your ribs down",
+    "conditioning": "Work hard but keep form crisp, scale the pace if needed",
+    "carry": "Walk tall with your shoulders packed",
+    "mobility": "Move slowly through a comfortable range",
+}
+
+MEAL_FREQUENCIES = {
+    "Weight Loss": "3 main meals + 1 snack",
+    "Weight Gain": "3 main meals + 3 snacks, every 2-3 hours",
+    "Muscle Building": "3 main meals + 2 snacks, every 3-4 hours",
+    "Lean Bulk": "3 main meals + 2 snacks",
+    "Maintenance": "3 main meals + 1-2 snacks",
+    "Athletic Performance": "3 main meals + 2 snacks timed around training",
+}
+
+GOAL_TIPS = {
+    "Weight Loss": "Fill half your plate with vegetables to stay full on fewer calories",
+    "Weight Gain": "Add calorie-dense foods like olive oil, nut butters or dried fruit where tolerated",
+    "Muscle Building": "Spread protein across 4-5 meals of 25-40 g each",
+    "Lean Bulk": "Keep the surplus small and adjust if weight climbs more than 0.5 kg per week",
+    "Maintenance": "Keep meal timing consistent and adjust portions to your weekly weight trend",
+    "Athletic Performance": "Eat carbohydrates and protein within two hours after training",
+}
+
+DIET_TIPS = {
+    "Vegan": "Combine legumes and grains over the day for complete protein",
+    "Vegetarian": "Include eggs, dairy or legumes at every meal for protein",
+    "Keto": "Replace sodium, potassium and magnesium to avoid keto flu",
+    "Paleo": "Get calcium from leafy greens, sardines and almonds where tolerated",
+    "Pescatarian": "Eat oily fish two to three times per week for omega-3s",
+    "Non-Vegetarian": "Choose lean cuts and vary your protein sources",
+}
+
+PROGRESSION_NOTES = {
+    0: ["Focus on technique for the first 4 weeks before adding load",
+        "Add reps before weight: reach the top of the range on every set, then increase"],
+    2: ["Use double progression: add weight once all sets hit the top of the rep range",
+        "Take a lighter deload week every 6-8 weeks"],
+    3: ["Vary intensity across the week with heavy, medium and light days",
+        "Deload every 4-6 weeks or when performance stalls"],
+}
+
+GOAL_RECOMMENDATIONS = {
+    "Weight Loss": "Aim for 8,000-10,000 steps a day on top of training",
+    "Weight Gain": "Weigh yourself weekly and add 200 kcal if your weight stalls for two weeks",
+    "Muscle Building": "Prioritise progressive overload and enough protein every day",
+    "Lean Bulk": "Track both bodyweight and waist measurement to keep the gain lean",
+    "Maintenance": "Keep training consistent and enjoy varied activities",
+    "Athletic Performance": "Schedule hard sessions away from competition days and prioritise recovery",
+}
+
+_NONE = {"", "n/a", "na", "none", "no", "nil", "-"}
+
+
+def _mask(tags, names) -> int:
+    return sum(1 << names.index(tag) for tag in set(tags))
+
+
+def _keyword_pattern(keyword: str):
+    """Whole word or phrase, plural included, so "nut" matches "nuts" but not "nutritionist" """
+    return re.compile(r"\b" + re.escape(keyword) + r"(?:e?s)?\b")
+
+
+# Catalogs compiled once: exercises by slot as (name, required mask, min level),
+# meals by slot as (name, food mask, style tags)
+_EXERCISES_BY_SLOT: Dict[str, List[Tuple[str, int, int]]] = {}
+for _name, _slot, _requires, _level in EXERCISES:
+    _EXERCISES_BY_SLOT.setdefault(_slot, []).append((_name, _mask(_requires, EQUIPMENT_TAGS), _level))
+
+_MEALS_BY_SLOT: Dict[str, List[Tuple[str, int, tuple]]] = {slot: [] for slot in MEAL_SLOTS}
+for _name, _slot, _foods, _styles in MEALS:
+    _MEALS_BY_SLOT[_slot].append((_name, _mask(_foods, FOOD_TAGS), _styles))
+
+_DIET_MASKS = {diet: _mask(tags, FOOD_TAGS) for diet, tags in DIET_EXCLUSIONS.items()}
+_GYM_MASK = _mask(GYM_EQUIPMENT, EQUIPMENT_TAGS)
+_BASIC_MASK = _mask(BASIC_EQUIPMENT, EQUIPMENT_TAGS)
+_OUTDOOR_MASK = _mask(("outdoor_space",), EQUIPMENT_TAGS)
+_EQUIPMENT_PATTERNS = [
+    (_keyword_pattern(keyword), 1 << EQUIPMENT_TAGS.index(tag))
+    for tag, keywords in EQUIPMENT_KEYWORDS.items() for keyword in keywords
+]
+# Longest first, and each match is blanked out, so "peanut" or "tree nut" never also reads as "nut"
+_AVOID_PATTERNS = [
+    (_keyword_pattern(keyword), _mask(tags, FOOD_TAGS))
+    for keyword, tags in sorted(AVOID_KEYWORDS.items(), key=lambda item: -len(item[0]))
+]
+
+
+def available_equipment(user_profile: UserProfile) -> int:
+    """Mask of EQUIPMENT_TAGS the profile can use"""
+    available = _GYM_MASK if user_profile.workout_location == "Gym" else 0
+    if user_profile.workout_location in ("Outdoor", "Mixed"):
+        available |= _OUTDOOR_MASK
+    text = (user_profile.equipment_available or "").lower()
+    if "gym" in text:
+        available |= _BASIC_MASK
+    for pattern, bit in _EQUIPMENT_PATTERNS:
+        if pattern.search(text):
+            available |= bit
+    return available
+
+
+def excluded_foods(user_profile: UserProfile) -> int:
+    """Mask of FOOD_TAGS ruled out by diet, allergies, restrictions and medical conditions"""
+    excluded = _DIET_MASKS[user_profile.meal_preference]
+    for field in (user_profile.allergies, user_profile.food_restrictions, user_profile.medical_conditions):
+        text = (field or "").strip().lower()
+        if text in _NONE:
+            continue
+        for pattern, mask in _AVOID_PATTERNS:
+            text, found = pattern.subn(" ", text)
+            if found:
+                excluded |= mask
+    return excluded
+
+
+@lru_cache(maxsize=4096)
+def exercise_options(slot: str, available: int, level: int) -> Tuple[str, ...]:
+    """Exercises for a slot doable with the equipment and experience, best first
+
+    Beginners get the easiest options first; everyone else gets catalog order,
+    which puts loaded compound variations ahead of their bodyweight fallbacks.
+    """
+    options = [(name, min_level) for name, requires, min_level in _EXERCISES_BY_SLOT[slot]
+               if requires & ~available == 0 and min_level <= level]
+    if level <= 1:
+        options.sort(key=lambda option: option[1])
+    return tuple(name for name, _ in options)
+
+
+@lru_cache(maxsize=4096)
+def meal_options(slot: str, excluded: int, meal_type: str) -> Tuple[str, ...]:
+    """Meals for a slot containing nothing excluded, ranked by the meal type's styles"""
+    preferred, avoided = MEAL_TYPE_STYLES[meal_type]
+    options = [(name, styles) for name, foods, styles in _MEALS_BY_SLOT[slot] if foods & excluded == 0]
+    options.sort(key=lambda option: -sum(style in option[1] for style in preferred) + sum(style in option[1] for style in avoided))
+    return tuple(name for name, _ in options)
+
+
+def prescription(slot: str, goal: str, level: int) -> Tuple[str, str, str]:
+    kind = SLOT_KINDS[slot]
+    if kind == "interval":
+        return INTERVAL_PRESCRIPTION
+    if kind == "mobility":
+        return MOBILITY_PRESCRIPTION
+    sets, reps, rest = GOAL_PRESCRIPTIONS[goal][0 if kind == "compound" else 1]
+    if level == 0:
+        # One set fewer while learning the movements
+        sets = str(max(2, int(sets) - 1))
+    return sets, reps, rest
+
+
+def build_workout_day(day_name: str, focus: str, occurrence: int, user_profile: UserProfile, available: int, level: int) -> dict:
+    """One day's exercises for its focus, filling the session length; repeat days rotate variations"""
+    budget = (user_profile.time_per_session or 60) - WARM_UP_COOL_DOWN_MINUTES
+    used: Dict[str, int] = {}
+    chosen = set()
+    exercises = []
+    for slot in FOCUS_SLOTS[focus] + FILLER_SLOTS:
+        minutes = KIND_MINUTES[SLOT_KINDS[slot]]
+        if len(exercises) >= MIN_EXERCISES and (minutes > budget or slot in FILLER_SLOTS):
+            break
+        options = exercise_options(slot, available, level)
+        if not options:
+            continue
+        start = used.get(slot, 0) + occurrence
+        for offset in range(len(options)):
+            name = options[(start + offset) % len(options)]
+            if name not in chosen:
+                break
+        else:
+            continue
+        used[slot] = used.get(slot, 0) + 1
+        chosen.add(name)
+        budget -= minutes
+        sets, reps, rest = prescription(slot, user_profile.goal, level)
+        exercises.append({"name": name, "sets": sets, "reps": reps, "rest": rest, "notes": SLOT_CUES.get(slot)})
+
+    interval_day = focus.startswith("HIIT") or focus == "Mobility & Conditioning"
+    return {
+        "day_name": day_name,
+        "focus": focus,
+        "exercises": exercises,
+        "duration": f"{user_profile.time_per_session} minutes",
+        "warm_up": ["5 minutes easy cardio", "Dynamic mobility for the joints you will train"]
+        + ([] if interval_day else ["1-2 light ramp-up sets of the first exercise"]),
+        "cool_down": ["5 minutes easy walking", "Static stretching for the muscles trained"],
+    }
+
+
+def build_meal_plan(user_profile: UserProfile) -> dict:
+    targets = calculate_targets(user_profile)
+    excluded = excluded_foods(user_profile)
+    sample_meals = {}
+    for slot in MEAL_SLOTS:
+        options = list(meal_options(slot, excluded, user_profile.meal_type)[:3])
+        if len(options) < 2:
+            options.append(GENERIC_MEALS[slot])
+        sample_meals[slot] = options
+
+    protein = "Pea or rice protein" if excluded & _mask(("dairy",), FOOD_TAGS) else "Whey protein"
+    omega = "Algae-based omega-3" if excluded & _mask(("fish",), FOOD_TAGS) else "Fish oil (omega-3)"
+    supplements = [protein, omega, "Vitamin D"]
+    if user_profile.meal_preference == "Vegan":
+        supplements.append("Vitamin B12")
+    if user_profile.goal in ("Muscle Building", "Weight Gain", "Lean Bulk", "Athletic Performance"):
+        supplements.append("Creatine monohydrate")
+
+    return {
+        "goal": f"Support {user_profile.goal.lower()} with a {user_profile.meal_preference.lower()}, {user_profile.meal_type.lower()} diet",
+        "calorie_target": targets.calorie_summary(),
+        "macronutrient_breakdown": targets.macronutrient_breakdown(),
+        "meal_frequency": MEAL_FREQUENCIES[user_profile.goal],
+        "sample_meals": sample_meals,
+        "nutrition_tips": [
+            f"Aim for about {targets.protein_g} g of protein a day",
+            GOAL_TIPS[user_profile.goal],
+            DIET_TIPS[user_profile.meal_preference],
+            "Stay hydrated with 8-10 glasses of water daily",
+        ],
+        "supplements": supplements,
+    }
+
+
+def build_workout_plan(user_profile: UserProfile) -> dict:
+    available = available_equipment(user_profile)
+    level = EXPERIENCE_LEVELS[user_profile.workout_experience]
+    seen: Dict[str, int] = {}
+    schedule = []
+    for day_name, focus in workout_skeleton(user_profile):
+        schedule.append(build_workout_day(day_name, focus, seen.get(focus, 0), user_profile, available, level))
+        seen[focus] = seen.get(focus, 0) + 1
+
+    safety_tips = ["Always warm up before exercising", "Stop if you feel sharp pain or dizziness"]
+    if (user_profile.medical_conditions or "").strip().lower() not in _NONE:
+        safety_tips.append(f"Check this plan with your doctor given your medical conditions ({user_profile.medical_conditions})")
+    return {
+        "goal": f"Support {user_profile.goal.lower()} through structured training",
+        "frequency": f"{user_profile.workout_days} days per week",
+        "split": user_profile.workout_split,
+        "weekly_schedule": schedule,
+        "progression_notes": PROGRESSION_NOTES[max(key for key in PROGRESSION_NOTES if key <= level)],
+        "safety_tips": safety_tips,
+    }
+
+
+def build_local_plan(user_profile: UserProfile) -> FitnessPlan:
+    """A complete plan from the catalogs and rules alone, no model call"""
+    return validate_plan({
+        "meal_plan": build_meal_plan(user_profile),
+        "workout_plan": build_workout_plan(user_profile),
+        "general_recommendations": [
+            GOAL_RECOMMENDATIONS[user_profile.goal],
+            "Get 7-9 hours of quality sleep",
+            "Be consistent with your routine",
+        ],
+        "progress_tracking": {
+            "weight": "Weekly weigh-ins at the same time",
+            "measurements": "Monthly body measurements",
+            "performance": "Track weights, reps, and workout duration",
+        },
+    })
+
+
+class LocalPlanner:
+    """Stands in for a model under ai_provider="local": instant rule-based plans"""
+    provider = LOCAL_PROVIDER
+    display_name = "Local planner"
+    model_name = "rules"
+
+    def plan(self, user_profile: UserProfile) -> FitnessPlan:
+        return build_local_plan(user_profile)
+
+
+local_planner = LocalPlanner()
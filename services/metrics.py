@@ -0,0 +1,205 @@
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets (seconds) spanning cache hits to slow full-plan generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """Base for metrics kept as plain dicts keyed by label values
+
+    Updates happen on the event loop thread only, so they need no locking.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum]
+        self.series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_request_duration = metrics_registry.add(Histogram(
+    "fitplan_http_request_duration_seconds", "HTTP request latency by route, including streamed bodies",
+    ["method", "route", "status"],
+))
+http_requests_in_flight = metrics_registry.add(Gauge(
+    "fitplan_http_requests_in_flight", "HTTP requests currently being served",
+))
+provider_request_duration = metrics_registry.add(Histogram(
+    "fitplan_provider_request_duration_seconds", "Provider call latency by outcome",
+    ["provider", "outcome"],
+))
+provider_requests_in_flight = metrics_registry.add(Gauge(
+    "fitplan_provider_requests_in_flight", "Provider calls currently running (holding a concurrency slot)",
+    ["provider"],
+))
+provider_retries = metrics_registry.add(Counter(
+    "fitplan_provider_retries_total", "Provider calls retried after a transient error (429, 5xx, connection)",
+    ["provider"],
+))
+admission_wait = metrics_registry.add(Histogram(
+    "fitplan_admission_wait_seconds", "Time provider calls queued for requests/min and tokens/min quota",
+    ["provider"],
+))
+admission_queue_depth = metrics_registry.add(Gauge(
+    "fitplan_admission_queue_depth", "Provider calls waiting for quota",
+    ["provider"],
+))
+admission_rejections = metrics_registry.add(Counter(
+    "fitplan_admission_rejections_total", "Requests refused with 429: per-client rate limit or provider quota queue",
+    ["scope", "reason"],
+))
+provider_breaker_state = metrics_registry.add(Gauge(
+    "fitplan_provider_breaker_state", "Provider circuit breaker state: 0 closed, 1 half-open, 2 open",
+    ["provider"],
+))
+provider_breaker_rejections = metrics_registry.add(Counter(
+    "fitplan_provider_breaker_rejections_total", "Provider calls failed fast by an open circuit breaker",
+    ["provider"],
+))
+provider_tokens = metrics_registry.add(Counter(
+    "fitplan_provider_tokens_total", "Tokens reported by provider usage fields",
+    ["provider", "kind"],
+))
+json_extractions = metrics_registry.add(Counter(
+    "fitplan_json_extractions_total", "Model responses by JSON extraction outcome",
+    ["provider", "outcome"],
+))
+plan_validation_failures = metrics_registry.add(Counter(
+    "fitplan_plan_validation_failures_total", "Extracted plans rejected by FitnessPlan validation",
+    ["provider"],
+))
+plan_rule_checks = metrics_registry.add(Counter(
+    "fitplan_plan_rule_checks_total", "Generated plans checked against their profile: passed, failed, or escalated and corrected or not",
+    ["provider", "outcome"],
+))
+plan_rule_failures = metrics_registry.add(Counter(
+    "fitplan_plan_rule_failures_total", "Profile rule checks failed by generated plans",
+    ["provider", "rule"],
+))
+plan_section_fallbacks = metrics_registry.add(Counter(
+    "fitplan_plan_section_fallbacks_total", "Sections of a section-parallel plan filled from the fallback plan",
+    ["provider", "section"],
+))
+plan_fallbacks = metrics_registry.add(Counter(
+    "fitplan_plan_fallbacks_total", "Requests answered with the built-in fallback plan",
+    ["provider"],
+))
+plan_regenerated_sections = metrics_registry.add(Counter(
+    "fitplan_plan_regenerated_sections_total", "Plan sections re-prompted by partial regeneration after a profile change",
+    ["provider", "section"],
+))
+plan_index_lookups = metrics_registry.add(Counter(
+    "fitplan_plan_index_lookups_total", "Plan index lookups: served a neighbour's plan, rejected it on the rule checks, seeded the prompt, or missed",
+    ["result"],
+))
+plan_index_evictions = metrics_registry.add(Counter(
+    "fitplan_plan_index_evictions_total", "Oldest plans dropped from a full plan index to make room",
+))
+plan_jobs = metrics_registry.add(Counter(
+    "fitplan_plan_jobs_total", "Plan jobs by state reached: queued on submit, then succeeded or failed",
+    ["status"],
+))
+plan_jobs_pending = metrics_registry.add(Gauge(
+    "fitplan_plan_jobs_pending", "Plan jobs waiting for a worker",
+))
@@ -0,0 +1,157 @@
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+from models.user_model import UserProfile
+
+# numpy is only needed by the batch functions, so it's imported there rather than
+# on every app start
+if TYPE_CHECKING:
+    import numpy as np
+
+# Mifflin-St Jeor sex constant; "Other" uses the midpoint of the two
+SEX_CONSTANTS = {"Male": 5.0, "Female": -161.0, "Other": -78.0}
+
+ACTIVITY_MULTIPLIERS = {
+    "Sedentary": 1.2,
+    "Lightly Active": 1.375,
+    "Moderately Active": 1.55,
+    "Very Active": 1.725,
+    "Extremely Active": 1.9,
+}
+
+# Multiplier applied to TDEE for each goal
+GOAL_FACTORS = {
+    "Weight Loss": 0.80,
+    "Weight Gain": 1.15,
+    "Muscle Building": 1.10,
+    "Lean Bulk": 1.05,
+    "Maintenance": 1.00,
+    "Athletic Performance": 1.10,
+}
+
+# (protein, carbohydrates, fats) share of calories
+MEAL_TYPE_MACROS = {
+    "High Protein": (0.35, 0.40, 0.25),
+    "Balanced": (0.25, 0.50, 0.25),
+    "Low Carb": (0.35, 0.20, 0.45),
+    "High Carb": (0.20, 0.60, 0.20),
+    "Mediterranean": (0.20, 0.50, 0.30),
+}
+
+# Diets whose macro profile overrides the meal type
+DIET_MACROS = {
+    "Keto": (0.25, 0.05, 0.70),
+    "Paleo": (0.30, 0.30, 0.40),
+}
+
+MIN_CALORIES = {"Male": 1500.0, "Female": 1200.0, "Other": 1350.0}
+
+PROTEIN_KCAL_PER_G = 4.0
+CARBS_KCAL_PER_G = 4.0
+FATS_KCAL_PER_G = 9.0
+FIBER_G_PER_1000_KCAL = 14.0
+
+
+@dataclass
+class NutritionTargets:
+    bmr: int
+    tdee: int
+    calorie_target: int
+    protein_pct: int
+    carbs_pct: int
+    fats_pct: int
+    protein_g: int
+    carbs_g: int
+    fats_g: int
+    fiber_g: int
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+    def calorie_summary(self) -> str:
+        return f"{self.calorie_target} calories per day (TDEE {self.tdee}, BMR {self.bmr})"
+
+    def macronutrient_breakdown(self) -> Dict[str, str]:
+        return {
+            "protein": f"{self.protein_pct}% ({self.protein_g} g)",
+            "carbohydrates": f"{self.carbs_pct}% ({self.carbs_g} g)",
+            "fats": f"{self.fats_pct}% ({self.fats_g} g)",
+            "fiber": f"{self.fiber_g} g",
+        }
+
+
+def macro_split(user_profile: UserProfile) -> tuple:
+    return DIET_MACROS.get(user_profile.meal_preference, MEAL_TYPE_MACROS[user_profile.meal_type])
+
+
+def calculate_targets(user_profile: UserProfile) -> NutritionTargets:
+    """Mifflin-St Jeor BMR, TDEE and goal-adjusted calorie and macro targets for one profile"""
+    bmr = (
+        10.0 * user_profile.weight
+        + 6.25 * user_profile.height
+        - 5.0 * user_profile.age
+        + SEX_CONSTANTS[user_profile.gender]
+    )
+    tdee = bmr * ACTIVITY_MULTIPLIERS[user_profile.activity_level]
+    calories = max(tdee * GOAL_FACTORS[user_profile.goal], MIN_CALORIES[user_profile.gender])
+    protein_pct, carbs_pct, fats_pct = macro_split(user_profile)
+
+    return NutritionTargets(
+        bmr=round(bmr),
+        tdee=round(tdee),
+        calorie_target=round(calories),
+        protein_pct=round(protein_pct * 100),
+        carbs_pct=round(carbs_pct * 100),
+        fats_pct=round(fats_pct * 100),
+        protein_g=round(calories * protein_pct / PROTEIN_KCAL_PER_G),
+        carbs_g=round(calories * carbs_pct / CARBS_KCAL_PER_G),
+        fats_g=round(calories * fats_pct / FATS_KCAL_PER_G),
+        fiber_g=round(calories / 1000.0 * FIBER_G_PER_1000_KCAL),
+    )
+
+
+def profiles_to_arrays(user_profiles: Sequence[UserProfile]) -> Dict[str, "np.ndarray"]:
+    """Columnar inputs for calculate_targets_arrays"""
+    import numpy as np
+
+    return {
+        "age": np.array([p.age for p in user_profiles], dtype=np.float64),
+        "height": np.array([p.height for p in user_profiles], dtype=np.float64),
+        "weight": np.array([p.weight for p in user_profiles], dtype=np.float64),
+        "sex_constant": np.array([SEX_CONSTANTS[p.gender] for p in user_profiles], dtype=np.float64),
+        "min_calories": np.array([MIN_CALORIES[p.gender] for p in user_profiles], dtype=np.float64),
+        "activity_multiplier": np.array([ACTIVITY_MULTIPLIERS[p.activity_level] for p in user_profiles], dtype=np.float64),
+        "goal_factor": np.array([GOAL_FACTORS[p.goal] for p in user_profiles], dtype=np.float64),
+        "macros": np.array([macro_split(p) for p in user_profiles], dtype=np.float64).reshape(-1, 3),
+    }
+
+
+def calculate_targets_arrays(arrays: Dict[str, "np.ndarray"]) -> Dict[str, "np.ndarray"]:
+    """Vectorized calculate_targets over columnar inputs (see profiles_to_arrays)"""
+    import numpy as np
+
+    bmr = 10.0 * arrays["weight"] + 6.25 * arrays["height"] - 5.0 * arrays["age"] + arrays["sex_constant"]
+    tdee = bmr * arrays["activity_multiplier"]
+    calories = np.maximum(tdee * arrays["goal_factor"], arrays["min_calories"])
+    macros = arrays["macros"]
+    macro_kcal = calories[:, None] * macros
+
+    return {
+        "bmr": np.rint(bmr).astype(np.int64),
+        "tdee": np.rint(tdee).astype(np.int64),
+        "calorie_target": np.rint(calories).astype(np.int64),
+        "protein_pct": np.rint(macros[:, 0] * 100).astype(np.int64),
+        "carbs_pct": np.rint(macros[:, 1] * 100).astype(np.int64),
+        "fats_pct": np.rint(macros[:, 2] * 100).astype(np.int64),
+        "protein_g": np.rint(macro_kcal[:, 0] / PROTEIN_KCAL_PER_G).astype(np.int64),
+        "carbs_g": np.rint(macro_kcal[:, 1] / CARBS_KCAL_PER_G).astype(np.int64),
+        "fats_g": np.rint(macro_kcal[:, 2] / FATS_KCAL_PER_G).astype(np.int64),
+        "fiber_g": np.rint(calories / 1000.0 * FIBER_G_PER_1000_KCAL).astype(np.int64),
+    }
+
+
+def calculate_targets_batch(user_profiles: Sequence[UserProfile]) -> List[NutritionTargets]:
+    """calculate_targets for many profiles at once"""
+    columns = calculate_targets_arrays(profiles_to_arrays(user_profiles))
+    rows = zip(*(columns[field].tolist() for field in NutritionTargets.__dataclass_fields__))
+    return [NutritionTargets(*row) for row in rows]
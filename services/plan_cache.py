@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config.env_config import config
+from models.user_model import UserProfile
+from services.shared_state import SQLiteThread, after_fork, connect
+
+logger = logging.getLogger(__name__)
+
+# Free-text answers that all mean "nothing to report"
+_EMPTY_ANSWERS = {"", "n/a", "na", "none", "nil", "no", "-", "null"}
+
+
+def normalize_profile(user_profile: UserProfile) -> dict:
+    """Return a canonical dict of the profile so equivalent inputs hash the same"""
+    normalized = {}
+    for field, value in user_profile.model_dump().items():
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+            if value in _EMPTY_ANSWERS:
+                value = "n/a"
+        elif isinstance(value, float):
+            value = round(value, 1)
+        elif value is None:
+            value = "n/a"
+        normalized[field] = value
+    return normalized
+
+
+def make_cache_key(user_profile: UserProfile, provider: str, model_name: str, temperature: float) -> str:
+    """Content-addressed key over the normalized profile and generation settings"""
+    payload = {
+        "profile": normalize_profile(user_profile),
+        "provider": provider,
+        "model": model_name,
+        "temperature": round(float(temperature), 3),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """Two-tier plan cache: in-memory LRU/TTL in front of an optional SQLite store
+
+    The memory tier is read on the event loop; the SQLite tier is read and
+    written on its own thread, since another worker may hold its write lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 86400,
+        db_path: Optional[str] = None,
+        db_max_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_bytes = db_max_bytes
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_bytes = 0
+        self._thread = SQLiteThread("plan-cache")
+        # Keys read from disk since the last write, whose accessed_at that write updates
+        self._touched = set()
+
+        self.hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        # Shared by every worker process, so hits from one worker's generations reach all of them
+        self._db = connect(db_path)
+        after_fork(self._reconnect)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plan_cache (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_plan_cache_accessed ON plan_cache (accessed_at)")
+        self._db.execute("DELETE FROM plan_cache WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+        self._db_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM plan_cache").fetchone()[0]
+        logger.info(f"Plan cache SQLite tier opened at {db_path} ({self._db_bytes} bytes)")
+
+    async def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                self._remove(key)
+
+        row = await self._thread.run(self._db_get, key, now) if self._db is not None else None
+        with self._lock:
+            if row is not None:
+                payload, expires_at = row
+                self._store(key, payload, expires_at)
+                self.hits += 1
+                return json.loads(payload)
+
+            self.misses += 1
+            return None
+
+    async def set(self, key: str, plan: dict):
+        payload = json.dumps(plan, separators=(",", ":")).encode("utf-8")
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, payload, expires_at)
+        if self._db is not None:
+            await self._thread.run(self._db_set, key, payload, expires_at)
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            await self._thread.run(self._db_clear)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "disk_bytes": self._db_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self._thread.reset()
+        self._db = connect(self.db_path)
+
+    # Memory tier (caller holds the lock)
+
+    def _store(self, key: str, payload: bytes, expires_at: float):
+        if key in self._entries:
+            self._remove(key)
+        if len(payload) > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    # SQLite tier (run on the cache's SQLite thread)
+
+    def _db_get(self, key: str, now: float) -> Optional[tuple]:
+        try:
+            row = self._db.execute(
+                "SELECT payload, expires_at FROM plan_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+            if expires_at <= now:
+                self._db_delete(key)
+                self._db.commit()
+                return None
+            # A read takes no write lock; the next write records the access
+            self._touched.add(key)
+            return bytes(payload), expires_at
+        except sqlite3.Error as e:
+            logger.error(f"Plan cache read error: {str(e)}")
+            return None
+
+    def _db_set(self, key: str, payload: bytes, expires_at: float):
+        now = time.time()
+        try:
+            if self._touched:
+                # Approximate LRU: reads since the last write all count as accessed now
+                self._db.executemany(
+                    "UPDATE plan_cache SET accessed_at = ? WHERE key = ?", ((now, touched) for touched in self._touched)
+                )
+                self._touched.clear()
+            self._db_delete(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, payload, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now),
+            )
+            self._db_bytes += len(payload)
+            self._db_evict()
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Plan cache write error: {str(e)}")
+
+    def _db_clear(self):
+        self._db.execute("DELETE FROM plan_cache")
+        self._db.commit()
+        self._db_bytes = 0
+        self._touched.clear()
+
+    def _db_delete(self, key: str):
+        row = self._db.execute("SELECT size FROM plan_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+            self._db_bytes -= row[0]
+
+    def _db_evict(self):
+        """Drop least recently accessed rows until the store fits in db_max_bytes"""
+        if self._db_bytes > self.db_max_bytes:
+            # Other workers write and evict too, so recount before deleting anything
+            self._db_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM plan_cache").fetchone()[0]
+        while self._db_bytes > self.db_max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM plan_cache ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._db_bytes = 0
+                return
+            for key, size in rows:
+                self._db.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+                self._db_bytes -= size
+                if self._db_bytes <= self.db_max_bytes:
+                    break
+
+
+plan_cache = PlanCache(
+    max_entries=config.PLAN_CACHE_MAX_ENTRIES,
+    max_bytes=config.PLAN_CACHE_MAX_BYTES,
+    ttl=config.PLAN_CACHE_TTL,
+    db_path=config.PLAN_CACHE_DB_PATH or None,
+    db_max_bytes=config.PLAN_CACHE_DB_MAX_BYTES,
+)
@@ -0,0 +1,344 @@
+"""Exercise and meal catalogs for the local planner (services/local_planner.py)
+
+Entries are plain tuples kept in preference order; the planner compiles them
+into bitmask indexes at import. Tags are matched against what a profile has
+available (equipment, space) or must avoid (diet, allergies, restrictions).
+FOOD_KEYWORDS reads the same food tags back out of generated meals for the
+plan validator (services/plan_validator.py).
+"""
+
+EXPERIENCE_LEVELS = {"Beginner": 0, "Amateur": 1, "Intermediate": 2, "Advanced": 3, "Expert": 4}
+
+# Equipment (and space) an exercise needs; bodyweight moves need none
+EQUIPMENT_TAGS = ("dumbbell", "barbell", "kettlebell", "cable", "machine", "bands", "pullup_bar", "bench", "outdoor_space")
+
+# Keywords in equipment_available that make a tag available
+EQUIPMENT_KEYWORDS = {
+    "dumbbell": ("dumbbell",),
+    "barbell": ("barbell", "squat rack", "power rack"),
+    "kettlebell": ("kettlebell",),
+    "cable": ("cable",),
+    "machine": ("machine", "leg press", "smith"),
+    "bands": ("band",),
+    "pullup_bar": ("pull-up bar", "pullup bar", "pull up bar", "chin-up bar", "chinup bar"),
+    "bench": ("bench",),
+}
+
+# What "basic gym equipment" (the profile default) stands for outside a gym
+BASIC_EQUIPMENT = ("dumbbell", "bench", "bands", "pullup_bar")
+
+# Everything a commercial gym has
+GYM_EQUIPMENT = ("dumbbell", "barbell", "kettlebell", "cable", "machine", "bands", "pullup_bar", "bench")
+
+# (name, movement slot, required equipment tags, minimum experience level)
+EXERCISES = (
+    # Squat
+    ("Barbell Back Squat", "squat", ("barbell",), 2),
+    ("Barbell Front Squat", "squat", ("barbell",), 3),
+    ("Leg Press", "squat", ("machine",), 0),
+    ("Goblet Squat", "squat", ("dumbbell",), 0),
+    ("Kettlebell Goblet Squat", "squat", ("kettlebell",), 0),
+    ("Banded Squat", "squat", ("bands",), 0),
+    ("Tempo Bodyweight Squat", "squat", (), 0),
+    ("Pistol Squat to Box", "squat", (), 3),
+    # Hinge
+    ("Conventional Deadlift", "hinge", ("barbell",), 2),
+    ("Romanian Deadlift", "hinge", ("barbell",), 1),
+    ("Dumbbell Romanian Deadlift", "hinge", ("dumbbell",), 0),
+    ("Kettlebell Swing", "hinge", ("kettlebell",), 1),
+    ("Seated Leg Curl", "hinge", ("machine",), 0),
+    ("Banded Good Morning", "hinge", ("bands",), 0),
+    ("Single-Leg Hip Hinge", "hinge", (), 1),
+    ("Glute Bridge", "hinge", (), 0),
+    # Lunge
+    ("Barbell Walking Lunge", "lunge", ("barbell",), 3),
+    ("Bulgarian Split Squat", "lunge", ("dumbbell", "bench"), 1),
+    ("Dumbbell Reverse Lunge", "lunge", ("dumbbell",), 0),
+    ("Step-Up", "lunge", ("bench",), 0),
+    ("Walking Lunge", "lunge", (), 0),
+    ("Reverse Lunge", "lunge", (), 0),
+    # Horizontal push
+    ("Barbell Bench Press", "horizontal_push", ("barbell", "bench"), 1),
+    ("Dumbbell Bench Press", "horizontal_push", ("dumbbell", "bench"), 0),
+    ("Incline Dumbbell Press", "horizontal_push", ("dumbbell", "bench"), 1),
+    ("Machine Chest Press", "horizontal_push", ("machine",), 0),
+    ("Dumbbell Floor Press", "horizontal_push", ("dumbbell",), 0),
+    ("Banded Push-up", "horizontal_push", ("bands",), 1),
+    ("Push-up", "horizontal_push", (), 0),
+    ("Decline Push-up", "horizontal_push", (), 2),
+    ("Incline Push-up", "horizontal_push", (), 0),
+    # Vertical push
+    ("Standing Overhead Press", "vertical_push", ("barbell",), 2),
+    ("Seated Dumbbell Shoulder Press", "vertical_push", ("dumbbell", "bench"), 0),
+    ("Standing Dumbbell Press", "vertical_push", ("dumbbell",), 0),
+    ("Machine Shoulder Press", "vertical_push", ("machine",), 0),
+    ("Kettlebell Press", "vertical_push", ("kettlebell",), 1),
+    ("Banded Overhead Press", "vertical_push", ("bands",), 0),
+    ("Pike Push-up", "vertical_push", (), 1),
+    # Horizontal pull
+    ("Barbell Bent-Over Row", "horizontal_pull", ("barbell",), 2),
+    ("Chest-Supported Dumbbell Row", "horizontal_pull", ("dumbbell", "bench"), 0),
+    ("Seated Cable Row", "horizontal_pull", ("cable",), 0),
+    ("One-Arm Dumbbell Row", "horizontal_pull", ("dumbbell",), 0),
+    ("Kettlebell Row", "horizontal_pull", ("kettlebell",), 0),
+    ("Banded Row", "horizontal_pull", ("bands",), 0),
+    ("Inverted Row", "horizontal_pull", ("pullup_bar",), 1),
+    ("Prone Y-T-W Raise", "horizontal_pull", (), 0),
+    # Vertical pull
+    ("Weighted Pull-up", "vertical_pull", ("pullup_bar", "dumbbell"), 3),
+    ("Pull-up", "vertical_pull", ("pullup_bar",), 2),
+    ("Lat Pulldown", "vertical_pull", ("cable",), 0),
+    ("Chin-up", "vertical_pull", ("pullup_bar",), 1),
+    ("Banded Lat Pulldown", "vertical_pull", ("bands",), 0),
+    ("Negative Pull-up", "vertical_pull", ("pullup_bar",), 0),
+    ("Superman Pull", "vertical_pull", (), 0),
+    # Chest isolation
+    ("Cable Fly", "chest_iso", ("cable",), 1),
+    ("Dumbbell Fly", "chest_iso", ("dumbbell", "bench"), 0),
+    ("Pec Deck", "chest_iso", ("machine",), 0),
+    ("Banded Chest Fly", "chest_iso", ("bands",), 0),
+    ("Wide Push-up", "chest_iso", (), 0),
+    # Shoulder isolation
+    ("Cable Lateral Raise", "shoulders_iso", ("cable",), 1),
+    ("Dumbbell Lateral Raise", "shoulders_iso", ("dumbbell",), 0),
+    ("Banded Lateral Raise", "shoulders_iso", ("bands",), 0),
+    ("Plank Shoulder Tap", "shoulders_iso", (), 0),
+    # Rear delts
+    ("Face Pull", "rear_delt", ("cable",), 0),
+    ("Reverse Pec Deck", "rear_delt", ("machine",), 0),
+    ("Dumbbell Rear Delt Fly", "rear_delt", ("dumbbell",), 0),
+    ("Band Pull-Apart", "rear_delt", ("bands",), 0),
+    ("Prone Reverse Fly", "rear_delt", (), 0),
+    # Arms
+    ("Barbell Curl", "biceps", ("barbell",), 1),
+    ("Incline Dumbbell Curl", "biceps", ("dumbbell", "bench"), 1),
+    ("Dumbbell Hammer Curl", "biceps", ("dumbbell",), 0),
+    ("Cable Curl", "biceps", ("cable",), 0),
+    ("Banded Curl", "biceps", ("bands",), 0),
+    ("Towel Isometric Curl", "biceps", (), 0),
+    ("Close-Grip Bench Press", "triceps", ("barbell", "bench"), 2),
+    ("Cable Triceps Pushdown", "triceps", ("cable",), 0),
+    ("Overhead Dumbbell Extension", "triceps", ("dumbbell",), 0),
+    ("Banded Triceps Pushdown", "triceps", ("bands",), 0),
+    ("Bench Dip", "triceps", ("bench",), 0),
+    ("Diamond Push-up", "triceps", (), 1),
+    # Calves
+    ("Standing Calf Raise Machine", "calves", ("machine",), 0),
+    ("Dumbbell Calf Raise", "calves", ("dumbbell",), 0),
+    ("Single-Leg Calf Raise", "calves", (), 0),
+    # Core
+    ("Hanging Knee Raise", "core", ("pullup_bar",), 1),
+    ("Cable Woodchop", "core", ("cable",), 1),
+    ("Pallof Press", "core", ("bands",), 0),
+    ("Ab Wheel Rollout", "core", (), 3),
+    ("Plank", "core", (), 0),
+    ("Dead Bug", "core", (), 0),
+    ("Side Plank", "core", (), 0),
+    ("Hollow Body Hold", "core", (), 2),
+    # Loaded carries
+    ("Farmer's Carry", "carry", ("dumbbell",), 0),
+    ("Kettlebell Suitcase Carry", "carry", ("kettlebell",), 0),
+    ("Bear Crawl", "carry", (), 0),
+    # Conditioning
+    ("Hill Sprints", "conditioning", ("outdoor_space",), 2),
+    ("Rowing Machine Intervals", "conditioning", ("machine",), 0),
+    ("Kettlebell Swing Intervals", "conditioning", ("kettlebell",), 1),
+    ("Dumbbell Thrusters", "conditioning", ("dumbbell",), 1),
+    ("Shuttle Runs", "conditioning", ("outdoor_space",), 0),
+    ("Burpees", "conditioning", (), 1),
+    ("Mountain Climbers", "conditioning", (), 0),
+    ("Jump Squats", "conditioning", (), 1),
+    ("High Knees", "conditioning", (), 0),
+    ("Skater Hops", "conditioning", (), 0),
+    ("Jumping Jacks", "conditioning", (), 0),
+    # Mobility
+    ("World's Greatest Stretch", "mobility", (), 0),
+    ("Cossack Squat", "mobility", (), 1),
+    ("Cat-Cow", "mobility", (), 0),
+    ("Thoracic Rotations", "mobility", (), 0),
+    ("90/90 Hip Switches", "mobility", (), 0),
+)
+
+# Foods a meal contains, for diets, allergies and restrictions to exclude
+FOOD_TAGS = (
+    "meat", "poultry", "pork", "fish", "shellfish", "dairy", "eggs", "honey",
+    "gluten", "grains", "legumes", "soy", "nuts", "peanuts", "sesame", "carbs", "sugar",
+)
+
+# Tags each diet excludes
+DIET_EXCLUSIONS = {
+    "Non-Vegetarian": (),
+    "Vegetarian": ("meat", "poultry", "pork", "fish", "shellfish"),
+    "Vegan": ("meat", "poultry", "pork", "fish", "shellfish", "dairy", "eggs", "honey"),
+    "Pescatarian": ("meat", "poultry", "pork"),
+    "Keto": ("grains", "gluten", "legumes", "carbs", "sugar", "honey"),
+    "Paleo": ("grains", "gluten", "legumes", "soy", "dairy", "sugar", "peanuts"),
+}
+
+# Keywords in allergies / food_restrictions and the tags they exclude
+AVOID_KEYWORDS = {
+    "peanut": ("peanuts",),
+    "tree nut": ("nuts",),
+    "nut": ("nuts",),
+    "almond": ("nuts",),
+    "cashew": ("nuts",),
+    "walnut": ("nuts",),
+    "lactose": ("dairy",),
+    "dairy": ("dairy",),
+    "milk": ("dairy",),
+    "cheese": ("dairy",),
+    "gluten": ("gluten",),
+    "wheat": ("gluten",),
+    "celiac": ("gluten",),
+    "coeliac": ("gluten",),
+    "egg": ("eggs",),
+    "soy": ("soy",),
+    "soya": ("soy",),
+    "sesame": ("sesame",),
+    "shellfish": ("shellfish",),
+    "shrimp": ("shellfish",),
+    "prawn": ("shellfish",),
+    "fish": ("fish",),
+    "seafood": ("fish", "shellfish"),
+    "pork": ("pork",),
+    "halal": ("pork",),
+    "kosher": ("pork", "shellfish"),
+    "red meat": ("meat",),
+    "beef": ("meat",),
+    "meat": ("meat", "poultry", "pork"),
+    "sugar": ("sugar",),
+    "diabetes": ("sugar",),
+    "diabetic": ("sugar",),
+    "honey": ("honey",),
+}
+
+# Food words in generated meals and supplements and the tags they carry, matched
+# as whole words (plurals too), longest first. Empty tags neutralise a phrase whose
+# words would otherwise match ("peanut butter" is not dairy, "eggplant" not eggs).
+FOOD_KEYWORDS = {
+    # Meat, poultry, pork
+    "beef": ("meat",), "steak": ("meat",), "lamb": ("meat",), "veal": ("meat",), "venison": ("meat",),
+    "bison": ("meat",), "jerky": ("meat",), "meat": ("meat",), "meatball": ("meat",), "burger": ("meat",),
+    "chicken": ("poultry",), "turkey": ("poultry",), "duck": ("poultry",), "chicken sausage": ("poultry",),
+    "turkey sausage": ("poultry",), "chicken meatball": ("poultry",), "turkey meatball": ("poultry",),
+    "pork": ("pork",), "bacon": ("pork",), "ham": ("pork",), "prosciutto": ("pork",), "chorizo": ("pork",),
+    "salami": ("pork",), "pepperoni": ("pork",), "sausage": ("pork",),
+    # Seafood
+    "fish": ("fish",), "salmon": ("fish",), "tuna": ("fish",), "cod": ("fish",),
+    "tilapia": ("fish",), "sardine": ("fish",), "mackerel": ("fish",), "trout": ("fish",), "halibut": ("fish",),
+    "anchovy": ("fish",), "anchovies": ("fish",), "seafood": ("fish", "shellfish"),
+    "shellfish": ("shellfish",), "shrimp": ("shellfish",), "prawn": ("shellfish",), "crab": ("shellfish",),
+    "lobster": ("shellfish",), "scallop": ("shellfish",), "mussel": ("shellfish",), "oyster": ("shellfish",),
+    "clam": ("shellfish",),
+    # Animal products
+    "dairy": ("dairy",), "milk": ("dairy",), "cheese": ("dairy",), "yogurt": ("dairy",), "yoghurt": ("dairy",), "whey": ("dairy",),
+    "casein": ("dairy",), "butter": ("dairy",), "cream": ("dairy",), "ghee": ("dairy",), "kefir": ("dairy",),
+    "feta": ("dairy",), "mozzarella": ("dairy",), "parmesan": ("dairy",), "ricotta": ("dairy",),
+    "halloumi": ("dairy",), "paneer": ("dairy",), "skyr": ("dairy",), "greek salad": ("dairy",), "pesto": ("dairy", "nuts"),
+    "egg": ("eggs",), "omelette": ("eggs",), "omelet": ("eggs",), "frittata": ("eggs",), "honey": ("honey",),
+    # Grains and starches
+    "wheat": ("gluten", "grains"), "bread": ("gluten", "grains", "carbs"), "toast": ("gluten", "grains", "carbs"),
+    "pasta": ("gluten", "grains", "carbs"), "bagel": ("gluten", "grains", "carbs"), "couscous": ("gluten", "grains", "carbs"),
+    "tortilla": ("gluten", "grains", "carbs"), "pita": ("gluten", "grains", "carbs"), "wrap": ("gluten", "grains", "carbs"),
+    "barley": ("gluten", "grains"), "rye": ("gluten", "grains"), "seitan": ("gluten",), "cracker": ("gluten", "grains", "carbs"),
+    "oat": ("grains", "gluten", "carbs"), "oatmeal": ("grains", "gluten", "carbs"), "granola": ("grains", "carbs", "sugar"),
+    "rice": ("grains", "carbs"), "quinoa": ("grains",), "buckwheat": ("grains", "carbs"), "millet": ("grains", "carbs"),
+    "corn": ("grains", "carbs"), "grain": ("grains",), "cereal": ("grains", "carbs"),
+    "potato": ("carbs",), "banana": ("carbs",), "fruit": ("carbs",), "juice": ("carbs", "sugar"),
+    # Legumes, soy, nuts, seeds
+    "bean": ("legumes",), "lentil": ("legumes",), "chickpea": ("legumes",), "hummus": ("legumes", "sesame"),
+    "dal": ("legumes",), "edamame": ("soy", "legumes"), "soy": ("soy",), "tofu": ("soy",), "tempeh": ("soy",),
+    "miso": ("soy",), "peanut": ("peanuts",), "peanut butter": ("peanuts",),
+    "nut": ("nuts",), "almond": ("nuts",), "almond butter": ("nuts",), "nut butter": ("nuts",), "cashew": ("nuts",),
+    "walnut": ("nuts",), "pecan": ("nuts",), "pistachio": ("nuts",), "hazelnut": ("nuts",), "macadamia": ("nuts",),
+    "almond milk": ("nuts",), "cashew milk": ("nuts",), "soy milk": ("soy",), "oat milk": ("grains",), "rice milk": ("grains",),
+    "sesame": ("sesame",), "tahini": ("sesame",),
+    "sugar": ("sugar",), "syrup": ("sugar",), "jam": ("sugar",), "candy": ("sugar",), "soda": ("sugar",),
+    # Look-alikes that carry none of the tags above
+    "eggplant": (), "coconut milk": (), "coconut yogurt": (), "cocoa butter": (), "sunflower butter": (),
+    "cauliflower rice": (), "zucchini noodles": (), "lettuce wrap": (), "rice protein": (), "pea protein": (),
+    "green bean": (), "cod liver oil": ("fish",), "sweet potato": ("carbs",),
+    "veggie burger": (), "bean burger": ("legumes",),
+}
+
+# Style tags that rank meals for each meal_type: (preferred, avoided)
+MEAL_TYPE_STYLES = {
+    "High Protein": (("protein",), ()),
+    "Balanced": ((), ()),
+    "Low Carb": ((), ("carbs",)),
+    "High Carb": (("carbs",), ()),
+    "Mediterranean": (("mediterranean",), ()),
+}
+
+MEAL_SLOTS = ("breakfast", "lunch", "dinner", "snacks")
+
+# (name, meal slot, food tags, style tags)
+MEALS = (
+    # Breakfast
+    ("Greek yogurt with berries, walnuts and honey", "breakfast", ("dairy", "nuts", "honey"), ("protein", "mediterranean")),
+    ("Oatmeal with protein powder, banana and peanut butter", "breakfast", ("grains", "gluten", "carbs", "dairy", "peanuts"), ("protein", "carbs")),
+    ("Veggie omelette with spinach, peppers and feta", "breakfast", ("eggs", "dairy"), ("protein", "mediterranean")),
+    ("Scrambled eggs with smoked salmon and avocado", "breakfast", ("eggs", "fish"), ("protein",)),
+    ("Turkey sausage, eggs and sauteed greens", "breakfast", ("poultry", "eggs"), ("protein",)),
+    ("Tofu scramble with black beans and salsa", "breakfast", ("soy", "legumes"), ("protein",)),
+    ("Overnight oats with soy milk, chia and berries", "breakfast", ("grains", "gluten", "soy", "carbs"), ("carbs",)),
+    ("Chia pudding with coconut milk and raspberries", "breakfast", (), ()),
+    ("Buckwheat porridge with pumpkin seeds and apple", "breakfast", ("grains", "carbs"), ("carbs",)),
+    ("Whole-grain toast with avocado and poached eggs", "breakfast", ("grains", "gluten", "carbs", "eggs"), ("mediterranean",)),
+    ("Sweet potato hash with ground beef and peppers", "breakfast", ("meat", "carbs"), ("protein",)),
+    ("Cottage cheese with pineapple and flaxseed", "breakfast", ("dairy",), ("protein",)),
+    ("Green smoothie with pea protein, banana and spinach", "breakfast", ("carbs",), ("protein", "carbs")),
+    # Lunch
+    ("Grilled chicken with quinoa and roasted vegetables", "lunch", ("poultry", "grains"), ("protein",)),
+    ("Salmon salad with mixed greens, olives and olive oil", "lunch", ("fish",), ("protein", "mediterranean")),
+    ("Lentil and vegetable soup with brown rice", "lunch", ("legumes", "grains", "carbs"), ("carbs",)),
+    ("Chickpea, cucumber and tomato salad with tahini", "lunch", ("legumes", "sesame"), ("mediterranean",)),
+    ("Tempeh Buddha bowl with brown rice and greens", "lunch", ("soy", "grains", "carbs"), ("protein", "carbs")),
+    ("Turkey and avocado lettuce wraps", "lunch", ("poultry",), ("protein",)),
+    ("Tuna Nicoise salad with eggs and green beans", "lunch", ("fish", "eggs"), ("protein", "mediterranean")),
+    ("Beef and broccoli stir-fry with cauliflower rice", "lunch", ("meat",), ("protein",)),
+    ("Black bean and sweet potato burrito bowl", "lunch", ("legumes", "carbs"), ("carbs",)),
+    ("Whole-wheat pasta with shrimp, garlic and spinach", "lunch", ("shellfish", "gluten", "grains", "carbs"), ("carbs", "mediterranean")),
+    ("Halloumi and roasted vegetable salad", "lunch", ("dairy",), ("mediterranean",)),
+    ("Shrimp and avocado salad with lime dressing", "lunch", ("shellfish",), ("protein",)),
+    ("Stuffed bell peppers with quinoa and white beans", "lunch", ("grains", "legumes", "carbs"), ("carbs",)),
+    # Dinner
+    ("Lean beef with sweet potato and broccoli", "dinner", ("meat", "carbs"), ("protein",)),
+    ("Baked salmon with asparagus and wild rice", "dinner", ("fish", "grains", "carbs"), ("protein", "mediterranean")),
+    ("Chicken thighs with roasted zucchini and pesto", "dinner", ("poultry", "nuts", "dairy"), ("protein", "mediterranean")),
+    ("Tofu stir-fry with brown rice and bok choy", "dinner", ("soy", "grains", "carbs"), ("carbs",)),
+    ("Red lentil dal with basmati rice and spinach", "dinner", ("legumes", "grains", "carbs"), ("carbs",)),
+    ("Grilled white fish with Greek salad", "dinner", ("fish", "dairy"), ("protein", "mediterranean")),
+    ("Pork tenderloin with roasted root vegetables", "dinner", ("pork", "carbs"), ("protein",)),
+    ("Turkey meatballs with zucchini noodles and tomato sauce", "dinner", ("poultry", "eggs"), ("protein",)),
+    ("Chickpea and spinach curry with quinoa", "dinner", ("legumes", "grains", "carbs"), ("carbs",)),
+    ("Steak with garlic butter mushrooms and green salad", "dinner", ("meat", "dairy"), ("protein",)),
+    ("Eggplant and tomato bake with mozzarella", "dinner", ("dairy",), ("mediterranean",)),
+    ("Cod with cauliflower mash and green beans", "dinner", ("fish",), ("protein",)),
+    ("Roasted vegetable and white bean stew", "dinner", ("legumes", "carbs"), ("mediterranean", "carbs")),
+    ("Herb-roasted chicken with roasted vegetables and olive oil", "dinner", ("poultry",), ("protein", "mediterranean")),
+    # Snacks
+    ("Apple with almond butter", "snacks", ("nuts", "carbs"), ()),
+    ("Protein shake with banana", "snacks", ("dairy", "carbs"), ("protein", "carbs")),
+    ("Hard-boiled eggs", "snacks", ("eggs",), ("protein",)),
+    ("Hummus with carrot and cucumber sticks", "snacks", ("legumes", "sesame"), ("mediterranean",)),
+    ("Edamame with sea salt", "snacks", ("soy", "legumes"), ("protein",)),
+    ("Cheese and olives", "snacks", ("dairy",), ("mediterranean",)),
+    ("Beef jerky", "snacks", ("meat",), ("protein",)),
+    ("Mixed nuts", "snacks", ("nuts",), ()),
+    ("Roasted chickpeas", "snacks", ("legumes",), ("carbs",)),
+    ("Rice cakes with peanut butter", "snacks", ("grains", "peanuts", "carbs"), ("carbs",)),
+    ("Cottage cheese with cucumber", "snacks", ("dairy",), ("protein",)),
+    ("Smoked salmon cucumber bites", "snacks", ("fish",), ("protein",)),
+    ("Pumpkin seeds and berries", "snacks", (), ()),
+    ("Guacamole with bell pepper strips", "snacks", (), ()),
+    ("Fresh fruit", "snacks", ("carbs",), ("carbs",)),
+)
+
+# Always safe last resort when filters leave too few meals in a slot
+GENERIC_MEALS = {
+    "breakfast": "A protein you tolerate with vegetables and a healthy fat",
+    "lunch": "A palm-sized protein you tolerate with two fists of vegetables",
+    "dinner": "A palm-sized protein you tolerate with vegetables and olive oil",
+    "snacks": "Fresh vegetables with a tolerated protein or healthy fat",
+}
@@ -0,0 +1,418 @@
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from config.env_config import config
+from models.user_model import UserProfile
+from services.local_planner import available_equipment
+from services.nutrition import ACTIVITY_MULTIPLIERS, calculate_targets
+from services.metrics import plan_index_evictions
+from services.plan_cache import normalize_profile
+from services.shared_state import SQLiteThread, after_fork, connect
+
+# numpy is imported where it's used: the index is off by default, and importing it
+# up front would add about 100 ms to every app import
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Profile fields a plan is only reused across when they match exactly. Diet, allergies
+# and medical conditions are safety-relevant, so they are never approximated. The
+# equipment the profile can use is part of the key too (see bucket_key).
+BUCKET_FIELDS = (
+    "goal", "workout_split", "workout_days", "meal_preference", "meal_type", "workout_location",
+    "workout_experience", "gender", "allergies", "medical_conditions", "food_restrictions",
+)
+
+ACTIVITY_LEVELS = {level: index for index, level in enumerate(ACTIVITY_MULTIPLIERS)}
+
+# Scale of each numeric feature: this much difference counts as distance 1.0
+AGE_SCALE = 5.0
+BMI_SCALE = 1.0
+ACTIVITY_SCALE = 1.0
+SESSION_MINUTES_SCALE = 15.0
+
+# Grid cell edge within a bucket, in scaled feature units
+GRID_CELL = 1.0
+INITIAL_CELL_CAPACITY = 16
+
+# A full index drops this share of its plans, oldest first
+EVICT_FRACTION = 0.01
+# Seconds between reads of plans other workers added to a shared db_path
+SYNC_INTERVAL = 5.0
+
+
+def bucket_key(user_profile: UserProfile) -> str:
+    """BUCKET_FIELDS plus the usable equipment as a mask, so its wording doesn't split buckets"""
+    normalized = normalize_profile(user_profile)
+    fields = [normalized[field] for field in BUCKET_FIELDS] + [available_equipment(user_profile)]
+    return json.dumps(fields, separators=(",", ":"))
+
+
+def feature_vector(user_profile: UserProfile) -> "np.ndarray":
+    """Scaled numeric features: age band, BMI, activity level, session length"""
+    import numpy as np
+
+    bmi = user_profile.weight / (user_profile.height / 100.0) ** 2
+    return np.array([
+        user_profile.age / AGE_SCALE,
+        bmi / BMI_SCALE,
+        ACTIVITY_LEVELS[user_profile.activity_level] / ACTIVITY_SCALE,
+        (user_profile.time_per_session or 60) / SESSION_MINUTES_SCALE,
+    ], dtype=np.float32)
+
+
+def adapt_plan(plan: dict, user_profile: UserProfile) -> dict:
+    """Fit a neighbour's plan to this profile: recompute its calorie and macro targets"""
+    targets = calculate_targets(user_profile)
+    meal_plan = dict(plan["meal_plan"])
+    meal_plan["calorie_target"] = targets.calorie_summary()
+    meal_plan["macronutrient_breakdown"] = targets.macronutrient_breakdown()
+    return {**plan, "meal_plan": meal_plan}
+
+
+class Neighbour(NamedTuple):
+    distance: float
+    plan: dict
+
+
+class _Cell:
+    """Feature rows of one grid cell in a growable float32 array"""
+
+    def __init__(self, dimensions: int):
+        import numpy as np
+
+        self.vectors = np.empty((INITIAL_CELL_CAPACITY, dimensions), dtype=np.float32)
+        self.ids = np.empty(INITIAL_CELL_CAPACITY, dtype=np.int64)
+        self.size = 0
+
+    def add(self, plan_id: int, vector: "np.ndarray"):
+        import numpy as np
+
+        if self.size == len(self.ids):
+            self.vectors = np.resize(self.vectors, (len(self.ids) * 2, self.vectors.shape[1]))
+            self.ids = np.resize(self.ids, len(self.ids) * 2)
+        self.vectors[self.size] = vector
+        self.ids[self.size] = plan_id
+        self.size += 1
+
+    def evict(self, cutoff: int) -> int:
+        """Drop rows with ids below cutoff; returns how many"""
+        import numpy as np
+
+        keep = np.flatnonzero(self.ids[:self.size] >= cutoff)
+        removed = self.size - len(keep)
+        if removed:
+            self.vectors[:len(keep)] = self.vectors[keep]
+            self.ids[:len(keep)] = self.ids[keep]
+            self.size = len(keep)
+        return removed
+
+    def nearest(self, vector: "np.ndarray", k: int) -> List[Tuple[float, int]]:
+        import numpy as np
+
+        deltas = self.vectors[:self.size] - vector
+        distances = np.einsum("ij,ij->i", deltas, deltas)
+        candidates = np.argpartition(distances, k)[:k] if k < self.size else np.arange(self.size)
+        return [(float(np.sqrt(distances[i])), int(self.ids[i])) for i in candidates]
+
+
+class _Bucket:
+    """Plans sharing one set of categorical fields, gridded on the first two features
+
+    Any row outside the rings searched so far is at least `radius * GRID_CELL`
+    away, so ring search stops as soon as the k-th best distance is within that
+    bound and the result is exact.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.cells: Dict[Tuple[int, int], _Cell] = {}
+        self.size = 0
+        self.low = self.high = None
+
+    def add(self, plan_id: int, vector: "np.ndarray"):
+        key = _cell_key(vector)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = _Cell(self.dimensions)
+            self.low = key if self.low is None else (min(self.low[0], key[0]), min(self.low[1], key[1]))
+            self.high = key if self.high is None else (max(self.high[0], key[0]), max(self.high[1], key[1]))
+        cell.add(plan_id, vector)
+        self.size += 1
+
+    def evict(self, cutoff: int) -> int:
+        removed = 0
+        for key in list(self.cells):
+            removed += self.cells[key].evict(cutoff)
+            if self.cells[key].size == 0:
+                del self.cells[key]
+        self.size -= removed
+        return removed
+
+    def nearest(self, vector: "np.ndarray", k: int) -> List[Tuple[float, int]]:
+        x, y = _cell_key(vector)
+        max_radius = max(x - self.low[0], self.high[0] - x, y - self.low[1], self.high[1] - y, 0)
+        best: List[Tuple[float, int]] = []
+        for radius in range(max_radius + 1):
+            for key in _ring(x, y, radius):
+                cell = self.cells.get(key)
+                if cell is not None:
+                    best.extend(cell.nearest(vector, k))
+            best = heapq.nsmallest(k, best)
+            if len(best) == k and best[-1][0] <= radius * GRID_CELL:
+                break
+        return best
+
+
+def _cell_key(vector: "np.ndarray") -> Tuple[int, int]:
+    return int(vector[0] // GRID_CELL), int(vector[1] // GRID_CELL)
+
+
+def _ring(x: int, y: int, radius: int):
+    """Grid cells at Chebyshev distance `radius` from (x, y)"""
+    if radius == 0:
+        yield x, y
+        return
+    for dx in range(-radius, radius + 1):
+        yield x + dx, y - radius
+        yield x + dx, y + radius
+    for dy in range(-radius + 1, radius):
+        yield x - radius, y + dy
+        yield x + radius, y + dy
+
+
+class PlanIndex:
+    """k-NN index of generated plans over profile features
+
+    Profiles are bucketed by their exact categorical fields; within a bucket,
+    neighbours are found by brute force over the scaled numeric features of the
+    nearest grid cells, so a lookup touches a few thousand rows even when one
+    bucket holds a million plans.
+    Vectors live in memory; plan payloads stay in SQLite when db_path is set,
+    read and written on the index's SQLite thread. Workers sharing db_path pick
+    up each other's plans on their next write, or lookup after SYNC_INTERVAL.
+    Once max_plans is reached, the oldest plans make room for new ones.
+    """
+
+    def __init__(self, max_plans: int = 100000, db_path: Optional[str] = None):
+        self.max_plans = max_plans
+        self.db_path = db_path
+
+        self._buckets: Dict[str, _Bucket] = {}
+        self._plans: Dict[int, bytes] = {}
+        self._size = 0
+        # Ids of in-memory plans; with db_path, SQLite assigns them
+        self._next_id = 0
+        # Highest id read from db_path, touched only on the SQLite thread
+        self._last_id = 0
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self._thread = SQLiteThread("plan-index")
+        self._db = None
+
+        self.served = 0
+        self.seeded = 0
+        self.misses = 0
+        self.evicted = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        self._db = connect(db_path)
+        after_fork(self._reconnect)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plan_index (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bucket TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                plan BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+        self._load(self._db_new_rows())
+        self._last_sync = time.monotonic()
+        logger.info(f"Plan index opened at {db_path} ({self._size} plans)")
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self._thread.reset()
+        self._db = connect(self.db_path)
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def add(self, user_profile: UserProfile, plan: dict):
+        bucket = bucket_key(user_profile)
+        vector = feature_vector(user_profile)
+        payload = json.dumps(plan, separators=(",", ":")).encode("utf-8")
+        if self._db is None:
+            with self._lock:
+                plan_id = self._next_id
+                self._next_id += 1
+                self._plans[plan_id] = payload
+                self._load([(plan_id, bucket, vector)])
+            return
+        # The insert comes back with it every plan other workers added since the last read
+        rows = await self._thread.run(self._db_add, bucket, vector, payload)
+        self._last_sync = time.monotonic()
+        await self._apply(rows)
+
+    async def nearest(self, user_profile: UserProfile, k: int = 1) -> List[Neighbour]:
+        """Up to k stored plans with the same categorical fields, closest first"""
+        if self._db is not None and time.monotonic() - self._last_sync > SYNC_INTERVAL:
+            self._last_sync = time.monotonic()
+            await self._apply(await self._thread.run(self._db_new_rows))
+        with self._lock:
+            bucket = self._buckets.get(bucket_key(user_profile))
+            if bucket is None or k <= 0:
+                return []
+            matches = bucket.nearest(feature_vector(user_profile), k)
+            if self._db is None:
+                payloads = [self._plans.get(plan_id) for _, plan_id in matches]
+        if self._db is not None:
+            payloads = await self._thread.run(self._db_payloads, [plan_id for _, plan_id in matches])
+        return [
+            Neighbour(distance, json.loads(payload))
+            for (distance, _), payload in zip(matches, payloads)
+            if payload is not None
+        ]
+
+    async def lookup(self, user_profile: UserProfile, max_distance: float, seeds: int) -> Tuple[Optional[dict], List[dict]]:
+        """(adapted plan within max_distance or None, seed plans for generation otherwise)"""
+        neighbours = await self.nearest(user_profile, max(1, seeds))
+        if neighbours and neighbours[0].distance <= max_distance:
+            self.served += 1
+            return adapt_plan(neighbours[0].plan, user_profile), []
+        if neighbours and seeds:
+            self.seeded += 1
+        else:
+            self.misses += 1
+        return None, [neighbour.plan for neighbour in neighbours[:seeds]]
+
+    def stats(self) -> dict:
+        sizes = [bucket.size for bucket in self._buckets.values()]
+        return {
+            "plans": self._size,
+            "buckets": len(sizes),
+            "largest_bucket": max(sizes, default=0),
+            "served": self.served,
+            "seeded": self.seeded,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _apply(self, rows: List[tuple]):
+        with self._lock:
+            cutoff = self._load(rows)
+        if cutoff is not None:
+            await self._thread.run(self._db_evict, cutoff)
+
+    # Memory (caller holds the lock)
+
+    def _load(self, rows) -> Optional[int]:
+        """Insert (id, bucket, vector) rows, evicting the oldest plans if that overfills the index
+
+        Returns the id below which plans were evicted, if any.
+        """
+        import numpy as np
+
+        for plan_id, bucket_name, vector in rows:
+            if not isinstance(vector, np.ndarray):
+                vector = np.frombuffer(vector, dtype=np.float32)
+            bucket = self._buckets.get(bucket_name)
+            if bucket is None:
+                bucket = self._buckets[bucket_name] = _Bucket(len(vector))
+            bucket.add(plan_id, vector)
+            self._size += 1
+        if self._size <= self.max_plans:
+            return None
+        return self._evict(self._size - self.max_plans + max(1, int(self.max_plans * EVICT_FRACTION)))
+
+    def _evict(self, count: int) -> int:
+        """Drop about `count` of the oldest plans (lowest ids); returns the id cutoff"""
+        import numpy as np
+
+        ids = np.concatenate([cell.ids[:cell.size] for bucket in self._buckets.values() for cell in bucket.cells.values()])
+        count = min(count, len(ids))
+        cutoff = int(np.partition(ids, count - 1)[count - 1]) + 1
+        removed = 0
+        for name in list(self._buckets):
+            removed += self._buckets[name].evict(cutoff)
+            if self._buckets[name].size == 0:
+                del self._buckets[name]
+        self._size -= removed
+        if self._db is None:
+            self._plans = {plan_id: payload for plan_id, payload in self._plans.items() if plan_id >= cutoff}
+        self.evicted += removed
+        plan_index_evictions.inc(amount=removed)
+        logger.info(f"Plan index full ({self.max_plans} plans), evicted the {removed} oldest")
+        return cutoff
+
+    # SQLite (run on the index's SQLite thread, or at startup)
+
+    def _db_new_rows(self) -> List[tuple]:
+        """Rows added since the last read, at most the newest max_plans"""
+        try:
+            rows = self._db.execute(
+                "SELECT id, bucket, vector FROM plan_index WHERE id > ? ORDER BY id DESC LIMIT ?",
+                (self._last_id, self.max_plans),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Plan index read error: {str(e)}")
+            return []
+        rows.reverse()
+        if rows:
+            self._last_id = rows[-1][0]
+        return rows
+
+    def _db_add(self, bucket: str, vector: "np.ndarray", payload: bytes) -> List[tuple]:
+        try:
+            self._db.execute(
+                "INSERT INTO plan_index (bucket, vector, plan, created_at) VALUES (?, ?, ?, ?)",
+                (bucket, vector.tobytes(), payload, time.time()),
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Plan index write error: {str(e)}")
+        return self._db_new_rows()
+
+    def _db_payloads(self, plan_ids: List[int]) -> List[Optional[bytes]]:
+        if not plan_ids:
+            return []
+        try:
+            rows = self._db.execute(
+                f"SELECT id, plan FROM plan_index WHERE id IN ({','.join('?' * len(plan_ids))})", plan_ids
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Plan index read error: {str(e)}")
+            return [None] * len(plan_ids)
+        payloads = {plan_id: bytes(plan) for plan_id, plan in rows}
+        return [payloads.get(plan_id) for plan_id in plan_ids]
+
+    def _db_evict(self, cutoff: int):
+        try:
+            self._db.execute("DELETE FROM plan_index WHERE id < ?", (cutoff,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Plan index eviction error: {str(e)}")
+
+
+plan_index = PlanIndex(
+    max_plans=config.PLAN_INDEX_MAX_PLANS,
+    db_path=config.PLAN_INDEX_DB_PATH or None,
+)
@@ -0,0 +1,336 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from config.env_config import config
+from models.user_model import PlanRequest
+from services.metrics import plan_jobs, plan_jobs_pending
+from services.plan_service import get_model, get_or_generate_plan, create_fallback_response
+from services.admission import AdmissionRejected, PRIORITY_JOB, request_priority
+from services.shared_state import SQLiteThread, after_fork, connect
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# A running job older than this is taken to be abandoned even if its owner's pid is alive (pid reuse)
+STALE_RUNNING_SECONDS = 900
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_PENDING jobs are already waiting or running"""
+
+
+class JobStore:
+    """Plan jobs in SQLite, so queued work and results survive a restart
+
+    Worker processes may share one store: a job is claimed atomically before
+    it runs and records the pid running it, so each job runs once. The runner
+    calls it through `thread`, keeping lock waits off the event loop. The
+    database is opened by `open` when the runner starts, not on import.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self.thread = SQLiteThread("plan-jobs")
+        self._lock = threading.Lock()
+        self._db = None
+
+    def open(self):
+        if self._db is not None:
+            return
+        self._db = connect(self.db_path)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plan_jobs (
+                id TEXT PRIMARY KEY,
+                request BLOB NOT NULL,
+                provider TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result BLOB,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner INTEGER
+            )
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(plan_jobs)")}
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE plan_jobs ADD COLUMN owner INTEGER")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_plan_jobs_status ON plan_jobs (status, created_at)")
+        self._db.commit()
+        if self.db_path != ":memory:":
+            after_fork(self._reconnect)
+        logger.info(f"Plan job store opened at {self.db_path}")
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self.thread.reset()
+        self._db = connect(self.db_path)
+
+    def create(self, request: PlanRequest) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO plan_jobs (id, request, provider, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, request.model_dump_json(), request.ai_provider, QUEUED, time.time()),
+            )
+            self._db.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, provider, status, result, error, attempts, created_at, started_at, finished_at "
+                "FROM plan_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, provider, status, result, error, attempts, created_at, started_at, finished_at = row
+        return {
+            "job_id": job_id,
+            "provider": provider,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "attempts": attempts,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+
+    def request(self, job_id: str) -> Optional[PlanRequest]:
+        with self._lock:
+            row = self._db.execute("SELECT request FROM plan_jobs WHERE id = ?", (job_id,)).fetchone()
+        return PlanRequest.model_validate_json(row[0]) if row else None
+
+    def start(self, job_id: str) -> bool:
+        """Claim a queued job for this process; False if it isn't queued (another worker took it)"""
+        with self._lock:
+            claimed = self._db.execute(
+                "UPDATE plan_jobs SET status = ?, owner = ?, started_at = ?, attempts = attempts + 1 "
+                "WHERE id = ? AND status = ?",
+                (RUNNING, os.getpid(), time.time(), job_id, QUEUED),
+            ).rowcount == 1
+            self._db.commit()
+        return claimed
+
+    def requeue(self, job_id: str):
+        with self._lock:
+            self._db.execute("UPDATE plan_jobs SET status = ? WHERE id = ?", (QUEUED, job_id))
+            self._db.commit()
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        payload = json.dumps(result, separators=(",", ":")) if result is not None else None
+        with self._lock:
+            self._db.execute(
+                "UPDATE plan_jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, payload, error, time.time(), job_id),
+            )
+            self._db.commit()
+
+    def unfinished(self) -> List[str]:
+        """Queued and interrupted jobs, oldest first
+
+        Running jobs whose process has exited are reset to queued; those still
+        running in another live worker are left to it.
+        """
+        with self._lock:
+            stale = time.time() - STALE_RUNNING_SECONDS
+            rows = self._db.execute(
+                "SELECT id, owner, started_at FROM plan_jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE plan_jobs SET status = ?, owner = NULL WHERE id = ? AND status = ?",
+                [
+                    (QUEUED, job_id, RUNNING) for job_id, owner, started_at in rows
+                    if not _process_alive(owner) or (started_at or 0) < stale
+                ],
+            )
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT id FROM plan_jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that finished before `older_than`"""
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM plan_jobs WHERE status IN (?, ?) AND finished_at < ?", (*FINISHED, older_than)
+            ).rowcount
+            self._db.commit()
+        return deleted
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM plan_jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._db.close()
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """Whether `pid` is a live process other than this one"""
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class PlanJobRunner:
+    """Bounded pool of worker tasks generating plans for submitted jobs
+
+    Jobs are persisted before they are queued, so a job accepted before a
+    restart (or interrupted by one) is picked up again on the next start.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 8, max_pending: int = 1000, ttl: float = 86400):
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._done: Dict[str, asyncio.Event] = {}
+        self._last_purge = 0.0
+
+    async def start(self):
+        await self.store.thread.run(self.store.open)
+        self._queue = asyncio.Queue()
+        await self._purge()
+        recovered = await self.store.thread.run(self.store.unfinished)
+        for job_id in recovered:
+            self._queue.put_nowait(job_id)
+        if recovered:
+            logger.info(f"Requeued {len(recovered)} unfinished plan jobs")
+        plan_jobs_pending.set(value=self._queue.qsize())
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def shutdown(self):
+        # Interrupted jobs stay "running" in the store and are requeued when a worker next starts
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request: PlanRequest) -> dict:
+        if self._queue is None:
+            raise RuntimeError("Plan job runner is not started")
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFull(f"{self.max_pending} plan jobs already pending")
+        job = await self.store.thread.run(self.store.create, request)
+        self._queue.put_nowait(job["job_id"])
+        plan_jobs.inc(QUEUED)
+        plan_jobs_pending.set(value=self._queue.qsize())
+        if time.time() - self._last_purge > 60:
+            await self._purge()
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """The job, once finished or after `timeout` seconds, whichever comes first"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.store.thread.run(self.store.get, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED:
+                self._release(job_id)
+                return job
+            if remaining <= 0:
+                return job
+            # Jobs run by another process have no local event, so re-check the store every second
+            event = self._done.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": await self.store.thread.run(self.store.counts),
+        }
+
+    async def _worker(self):
+        # Jobs queue for provider quota behind interactive requests
+        request_priority.set(PRIORITY_JOB)
+        while True:
+            job_id = await self._queue.get()
+            plan_jobs_pending.set(value=self._queue.qsize())
+            try:
+                await self._run(job_id)
+            except AdmissionRejected as e:
+                # Out of provider quota: hold this worker back, then put the job at the end of the queue
+                await self.store.thread.run(self.store.requeue, job_id)
+                await asyncio.sleep(e.retry_after)
+                self._queue.put_nowait(job_id)
+                continue
+            except Exception as e:
+                logger.error(f"Plan job {job_id} failed: {str(e)}")
+                await self.store.thread.run(self.store.finish, job_id, FAILED, None, str(e))
+                plan_jobs.inc(FAILED)
+            finally:
+                self._release(job_id)
+
+    async def _run(self, job_id: str):
+        request = await self.store.thread.run(self.store.request, job_id)
+        if request is None or not await self.store.thread.run(self.store.start, job_id):
+            return
+        model = get_model(request.ai_provider)
+        plan, cache_hit = await get_or_generate_plan(request, model, request.ai_provider)
+        if plan:
+            result = {
+                "status": "200",
+                "message": f"Plan generated successfully with {model.display_name}",
+                "cached": cache_hit,
+                "data": plan.model_dump(),
+            }
+        else:
+            result = {
+                "status": "200",
+                "message": "Plan generated with fallback data",
+                "cached": False,
+                "data": create_fallback_response(request.user_profile, request.ai_provider).model_dump(),
+            }
+        await self.store.thread.run(self.store.finish, job_id, SUCCEEDED, result)
+        plan_jobs.inc(SUCCEEDED)
+
+    def _release(self, job_id: str):
+        """Wake every long-poll waiting on a finished job"""
+        event = self._done.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _purge(self):
+        self._last_purge = time.time()
+        deleted = await self.store.thread.run(self.store.purge, self._last_purge - self.ttl)
+        if deleted:
+            logger.info(f"Purged {deleted} finished plan jobs older than {self.ttl}s")
+
+
+plan_job_runner = PlanJobRunner(
+    JobStore(config.JOB_DB_PATH or ":memory:"),
+    workers=config.JOB_WORKERS,
+    max_pending=config.JOB_MAX_PENDING,
+    ttl=config.JOB_TTL,
+)
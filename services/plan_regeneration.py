@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, NamedTuple, Set, Tuple, Type
+
+from pydantic import BaseModel
+
+from models.plan_model import FitnessPlan, MacronutrientBreakdown, MealPlan, WorkoutDay, WorkoutPlan, PlanExtras
+from models.user_model import UserProfile
+from templates.generate_plan import PromptTemplates, PlanPrompt
+from services.admission import AdmissionRejected
+from services.metrics import plan_regenerated_sections, plan_section_fallbacks
+from services.nutrition import calculate_targets
+from services.plan_cache import normalize_profile
+from services.plan_sections import generate_section, workout_skeleton
+
+logger = logging.getLogger(__name__)
+
+# Profile fields each section is written from. The body metrics in TARGET_FIELDS only
+# move the calorie and macro targets, which are recomputed locally instead.
+SECTION_FIELDS = {
+    "meal_plan": {"goal", "goal_weight", "meal_preference", "meal_type", "allergies", "medical_conditions", "food_restrictions"},
+    "workout_plan": {"goal", "workout_split", "workout_location", "workout_experience", "equipment_available", "time_per_session", "medical_conditions"},
+    "extras": {"goal"},
+}
+TARGET_FIELDS = {"age", "gender", "height", "weight", "activity_level"}
+
+
+class RegenerationScope(NamedTuple):
+    """What a profile change invalidates in a plan"""
+    sections: Tuple[str, ...]
+    day_count_changed: bool
+    targets_changed: bool
+
+
+def changed_fields(previous: UserProfile, current: UserProfile) -> Set[str]:
+    """Profile fields that differ after normalization (case, whitespace, "N/A" spellings)"""
+    old, new = normalize_profile(previous), normalize_profile(current)
+    return {field for field in new if old[field] != new[field]}
+
+
+def regeneration_scope(changed: Set[str]) -> RegenerationScope:
+    return RegenerationScope(
+        sections=tuple(section for section, fields in SECTION_FIELDS.items() if fields & changed),
+        day_count_changed="workout_days" in changed,
+        targets_changed=bool(TARGET_FIELDS & changed),
+    )
+
+
+async def regenerate_plan(
+    previous_plan: FitnessPlan,
+    previous: UserProfile,
+    current: UserProfile,
+    model,
+    provider: str,
+    fallback: Callable[[UserProfile], FitnessPlan],
+) -> Tuple[FitnessPlan, List[str], List[str]]:
+    """Re-prompt only the parts of previous_plan that the profile change affects
+
+    Returns the updated plan, the parts that were regenerated and the parts that
+    failed and were filled from `fallback` instead. A change of
+    workout_days alone keeps the existing days and writes only the added ones
+    (the skeleton gives day i the same focus whatever the count); body metrics
+    only recompute the targets. Everything else is reused verbatim. A section
+    that fails is filled from `fallback`, as in section-parallel generation, and
+    is listed as "<part>:fallback" among the regenerated parts.
+    """
+    scope = regeneration_scope(changed_fields(previous, current))
+    skeleton = workout_skeleton(current)
+    kept_days = previous_plan.workout_plan.weekly_schedule[:current.workout_days]
+    if scope.day_count_changed and len(previous_plan.workout_plan.weekly_schedule) != previous.workout_days:
+        # The model didn't follow the old day count, so its days can't be lined up with the skeleton
+        scope = scope._replace(sections=scope.sections + ("workout_plan",))
+
+    sections: Dict[str, Tuple[PlanPrompt, Type[BaseModel]]] = {}
+    if "meal_plan" in scope.sections:
+        sections["meal_plan"] = (PromptTemplates.meal_plan_prompt(current), MealPlan)
+    if "extras" in scope.sections:
+        sections["extras"] = (PromptTemplates.plan_extras_prompt(current), PlanExtras)
+    if "workout_plan" in scope.sections:
+        sections["workout_plan"] = (PromptTemplates.workout_plan_prompt(current, skeleton), WorkoutPlan)
+    elif scope.day_count_changed:
+        for index in range(len(kept_days), len(skeleton)):
+            sections[f"day_{index + 1}"] = (PromptTemplates.workout_day_prompt(current, skeleton, index), WorkoutDay)
+
+    results = await asyncio.gather(*(
+        generate_section(model, provider, name, prompt, section_model)
+        for name, (prompt, section_model) in sections.items()
+    ), return_exceptions=True)
+    rejected = [result for result in results if isinstance(result, AdmissionRejected)]
+    if rejected and len(rejected) == len(results):
+        raise rejected[0]
+    parts = {
+        name: result if isinstance(result, BaseModel) else None
+        for name, result in zip(sections, results)
+    }
+    failed = [name for name, part in parts.items() if part is None]
+    default = fallback(current) if failed else None
+    for name in failed:
+        plan_section_fallbacks.inc(provider, "day" if name.startswith("day_") else name)
+        logger.warning(f"{provider} {name} section failed during regeneration, using fallback for it")
+    for name in sections:
+        plan_regenerated_sections.inc(provider, "day" if name.startswith("day_") else name)
+
+    regenerated = [f"{name}:fallback" if name in failed else name for name in sections]
+    meal_plan = previous_plan.meal_plan
+    if "meal_plan" in parts:
+        meal_plan = parts["meal_plan"] or default.meal_plan
+    elif scope.targets_changed:
+        targets = calculate_targets(current)
+        meal_plan = meal_plan.model_copy(update={
+            "calorie_target": targets.calorie_summary(),
+            "macronutrient_breakdown": MacronutrientBreakdown(**targets.macronutrient_breakdown()),
+        })
+        regenerated.append("targets")
+
+    if "workout_plan" in parts:
+        workout_plan = parts["workout_plan"] or default.workout_plan
+    elif scope.day_count_changed:
+        days = list(kept_days)
+        for index in range(len(kept_days), len(skeleton)):
+            day_name, focus = skeleton[index]
+            day = parts[f"day_{index + 1}"] or default.workout_plan.weekly_schedule[index]
+            days.append(day.model_copy(update={"day_name": day_name, "focus": focus}))
+        workout_plan = previous_plan.workout_plan.model_copy(update={
+            "frequency": f"{current.workout_days} days per week",
+            "weekly_schedule": days,
+        })
+    else:
+        workout_plan = previous_plan.workout_plan
+
+    extras = PlanExtras(
+        general_recommendations=previous_plan.general_recommendations,
+        progress_tracking=previous_plan.progress_tracking,
+    )
+    if "extras" in parts:
+        extras = parts["extras"] or PlanExtras(
+            general_recommendations=default.general_recommendations,
+            progress_tracking=default.progress_tracking,
+        )
+
+    plan = FitnessPlan(
+        meal_plan=meal_plan,
+        workout_plan=workout_plan,
+        general_recommendations=extras.general_recommendations,
+        progress_tracking=extras.progress_tracking,
+    )
+    return plan, regenerated, failed
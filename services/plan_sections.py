@@ -0,0 +1,120 @@
+from models.user_model import UserProfile
+from models.plan_model import FitnessPlan, MealPlan, WorkoutDay, WorkoutPlan, WorkoutOverview, PlanExtras
+from templates.generate_plan import PromptTemplates, PlanPrompt
+from services.metrics import plan_section_fallbacks, plan_validation_failures
+from services.admission import AdmissionRejected
+from services.request_timing import span
+from config.env_config import config
+from pydantic import BaseModel, ValidationError
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Day focuses per split, cycled over the user's workout days
+SPLIT_FOCUSES = {
+    "Full Body": ["Full Body"],
+    "Upper/Lower": ["Upper Body", "Lower Body"],
+    "Push Pull Legs": ["Push (Chest, Shoulders, Triceps)", "Pull (Back, Biceps)", "Legs"],
+    "Body Part Split": ["Chest", "Back", "Shoulders", "Legs", "Arms", "Core & Conditioning", "Full Body"],
+    "HIIT": ["HIIT Intervals", "HIIT Circuit"],
+    "Functional": ["Functional Strength", "Mobility & Conditioning"],
+}
+
+
+def workout_skeleton(user_profile: UserProfile) -> List[Tuple[str, str]]:
+    """(day_name, focus) for each workout day, derived locally from the split"""
+    focuses = SPLIT_FOCUSES[user_profile.workout_split]
+    return [(f"Day {i + 1}", focuses[i % len(focuses)]) for i in range(user_profile.workout_days)]
+
+
+async def generate_section(model, provider: str, name: str, prompt: PlanPrompt, section_model: Type[BaseModel]) -> Optional[BaseModel]:
+    result = await model.generate_plan(prompt)
+    if not result:
+        return None
+    try:
+        with span("validate"):
+            return section_model(**result)
+    except (ValidationError, TypeError) as e:
+        plan_validation_failures.inc(provider)
+        logger.error(f"{provider} {name} section failed validation: {str(e)}")
+        return None
+
+
+async def generate_sectioned_plan(
+    user_profile: UserProfile,
+    model,
+    provider: str,
+    fallback: Callable[[UserProfile], FitnessPlan],
+) -> Tuple[Optional[FitnessPlan], bool]:
+    """Generate the plan as concurrent section calls and merge them
+
+    Meal plan, extras and workout plan are requested in parallel. From
+    SECTION_FANOUT_MIN_DAYS workout days on, the workout plan is split further into
+    an overview plus one call per day, all built on the same local skeleton. A
+    section that fails is filled from `fallback`. Returns (plan, partial), partial
+    when any section came from the fallback; the plan is None only if every
+    section failed (AdmissionRejected if every section was refused provider quota).
+    """
+    skeleton = workout_skeleton(user_profile)
+    fan_out = len(skeleton) >= config.SECTION_FANOUT_MIN_DAYS
+
+    with span("prompt"):
+        sections: Dict[str, Tuple[PlanPrompt, Type[BaseModel]]] = {
+            "meal_plan": (PromptTemplates.meal_plan_prompt(user_profile), MealPlan),
+            "extras": (PromptTemplates.plan_extras_prompt(user_profile), PlanExtras),
+        }
+        if fan_out:
+            sections["workout_overview"] = (PromptTemplates.workout_overview_prompt(user_profile, skeleton), WorkoutOverview)
+            for index in range(len(skeleton)):
+                sections[f"day_{index + 1}"] = (PromptTemplates.workout_day_prompt(user_profile, skeleton, index), WorkoutDay)
+        else:
+            sections["workout_plan"] = (PromptTemplates.workout_plan_prompt(user_profile, skeleton), WorkoutPlan)
+
+    results = await asyncio.gather(*(
+        generate_section(model, provider, name, prompt, section_model)
+        for name, (prompt, section_model) in sections.items()
+    ), return_exceptions=True)
+    rejected = [result for result in results if isinstance(result, AdmissionRejected)]
+    if len(rejected) == len(results):
+        raise rejected[0]
+    parts = {
+        name: result if isinstance(result, BaseModel) else None
+        for name, result in zip(sections, results)
+    }
+    failed = [name for name, part in parts.items() if part is None]
+    if len(failed) == len(parts):
+        return None, False
+
+    default = fallback(user_profile) if failed else None
+    for name in failed:
+        plan_section_fallbacks.inc(provider, "day" if name.startswith("day_") else name)
+        logger.warning(f"{provider} {name} section failed, using fallback for it")
+
+    meal_plan = parts["meal_plan"] or default.meal_plan
+    extras = parts["extras"] or PlanExtras(
+        general_recommendations=default.general_recommendations,
+        progress_tracking=default.progress_tracking,
+    )
+
+    if fan_out:
+        overview = parts["workout_overview"] or WorkoutOverview(
+            **default.workout_plan.model_dump(exclude={"weekly_schedule"})
+        )
+        days = []
+        for index, (day_name, focus) in enumerate(skeleton):
+            day = parts[f"day_{index + 1}"] or default.workout_plan.weekly_schedule[index]
+            # The skeleton is authoritative for naming and order
+            days.append(day.model_copy(update={"day_name": day_name, "focus": focus}))
+        workout_plan = WorkoutPlan(**overview.model_dump(), weekly_schedule=days)
+    else:
+        workout_plan = parts["workout_plan"] or default.workout_plan
+
+    plan = FitnessPlan(
+        meal_plan=meal_plan,
+        workout_plan=workout_plan,
+        general_recommendations=extras.general_recommendations,
+        progress_tracking=extras.progress_tracking,
+    )
+    return plan, bool(failed)
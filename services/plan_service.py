@@ -0,0 +1,438 @@
+from models.user_model import PlanRequest, RegeneratePlanRequest, UserProfile
+from models.plan_model import FitnessPlan, validate_plan
+from templates.generate_plan import PromptTemplates, PlanPrompt
+from llm_models import provider_registry, ProviderUnavailable
+from llm_models.base import BaseLLMModel
+from services.plan_cache import plan_cache, make_cache_key
+from services.plan_index import plan_index
+from services.single_flight import plan_single_flight
+from services.hedging import plan_hedger, latency_tracker
+from services.local_planner import LOCAL_PROVIDER, build_local_plan, local_planner
+from services.metrics import plan_fallbacks, plan_validation_failures, plan_index_lookups, plan_rule_checks, plan_rule_failures
+from services.plan_sections import generate_sectioned_plan
+from services.plan_regeneration import regenerate_plan
+from services.plan_validator import check_plan
+from services.admission import AdmissionRejected, PRIORITY_BULK, request_priority
+from services.request_timing import span
+from services.plan_stream import (
+    new_plan_parser, section_event, plan_section_events, assemble_plan
+)
+from config.env_config import config
+from pydantic import ValidationError
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+def get_model(provider: str) -> BaseLLMModel:
+    """Model instance for a provider name; raises ProviderUnavailable if it isn't configured"""
+    if provider == LOCAL_PROVIDER:
+        return local_planner
+    return provider_registry.get(provider)
+
+def create_fallback_response(user_profile: UserProfile, provider: str = "unknown") -> FitnessPlan:
+    """Create a basic fallback response when AI models fail"""
+    plan_fallbacks.inc(provider)
+    return build_fallback_plan(user_profile)
+
+def build_fallback_plan(user_profile: UserProfile) -> FitnessPlan:
+    """The fallback plan itself, also the source of per-section fallbacks"""
+    return build_local_plan(user_profile)
+
+def get_hedge_model(primary: str):
+    """First configured provider, other than the primary and with its circuit not open, to hedge or fail over with"""
+    for provider in config.HEDGE_PROVIDERS:
+        if provider in (primary, LOCAL_PROVIDER):
+            continue
+        try:
+            model = get_model(provider)
+        except ProviderUnavailable:
+            continue
+        if model.breaker.available():
+            return provider, model
+    return None, None
+
+async def run_generation(model, provider: str, prompt: PlanPrompt) -> Optional[Tuple[FitnessPlan, bool]]:
+    """Call one model and validate its output, recording latency for hedging
+
+    Returns (plan, partial), or None when the call failed. A partial plan was cut
+    off and closed by the JSON extractor, so it may be missing workout days or meals.
+    """
+    started = time.perf_counter()
+    try:
+        result = await model.generate_extraction(prompt)
+    except asyncio.CancelledError:
+        # A cancelled call still tells us the provider took at least this long
+        latency_tracker.record(provider, time.perf_counter() - started)
+        raise
+    if not result.data:
+        return None
+
+    latency_tracker.record(provider, time.perf_counter() - started)
+    try:
+        with span("validate"):
+            return validate_plan(result.data), "closed_truncated" in result.repairs
+    except ValidationError:
+        plan_validation_failures.inc(provider)
+        raise
+
+async def review_plan(plan: FitnessPlan, user_profile: UserProfile, model, provider: str) -> FitnessPlan:
+    """Check a generated plan against the profile; in "escalate" mode, ask the model to correct a plan that fails
+
+    The rule checks are local and cheap, so only failing plans pay for the
+    extra validation round-trip. A correction is kept only if it fails fewer
+    checks; otherwise, or if the call fails, the original plan is served.
+    """
+    with span("rules"):
+        issues = check_plan(plan, user_profile)
+    if not issues:
+        plan_rule_checks.inc(provider, "passed")
+        return plan
+    for issue in issues:
+        plan_rule_failures.inc(provider, issue.rule)
+    logger.warning(f"{provider} plan failed {len(issues)} rule checks: {'; '.join(issue.message for issue in issues)}")
+    if config.PLAN_VALIDATION != "escalate":
+        plan_rule_checks.inc(provider, "failed")
+        return plan
+
+    prompt = PromptTemplates.validate_plan_prompt(plan.model_dump_json(), user_profile, [issue.message for issue in issues])
+    corrected = None
+    try:
+        result = await model.generate_extraction(prompt)
+        if result.data and "closed_truncated" not in result.repairs:
+            with span("validate"):
+                corrected = validate_plan(result.data)
+    except ValidationError:
+        plan_validation_failures.inc(provider)
+    except AdmissionRejected:
+        logger.warning(f"{provider} is out of quota, serving the plan without correction")
+    remaining = check_plan(corrected, user_profile) if corrected is not None else issues
+    if len(remaining) < len(issues):
+        plan_rule_checks.inc(provider, "corrected")
+        return corrected
+    plan_rule_checks.inc(provider, "uncorrected")
+    return plan
+
+async def generate_and_cache_plan(
+    request: PlanRequest, model, provider: str, cache_key: str, seeds: Sequence[dict] = ()
+) -> Optional[FitnessPlan]:
+    """Run one model generation (hedged if enabled, or section-parallel), validate and rule-check it and store it in the plan cache and index
+
+    Partial plans (truncated output, or sections filled from the fallback) are
+    returned but not stored.
+    """
+    cacheable = True
+    if config.BREAKER_FAILOVER and not model.breaker.available():
+        backup_provider, backup_model = get_hedge_model(provider)
+        if backup_model is not None:
+            # Not cached under the primary's key, so the primary serves this profile again once it recovers
+            logger.warning(f"{provider} circuit is open, failing over to {backup_provider}")
+            model, provider, cacheable = backup_model, backup_provider, False
+
+    if config.GENERATION_MODE == "sectioned":
+        plan, partial = await generate_sectioned_plan(request.user_profile, model, provider, build_fallback_plan)
+    else:
+        with span("prompt"):
+            prompt = PromptTemplates.build_plan_prompt(request.user_profile, seeds)
+        hedge_provider, hedge_model = get_hedge_model(provider) if config.HEDGING_ENABLED else (None, None)
+        if hedge_model is not None:
+            hedged = await plan_hedger.run(
+                provider, lambda: run_generation(model, provider, prompt),
+                hedge_provider, lambda: run_generation(hedge_model, hedge_provider, prompt)
+            )
+            generated = None
+            if hedged is not None:
+                winner, generated = hedged
+                if winner == hedge_provider:
+                    # Reviewed by the model that wrote it, and not cached under the primary's key
+                    model, provider, cacheable = hedge_model, hedge_provider, False
+        else:
+            generated = await run_generation(model, provider, prompt)
+        plan, partial = generated if generated is not None else (None, False)
+
+    if plan and config.PLAN_VALIDATION != "off":
+        plan = await review_plan(plan, request.user_profile, model, provider)
+
+    if plan and partial:
+        # Served, but not kept (nor offered to neighbours by the index): the next
+        # request for this profile asks the model again
+        logger.warning(f"{provider} plan is partial (truncated output or fallback sections), not caching it")
+    elif plan:
+        await store_plan(plan, request.user_profile, provider, cache_key, cacheable)
+    return plan
+
+async def store_plan(plan: FitnessPlan, user_profile: UserProfile, provider: str, cache_key: str, cacheable: bool = True):
+    """Cache and index a complete model plan; one whose schedule doesn't match workout_days is served but not kept"""
+    if len(plan.workout_plan.weekly_schedule) != user_profile.workout_days:
+        logger.warning(
+            f"{provider} plan has {len(plan.workout_plan.weekly_schedule)} workout days for {user_profile.workout_days}, not caching it"
+        )
+        return
+    if not (config.PLAN_CACHE_ENABLED or config.PLAN_INDEX_ENABLED):
+        return
+    data = plan.model_dump()
+    if cacheable and config.PLAN_CACHE_ENABLED:
+        await plan_cache.set(cache_key, data)
+    if config.PLAN_INDEX_ENABLED:
+        await plan_index.add(user_profile, data)
+
+async def lookup_plan_index(user_profile: UserProfile) -> Tuple[Optional[FitnessPlan], List[dict]]:
+    """(neighbour's plan adapted to this profile, or None; seed plans for the prompt)
+
+    The adapted plan is served only if it passes the rule checks for this
+    profile; otherwise it becomes the seed for a new generation.
+    """
+    try:
+        adapted, seeds = await plan_index.lookup(user_profile, config.PLAN_INDEX_MAX_DISTANCE, config.PLAN_INDEX_SEEDS)
+        if adapted is not None:
+            plan = validate_plan(adapted)
+            with span("rules"):
+                issues = check_plan(plan, user_profile)
+            if not issues:
+                plan_index_lookups.inc("hit")
+                return plan, []
+            plan_index_lookups.inc("rejected")
+            logger.warning(f"Plan index neighbour failed {len(issues)} rule checks, generating instead: {'; '.join(issue.message for issue in issues)}")
+            return None, [adapted] if config.PLAN_INDEX_SEEDS else []
+    except (ValidationError, KeyError, TypeError) as e:
+        logger.error(f"Plan index returned an unusable plan: {str(e)}")
+        return None, []
+    plan_index_lookups.inc("seeded" if seeds else "miss")
+    return None, seeds
+
+async def cached_plan(cache_key: str) -> Optional[FitnessPlan]:
+    with span("cache"):
+        cached = await plan_cache.get(cache_key)
+        return validate_plan(cached) if cached is not None else None
+
+async def get_or_generate_plan(request: PlanRequest, model, provider: str) -> Tuple[Optional[FitnessPlan], bool]:
+    """Return (plan, served_from_cache); plan is None when the model failed"""
+    if provider == LOCAL_PROVIDER:
+        # Built in well under a millisecond, so not worth a cache entry
+        return model.plan(request.user_profile), False
+
+    cache_key = make_cache_key(request.user_profile, provider, model.model_name, config.TEMPERATURE)
+    if config.PLAN_CACHE_ENABLED:
+        cached = await cached_plan(cache_key)
+        if cached is not None:
+            return cached, True
+
+    seeds: List[dict] = []
+    if config.PLAN_INDEX_ENABLED:
+        # A plan for a near-identical profile is served like a cache hit
+        with span("index"):
+            adapted, seeds = await lookup_plan_index(request.user_profile)
+        if adapted is not None:
+            if config.PLAN_CACHE_ENABLED:
+                await plan_cache.set(cache_key, adapted.model_dump())
+            return adapted, True
+
+    if config.SINGLE_FLIGHT_ENABLED:
+        # Identical concurrent requests share one generation; in other workers they
+        # wait for it and read its plan from the shared cache
+        plan = await plan_single_flight.do(
+            cache_key, lambda: generate_and_cache_plan(request, model, provider, cache_key, seeds),
+            recheck=(lambda: cached_plan(cache_key)) if config.PLAN_CACHE_ENABLED else None,
+        )
+    else:
+        plan = await generate_and_cache_plan(request, model, provider, cache_key, seeds)
+    return plan, False
+
+async def find_previous_plan(request: RegeneratePlanRequest, model, provider: str) -> Optional[FitnessPlan]:
+    """The plan being updated: given inline, by plan_id, or cached for the previous profile"""
+    if request.previous_plan is not None:
+        return request.previous_plan
+    if not config.PLAN_CACHE_ENABLED:
+        return None
+    return await cached_plan(request.plan_id or make_cache_key(request.previous_profile, provider, model.model_name, config.TEMPERATURE))
+
+async def get_or_regenerate_plan(
+    request: RegeneratePlanRequest, model, provider: str
+) -> Tuple[Optional[FitnessPlan], bool, List[str], List[str]]:
+    """Return (plan, served_from_cache, regenerated parts, parts filled from the fallback) for an updated profile
+
+    Only the sections affected by the profile change are re-prompted. Without a
+    previous plan to start from, this is a full generation. The result is
+    rule-checked and stored like a generated plan, except that one with fallback
+    parts is not cached, so the next request re-prompts them.
+    """
+    plan_request = PlanRequest(user_profile=request.user_profile, ai_provider=request.ai_provider)
+    previous_plan = None if provider == LOCAL_PROVIDER else await find_previous_plan(request, model, provider)
+    if previous_plan is None:
+        plan, cache_hit = await get_or_generate_plan(plan_request, model, provider)
+        return plan, cache_hit, [] if cache_hit else ["meal_plan", "workout_plan", "extras"], []
+
+    cache_key = make_cache_key(request.user_profile, provider, model.model_name, config.TEMPERATURE)
+    if config.PLAN_CACHE_ENABLED:
+        cached = await plan_cache.get(cache_key)
+        if cached is not None:
+            return validate_plan(cached), True, [], []
+
+    plan, regenerated, fell_back = await regenerate_plan(
+        previous_plan, request.previous_profile, request.user_profile, model, provider, build_fallback_plan
+    )
+    if config.PLAN_VALIDATION != "off":
+        plan = await review_plan(plan, request.user_profile, model, provider)
+    if fell_back:
+        logger.warning(f"{provider} regenerated plan has fallback parts ({', '.join(fell_back)}), not caching it")
+    await store_plan(plan, request.user_profile, provider, cache_key, cacheable=not fell_back)
+    return plan, False, regenerated, fell_back
+
+async def stream_bulk_plans(requests: List[PlanRequest]) -> AsyncIterator[str]:
+    """Generate a batch with bounded per-provider concurrency, yielding NDJSON lines in completion order"""
+    models = {}
+    groups: Dict[str, List[int]] = {}
+    queues: Dict[str, asyncio.Queue] = {}
+
+    for index, item in enumerate(requests):
+        provider = item.ai_provider
+        if provider not in models:
+            try:
+                models[provider] = get_model(provider)
+            except ProviderUnavailable as e:
+                models[provider] = None
+                logger.error(f"Bulk generation: {provider} unavailable: {str(e)}")
+        model = models[provider]
+        if model is None:
+            yield json.dumps({"index": index, "status": "error", "provider": provider, "error": f"{provider} model not available"}) + "\n"
+            continue
+
+        # Identical profiles within the batch are generated once
+        cache_key = make_cache_key(item.user_profile, provider, model.model_name, config.TEMPERATURE)
+        if cache_key in groups:
+            groups[cache_key].append(index)
+            continue
+        groups[cache_key] = [index]
+        queues.setdefault(provider, asyncio.Queue()).put_nowait((cache_key, item))
+
+    # Small buffer so a slow reader applies backpressure instead of piling up plans
+    results: asyncio.Queue = asyncio.Queue(maxsize=config.BULK_CONCURRENCY_PER_PROVIDER * max(1, len(queues)))
+
+    async def worker(provider: str, queue: asyncio.Queue):
+        model = models[provider]
+        # Batch items queue for provider quota behind everything else
+        request_priority.set(PRIORITY_BULK)
+        while True:
+            try:
+                cache_key, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                while True:
+                    try:
+                        plan, cache_hit = await get_or_generate_plan(item, model, provider)
+                        break
+                    except AdmissionRejected as e:
+                        # Out of provider quota: wait for it rather than failing the item
+                        await asyncio.sleep(e.retry_after)
+                if plan:
+                    outcome = {"status": "generated", "cached": cache_hit, "data": plan.model_dump()}
+                else:
+                    outcome = {"status": "fallback", "cached": False, "data": create_fallback_response(item.user_profile, provider).model_dump()}
+            except Exception as e:
+                logger.error(f"Bulk generation with {provider} failed: {str(e)}")
+                outcome = {"status": "error", "error": str(e)}
+            await results.put((cache_key, provider, outcome))
+
+    workers = [
+        asyncio.ensure_future(worker(provider, queue))
+        for provider, queue in queues.items()
+        for _ in range(min(config.BULK_CONCURRENCY_PER_PROVIDER, queue.qsize()))
+    ]
+    try:
+        remaining = len(groups)
+        while remaining:
+            cache_key, provider, outcome = await results.get()
+            remaining -= 1
+            for position, index in enumerate(groups.pop(cache_key)):
+                line = {"index": index, "provider": provider, "deduplicated": position > 0, **outcome}
+                yield json.dumps(line) + "\n"
+    finally:
+        for task in workers:
+            task.cancel()
+
+async def open_plan_stream(request: PlanRequest, model, provider: str) -> AsyncIterator[Tuple[str, dict]]:
+    """Section events for a plan request, with failover and provider admission settled before the first event
+
+    Raises AdmissionRejected when the provider is out of quota, so the caller
+    can answer 429 instead of starting the stream.
+    """
+    if provider == LOCAL_PROVIDER:
+        return plan_events(model.plan(request.user_profile).model_dump(), f"Plan generated successfully with {model.display_name}", "MISS")
+
+    cache_key = make_cache_key(request.user_profile, provider, model.model_name, config.TEMPERATURE)
+    if config.PLAN_CACHE_ENABLED:
+        cached = await plan_cache.get(cache_key)
+        if cached is not None:
+            return plan_events(cached, "Plan generated successfully", "HIT")
+
+    cacheable = True
+    if config.BREAKER_FAILOVER and not model.breaker.available():
+        backup_provider, backup_model = get_hedge_model(provider)
+        if backup_model is not None:
+            logger.warning(f"{provider} circuit is open, failing over to {backup_provider} for the stream")
+            model, provider, cacheable = backup_model, backup_provider, False
+
+    prompt = PromptTemplates.build_plan_prompt(request.user_profile)
+    admitted = model.breaker.available()
+    if admitted:
+        # With the circuit open there is no call to admit; the stream falls back at once
+        await model.admit(prompt)
+    return stream_plan_events(request, model, provider, prompt, cache_key, cacheable, admitted)
+
+async def plan_events(data: dict, message: str, cache: str) -> AsyncIterator[Tuple[str, dict]]:
+    """Section events for a plan that is already built, then its complete event"""
+    for event in plan_section_events(data):
+        yield "section", event
+    yield "complete", {"status": "200", "message": message, "cache": cache, "data": data}
+
+async def stream_plan_events(
+    request: PlanRequest, model, provider: str, prompt: PlanPrompt, cache_key: str, cacheable: bool, admitted: bool
+) -> AsyncIterator[Tuple[str, dict]]:
+    """Yield section events as the model streams, then one complete event with the full plan"""
+    parser = new_plan_parser()
+    sections, days = {}, {}
+    try:
+        async for chunk in model.stream_plan(prompt, admitted=admitted):
+            for path, value in parser.feed(chunk):
+                event = section_event(path, value)
+                if event is None:
+                    continue
+                if event["section"] == "workout_day":
+                    days[event["index"]] = event["data"]
+                else:
+                    sections[event["section"]] = event["data"]
+                yield "section", event
+    except asyncio.TimeoutError:
+        logger.error(f"{provider} stream went idle for more than {model.timeout}s")
+    except Exception as e:
+        logger.error(f"Error streaming plan with {provider}: {str(e)}")
+
+    plan, partial = None, True
+    result = model.extract(parser.text) if parser.text else None
+    if result is not None and result.data:
+        try:
+            plan = validate_plan(result.data)
+            partial = "closed_truncated" in result.repairs
+        except ValidationError as e:
+            plan_validation_failures.inc(provider)
+            logger.error(f"Streamed plan failed validation: {str(e)}")
+    if plan is None:
+        # Salvage whatever sections did stream through intact; sent, but never cached
+        plan = assemble_plan(sections, days)
+    elif config.PLAN_VALIDATION != "off":
+        plan = await review_plan(plan, request.user_profile, model, provider)
+
+    if plan is not None:
+        if partial:
+            logger.warning(f"Streamed {provider} plan is partial (truncated or salvaged), not caching it")
+        else:
+            await store_plan(plan, request.user_profile, provider, cache_key, cacheable)
+        data = plan.model_dump()
+        yield "complete", {"status": "200", "message": f"Plan generated successfully with {model.display_name}", "cache": "MISS", "data": data}
+    else:
+        fallback_data = create_fallback_response(request.user_profile, provider)
+        yield "complete", {"status": "200", "message": "Plan generated with fallback data", "cache": "MISS", "data": fallback_data.model_dump()}
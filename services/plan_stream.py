@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from pydantic import ValidationError
+
+from models.plan_model import FitnessPlan, MealPlan, WorkoutDay, WorkoutPlan
+from services.json_stream import IncrementalJSONParser, Path
+
+logger = logging.getLogger(__name__)
+
+# Containers of a FitnessPlan that are emitted as soon as they close
+PLAN_SECTION_WATCH = [
+    lambda path: path == ("meal_plan",),
+    lambda path: len(path) == 3 and path[:2] == ("workout_plan", "weekly_schedule") and isinstance(path[2], int),
+    lambda path: path == ("workout_plan",),
+    lambda path: path == ("general_recommendations",),
+    lambda path: path == ("progress_tracking",),
+]
+
+
+def new_plan_parser() -> IncrementalJSONParser:
+    return IncrementalJSONParser(PLAN_SECTION_WATCH)
+
+
+def section_event(path: Path, value: Any) -> Optional[Dict[str, Any]]:
+    """Validate a completed container and turn it into a section event payload"""
+    try:
+        if path == ("meal_plan",):
+            return {"section": "meal_plan", "data": MealPlan(**value).model_dump()}
+        if path[:2] == ("workout_plan", "weekly_schedule"):
+            return {"section": "workout_day", "index": path[2], "data": WorkoutDay(**value).model_dump()}
+        if path == ("workout_plan",):
+            # Days were already streamed one by one, only send the plan-level fields
+            workout_plan = WorkoutPlan(**value).model_dump(exclude={"weekly_schedule"})
+            return {"section": "workout_plan", "data": workout_plan}
+        if path == ("general_recommendations",) and isinstance(value, list):
+            return {"section": "general_recommendations", "data": [str(item) for item in value]}
+        if path == ("progress_tracking",) and isinstance(value, dict):
+            return {"section": "progress_tracking", "data": {k: str(v) for k, v in value.items()}}
+    except (ValidationError, TypeError) as e:
+        logger.warning(f"Streamed section {path} failed validation: {str(e)}")
+    return None
+
+
+def plan_section_events(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Split a complete plan into the same section events a live stream produces"""
+    yield {"section": "meal_plan", "data": plan["meal_plan"]}
+    workout_plan = dict(plan["workout_plan"])
+    for index, day in enumerate(workout_plan.pop("weekly_schedule", [])):
+        yield {"section": "workout_day", "index": index, "data": day}
+    yield {"section": "workout_plan", "data": workout_plan}
+    yield {"section": "general_recommendations", "data": plan.get("general_recommendations") or []}
+    yield {"section": "progress_tracking", "data": plan.get("progress_tracking") or {}}
+
+
+def assemble_plan(sections: Dict[str, Any], days: Dict[int, Any]) -> Optional[FitnessPlan]:
+    """Build a FitnessPlan from streamed sections when the full document didn't parse"""
+    if "meal_plan" not in sections or "workout_plan" not in sections or not days:
+        return None
+    try:
+        workout_plan = dict(sections["workout_plan"])
+        workout_plan["weekly_schedule"] = [days[index] for index in sorted(days)]
+        return FitnessPlan(
+            meal_plan=sections["meal_plan"],
+            workout_plan=workout_plan,
+            general_recommendations=sections.get("general_recommendations", []),
+            progress_tracking=sections.get("progress_tracking", {}),
+        )
+    except ValidationError as e:
+        logger.warning(f"Could not assemble plan from streamed sections: {str(e)}")
+        return None
+
+
+async def iterate_with_timeout(chunks: AsyncIterator[str], timeout: float) -> AsyncIterator[str]:
+    """Re-yield chunks, giving up if the provider goes quiet for longer than timeout"""
+    iterator = chunks.__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def format_sse(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def format_ndjson(event: str, payload: Dict[str, Any]) -> str:
+    return json.dumps({"event": event, **payload}) + "\n"
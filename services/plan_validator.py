@@ -0,0 +1,232 @@
+"""Rule checks of a generated plan against the profile it was written for
+
+Local and cheap (well under a millisecond), so every generated plan is checked and
+only plans that fail go back to a model for correction.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from models.plan_model import FitnessPlan
+from models.user_model import UserProfile
+from services.local_planner import excluded_foods
+from services.nutrition import (
+    CARBS_KCAL_PER_G, FATS_KCAL_PER_G, PROTEIN_KCAL_PER_G, calculate_targets,
+)
+from services.plan_catalog import FOOD_KEYWORDS, FOOD_TAGS
+
+RULES = ("calories", "macros", "schedule", "sets_reps", "duration", "diet")
+
+# Calorie target may be this far from the computed one (the prompt gives it exactly)
+CALORIE_TOLERANCE = 0.10
+# Macro percentages must add up to within this range
+MACRO_PERCENT_RANGE = (95, 105)
+# Macro grams, converted to calories, may be this far from the calorie target
+MACRO_CALORIE_TOLERANCE = 0.15
+# A session may run over time_per_session by this share, or at least DURATION_SLACK minutes
+DURATION_TOLERANCE = 0.25
+DURATION_SLACK = 10
+# ...and may be no shorter than this share of it
+MIN_DURATION_SHARE = 0.5
+MAX_SETS = 10
+MAX_REPS = 100
+# Offending exercises or foods listed in one issue
+MAX_EXAMPLES = 3
+
+
+class PlanIssue(NamedTuple):
+    rule: str
+    message: str
+
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+_RANGE = re.compile(_NUMBER + r"(?:\s*(?:-|–|to)\s*" + _NUMBER + r")?")
+_PERCENT = re.compile(_RANGE.pattern + r"\s*%")
+_GRAMS = re.compile(_RANGE.pattern + r"\s*(?:g|grams?)\b")
+_MINUTES = re.compile(_RANGE.pattern + r"\s*(h|hours?|hrs?|min|mins|minutes?)\b")
+# A count, or a time or distance ("30 s", "400m", "5 km", "1 mile") that is never read as reps
+_LEADING_COUNT = re.compile(
+    r"^\s*" + _RANGE.pattern
+    + r"\s*(s|secs?|seconds?|min|mins|minutes?|m|meters?|metres?|km|kilometers?|kilometres?|mi|miles?|yds?|yards?)?\b"
+)
+_OPEN_REPS = re.compile(r"\b(?:amrap|max|failure|as many)\b")
+
+# Words that make the food after them a substitute or something left out
+_SUBSTITUTES = re.compile(
+    r"\b(?:vegan|plant-based|plant|non-dairy|meatless|mock|imitation)(?:\s+[a-z-]+){0,2}"
+    r"|\b(?:no|without|instead of|avoid|skip)\s+(?:added\s+)?[a-z-]+"
+)
+_FREE_OF = re.compile(r"\b[a-z]+[- ]free(?:\s+[a-z-]+){0,2}")
+_FOOD_MASKS = {
+    keyword: sum(1 << FOOD_TAGS.index(tag) for tag in set(tags))
+    for keyword, tags in FOOD_KEYWORDS.items()
+}
+# Keyword spelled by each phrase, plurals included
+_FOOD_FORMS = {
+    keyword + suffix: keyword
+    for keyword in sorted(FOOD_KEYWORDS, key=len) for suffix in ("es", "s", "")
+}
+# First words of multi-word keywords, so most words take a single lookup
+_PHRASE_STARTS = {keyword.split()[0] for keyword in FOOD_KEYWORDS if " " in keyword}
+_LONGEST_PHRASE = max(len(keyword.split()) for keyword in FOOD_KEYWORDS)
+_WORDS = re.compile(r"[a-z]+")
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _amount(match) -> float:
+    """Value of a number or range match; a range counts as its midpoint"""
+    low = _number(match.group(1))
+    return (low + _number(match.group(2))) / 2 if match.group(2) else low
+
+
+def parse_calories(text: str) -> Optional[float]:
+    """Daily calories in a calorie_target such as "2700-2750 calories per day (TDEE 3479)" """
+    for match in _RANGE.finditer(text.split("(")[0]):
+        value = _amount(match)
+        if value >= 500:
+            return value
+    return None
+
+
+def parse_minutes(text: str) -> Optional[float]:
+    """Longest duration in "60 minutes", "45-60 min" or "1.5 hours", in minutes"""
+    match = _MINUTES.search(text.lower())
+    if match is None:
+        return None
+    value = _number(match.group(2) or match.group(1))
+    return value * 60 if match.group(3).startswith("h") else value
+
+
+def _count_ok(text: str, limit: int, timed: bool = False) -> bool:
+    """Whether sets or reps are a count or range within limit (or, if timed, a time or distance)"""
+    if text.isdigit():
+        return 1 <= int(text) <= limit
+    match = _LEADING_COUNT.match(text.lower())
+    if match is None:
+        return False
+    low = _number(match.group(1))
+    high = _number(match.group(2)) if match.group(2) else low
+    if timed and match.group(3):
+        return 0 < low <= high
+    return 1 <= low <= high <= limit
+
+
+def _tag_names(mask: int) -> str:
+    return ", ".join(tag for index, tag in enumerate(FOOD_TAGS) if mask & (1 << index))
+
+
+def check_calories(plan: FitnessPlan, user_profile: UserProfile) -> Tuple[List[PlanIssue], Optional[float]]:
+    targets = calculate_targets(user_profile)
+    calories = parse_calories(plan.meal_plan.calorie_target)
+    if calories is None:
+        return [PlanIssue("calories", f"Calorie target '{plan.meal_plan.calorie_target}' has no daily calorie figure")], None
+    off = (calories - targets.calorie_target) / targets.calorie_target
+    if abs(off) > CALORIE_TOLERANCE:
+        return [PlanIssue(
+            "calories",
+            f"Calorie target {calories:.0f} is {off:+.1%} off the {targets.calorie_target} computed for "
+            f"{user_profile.goal.lower()} (TDEE {targets.tdee})",
+        )], calories
+    return [], calories
+
+
+def check_macros(plan: FitnessPlan, calories: Optional[float]) -> List[PlanIssue]:
+    breakdown = plan.meal_plan.macronutrient_breakdown
+    fields = (breakdown.protein, breakdown.carbohydrates, breakdown.fats)
+    percents = [_PERCENT.search(text) for text in fields]
+    grams = [_GRAMS.search(text) for text in fields]
+    issues = []
+    if all(percents):
+        total = sum(_amount(match) for match in percents)
+        if not MACRO_PERCENT_RANGE[0] <= total <= MACRO_PERCENT_RANGE[1]:
+            issues.append(PlanIssue("macros", f"Macronutrient percentages add up to {total:.0f}%, not 100%"))
+    if all(grams) and calories:
+        kcal = sum(_amount(match) * per_g for match, per_g in zip(grams, (PROTEIN_KCAL_PER_G, CARBS_KCAL_PER_G, FATS_KCAL_PER_G)))
+        if abs(kcal - calories) / calories > MACRO_CALORIE_TOLERANCE:
+            issues.append(PlanIssue("macros", f"Macronutrient grams add up to {kcal:.0f} calories, not the {calories:.0f} target"))
+    if not all(percents) and not all(grams):
+        issues.append(PlanIssue("macros", "Macronutrient breakdown has no percentages or grams for protein, carbohydrates and fats"))
+    return issues
+
+
+def check_workouts(plan: FitnessPlan, user_profile: UserProfile) -> List[PlanIssue]:
+    schedule = plan.workout_plan.weekly_schedule
+    issues = []
+    if len(schedule) != user_profile.workout_days:
+        issues.append(PlanIssue("schedule", f"Weekly schedule has {len(schedule)} days for {user_profile.workout_days} workout days"))
+    empty = [day.day_name for day in schedule if not day.exercises]
+    if empty:
+        issues.append(PlanIssue("schedule", f"No exercises on {', '.join(empty[:MAX_EXAMPLES])}"))
+
+    unparseable = [
+        f"{exercise.name} ({exercise.sets} x {exercise.reps})"
+        for day in schedule for exercise in day.exercises
+        if not _count_ok(exercise.sets, MAX_SETS)
+        or not (_count_ok(exercise.reps, MAX_REPS, timed=True) or _OPEN_REPS.search(exercise.reps.lower()))
+    ]
+    if unparseable:
+        issues.append(PlanIssue(
+            "sets_reps", f"{len(unparseable)} exercises have sets or reps that aren't a count, range or time: {'; '.join(unparseable[:MAX_EXAMPLES])}"
+        ))
+
+    budget = user_profile.time_per_session
+    if not budget:
+        return issues
+    longest = budget + max(DURATION_SLACK, budget * DURATION_TOLERANCE)
+    mistimed = []
+    for day in schedule:
+        minutes = parse_minutes(day.duration or "")
+        if minutes is not None and not budget * MIN_DURATION_SHARE <= minutes <= longest:
+            mistimed.append(f"{day.day_name} ({day.duration})")
+    if mistimed:
+        issues.append(PlanIssue("duration", f"Sessions don't fit {budget} minutes: {', '.join(mistimed[:MAX_EXAMPLES])}"))
+    return issues
+
+
+def find_foods(text: str) -> List[str]:
+    """FOOD_KEYWORDS entries named in a text, skipping substitutes ("vegan cheese") and exclusions ("dairy-free")"""
+    text = _SUBSTITUTES.sub(" ", text.lower())
+    if "free" in text:
+        text = _FREE_OF.sub(" ", text)
+    words = _WORDS.findall(text)
+    foods = []
+    index = 0
+    while index < len(words):
+        food, size = _FOOD_FORMS.get(words[index]), 1
+        if words[index] in _PHRASE_STARTS:
+            # Longest keyword starting here, so "peanut butter" wins over "peanut"
+            for length in range(min(_LONGEST_PHRASE, len(words) - index), 1, -1):
+                phrase = _FOOD_FORMS.get(" ".join(words[index:index + length]))
+                if phrase is not None:
+                    food, size = phrase, length
+                    break
+        if food is not None:
+            foods.append(food)
+        index += size
+    return foods
+
+
+def food_conflicts(plan: FitnessPlan, user_profile: UserProfile) -> Dict[str, int]:
+    """Foods in the sample meals and supplements that the profile excludes, with the excluded tags they carry"""
+    excluded = excluded_foods(user_profile)
+    if not excluded:
+        return {}
+    meals = plan.meal_plan
+    text = " | ".join([item for items in meals.sample_meals.values() for item in items] + list(meals.supplements or []))
+    return {food: _FOOD_MASKS[food] & excluded for food in find_foods(text) if _FOOD_MASKS[food] & excluded}
+
+
+def check_plan(plan: FitnessPlan, user_profile: UserProfile) -> List[PlanIssue]:
+    """Everything wrong with a plan for this profile; an empty list means it passed"""
+    issues, calories = check_calories(plan, user_profile)
+    issues += check_macros(plan, calories)
+    issues += check_workouts(plan, user_profile)
+    conflicts = food_conflicts(plan, user_profile)
+    if conflicts:
+        foods = [f"{food} ({_tag_names(mask)})" for food, mask in conflicts.items()]
+        issues.append(PlanIssue(
+            "diet", f"Meals conflict with the {user_profile.meal_preference.lower()} diet or stated restrictions: {', '.join(foods[:MAX_EXAMPLES * 2])}"
+        ))
+    return issues
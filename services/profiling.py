@@ -0,0 +1,137 @@
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from config.env_config import config
+
+logger = logging.getLogger(__name__)
+
+
+class Recording:
+    """Stack samples of one thread, taken from a background thread until stopped"""
+
+    def __init__(self, label: str, thread_id: int, interval: float, path: str):
+        self.label = label
+        self.thread_id = thread_id
+        self.interval = interval
+        self.path = path
+        self.name = os.path.basename(path)
+        self.stacks: Counter = Counter()
+        self._frames: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        # The sampler writes the file itself, so stopping never blocks the event loop
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+        self._write()
+
+    def _collapse(self, frame) -> str:
+        """Stack as "outer;...;inner" frame names, the collapsed format flame graph tools read"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._frames.get(code)
+            if name is None:
+                name = self._frames[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            names.append(name)
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _write(self):
+        try:
+            with open(self.path, "w") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"Wrote {sum(self.stacks.values())} samples of {self.label} to {self.path}")
+        except OSError as e:
+            logger.error(f"Could not write profile {self.path}: {str(e)}")
+
+
+class SamplingProfiler:
+    """Samples the event loop's stack during a fraction of requests
+
+    Off until an admin sets a sample rate. Each profiled request gets a
+    collapsed-stack file in `output_dir` (flamegraph.pl, speedscope). One
+    request is profiled at a time; the loop thread is shared, so concurrent
+    requests' work appears in the samples as well. After `max_profiles` files
+    the sample rate drops back to 0.
+    """
+
+    def __init__(self, output_dir: str = "profiles", interval: float = 0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.sample_rate = 0.0
+        self.remaining = 0
+        self.written = 0
+        self._active: Optional[Recording] = None
+
+    def configure(self, sample_rate: float, max_profiles: int, interval: Optional[float] = None):
+        self.sample_rate = sample_rate
+        self.remaining = max_profiles if sample_rate > 0 else 0
+        if interval:
+            self.interval = interval
+        if sample_rate > 0:
+            os.makedirs(self.output_dir, exist_ok=True)
+        logger.info(f"Sampling profiler: rate {sample_rate}, up to {self.remaining} profiles every {self.interval * 1000:.1f} ms")
+
+    def maybe_start(self, label: str) -> Optional[Recording]:
+        """Start profiling the calling (event loop) thread if this request is sampled"""
+        if self._active is not None or self.remaining <= 0 or random.random() >= self.sample_rate:
+            return None
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.sample_rate = 0.0
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")[:60]
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.written:04d}-{slug}.folded")
+        recording = Recording(label, threading.get_ident(), self.interval, path)
+        self._active = recording
+        self.written += 1
+        recording.start()
+        return recording
+
+    def stop(self, recording: Recording):
+        recording.stop()
+        if self._active is recording:
+            self._active = None
+
+    def profiles(self) -> List[str]:
+        """Profile files on disk, newest first"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted((name for name in os.listdir(self.output_dir) if name.endswith(".folded")), reverse=True)
+
+    def read(self, name: str) -> Optional[str]:
+        if name not in self.profiles():
+            return None
+        with open(os.path.join(self.output_dir, name)) as f:
+            return f.read()
+
+    def stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "remaining": self.remaining,
+            "interval_ms": self.interval * 1000,
+            "active": self._active.label if self._active is not None else None,
+            "written": self.written,
+            "output_dir": self.output_dir,
+            "profiles": self.profiles()[:50],
+        }
+
+
+sampling_profiler = SamplingProfiler(output_dir=config.PROFILE_DIR, interval=config.PROFILE_INTERVAL)
@@ -0,0 +1,79 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+class RequestTiming:
+    """Time spent in each stage of one request, summed over repeats
+
+    Stages that run concurrently (sections, hedges, retries) add up, so their
+    sum can exceed the request's total.
+    """
+
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # stage -> [seconds, count]
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        metrics = [f"{name};dur={seconds * 1000:.1f}" for name, (seconds, _) in self.spans.items()]
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def summary(self) -> dict:
+        return {
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "spans": {name: {"ms": round(seconds * 1000, 1), "count": count} for name, (seconds, count) in self.spans.items()},
+        }
+
+
+# Timing of the current request; None (the default) makes every span a no-op.
+# Tasks started by the request copy the context, so their spans land here too.
+request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+class _Span:
+    __slots__ = ("timing", "name", "started")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timing.add(self.name, time.perf_counter() - self.started)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Context manager timing a stage of the current request; costs one ContextVar read when timing is off"""
+    timing = request_timing.get()
+    return _NO_SPAN if timing is None else _Span(timing, name)
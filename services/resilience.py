@@ -0,0 +1,155 @@
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config.env_config import config
+from services.hedging import LatencyTracker
+from services.metrics import provider_breaker_state, provider_breaker_rejections
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# SDK exception classes (anywhere in the MRO) for network failures worth retrying.
+# Matched by name so this module doesn't import the provider SDKs.
+_CONNECTION_ERRORS = {"APIConnectionError"}
+_TIMEOUT_ERRORS = {"APITimeoutError", "TimeoutException"}
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over consecutive provider failures
+
+    After `failure_threshold` failures in a row the breaker opens and calls are
+    rejected at once. After `reset_timeout` seconds it lets `half_open_max_calls`
+    trial calls through: a success closes it, a failure opens it again. State
+    changes happen on the event loop thread only, so they need no locking.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trials = 0
+
+        self.times_opened = 0
+        self.rejected = 0
+        provider_breaker_state.set(name, value=STATE_VALUES[CLOSED])
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (without claiming a trial slot)"""
+        self._refresh()
+        if self.state == OPEN:
+            return False
+        return self.state == CLOSED or self._trials < self.half_open_max_calls
+
+    def allow(self) -> bool:
+        """Claim permission for one call; False means fail fast"""
+        if not self.available():
+            self.rejected += 1
+            provider_breaker_rejections.inc(self.name)
+            return False
+        if self.state == HALF_OPEN:
+            self._trials += 1
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            self._set_state(OPEN)
+
+    def release(self):
+        """Give back a trial slot for a call that ended without a verdict (e.g. cancelled)"""
+        if self.state == HALF_OPEN and self._trials:
+            self._trials -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refresh()
+        retry_in = self.opened_at + self.reset_timeout - time.monotonic() if self.state == OPEN else 0.0
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in": round(max(0.0, retry_in), 1),
+        }
+
+    def _refresh(self):
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._trials = 0
+        provider_breaker_state.set(self.name, value=STATE_VALUES[state])
+
+
+def _class_names(error: BaseException) -> set:
+    return {cls.__name__ for cls in type(error).__mro__}
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an SDK error (`status_code` on Groq/Anthropic, `code` on google.api_core)"""
+    for attribute in ("status_code", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_transient(error: BaseException) -> bool:
+    """Rate limits, server errors and dropped connections; timeouts are not retried"""
+    names = _class_names(error)
+    if names & _TIMEOUT_ERRORS:
+        return False
+    code = status_code(error)
+    if code is not None:
+        return code == 429 or code >= 500
+    return bool(names & _CONNECTION_ERRORS) or isinstance(error, (httpx.TransportError, ConnectionError))
+
+
+def retry_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, or the provider's Retry-After when it sends one"""
+    cap = min(config.LLM_RETRY_MAX_DELAY, config.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            return min(config.LLM_RETRY_MAX_DELAY, float(headers.get("retry-after")))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, cap)
+
+
+def adaptive_timeout(provider: str, ceiling: float) -> float:
+    """Per-call timeout from the provider's recent latency percentile, capped at its configured timeout
+
+    Timed-out calls are recorded at their timeout, so a provider that slows down
+    pushes the percentile up instead of being cut off at a stale limit.
+    """
+    if not config.ADAPTIVE_TIMEOUT_ENABLED or call_latency.count(provider) < config.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+        return ceiling
+    recent = call_latency.percentile(provider, config.ADAPTIVE_TIMEOUT_PERCENTILE)
+    return min(ceiling, max(config.ADAPTIVE_TIMEOUT_MIN, recent * config.ADAPTIVE_TIMEOUT_MULTIPLIER))
+
+
+call_latency = LatencyTracker(window=config.HEDGE_LATENCY_WINDOW)
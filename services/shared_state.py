@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from config.env_config import config
+
+logger = logging.getLogger(__name__)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open a SQLite file that several worker processes read and write
+
+    WAL lets readers carry on while one process writes, and the busy timeout
+    makes a writer wait for the lock instead of failing with "database is locked".
+    """
+    db = sqlite3.connect(db_path, timeout=config.SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+    if db_path != ":memory:":
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+def after_fork(reconnect: Callable[[], None]):
+    """Run `reconnect` in every forked child
+
+    gunicorn's preload imports the app, and so opens the stores, before forking
+    workers; a SQLite connection must not be used on both sides of a fork.
+    """
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=reconnect)
+
+
+class SQLiteThread:
+    """Runs a store's SQLite calls from the event loop, one at a time, on a thread of its own
+
+    A write may wait up to SQLITE_BUSY_TIMEOUT for another worker's lock; on
+    this thread that holds up the store's next call instead of the whole loop.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def reset(self):
+        """Drop the executor in a forked child, where its thread doesn't exist"""
+        self._executor = None
+
+
+class LeaseStore:
+    """Named leases in SQLite: at most one process holds a key until it releases it or the lease expires"""
+
+    def __init__(self, db_path: str, ttl: float = 300):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._thread = SQLiteThread("leases")
+        self._db = connect(db_path)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("DELETE FROM leases WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+        after_fork(self._reconnect)
+        logger.info(f"Shared lease store opened at {db_path}")
+
+    async def acquire(self, key: str) -> bool:
+        """Take the lease on `key` unless another process holds an unexpired one"""
+        return await self._thread.run(self._acquire, key)
+
+    async def held(self, key: str) -> bool:
+        return await self._thread.run(self._held, key)
+
+    async def release(self, key: str):
+        await self._thread.run(self._release, key)
+
+    def _acquire(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            acquired = self._db.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ?",
+                (key, os.getpid(), now + self.ttl, now),
+            ).rowcount == 1
+            self._db.commit()
+        return acquired
+
+    def _held(self, key: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def _release(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, os.getpid()))
+            self._db.commit()
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self._thread.reset()
+        self._db = connect(self.db_path)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.env_config import config
+from services.shared_state import LeaseStore
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one underlying task
+
+    With a lease store, calls are also coalesced across worker processes: the
+    process holding a key's lease generates, the others wait for the lease to
+    be released and then `recheck` (typically a shared cache read) for its
+    result, generating themselves only when that comes back empty.
+    """
+
+    def __init__(self, leases: Optional[LeaseStore] = None, poll_interval: float = 0.2):
+        self.leases = leases
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_waits = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], recheck: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"Coalesced request onto in-flight generation {key[:12]}")
+        else:
+            if self.leases is not None and recheck is not None:
+                task = asyncio.ensure_future(self._lead(key, fn, recheck))
+            else:
+                task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shield so a disconnecting caller doesn't cancel the work for the others
+        return await asyncio.shield(task)
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]], recheck: Callable[[], Awaitable[Any]]) -> Any:
+        waited = False
+        while not await self.leases.acquire(key):
+            if not waited:
+                waited = True
+                self.remote_waits += 1
+                logger.debug(f"Waiting on generation {key[:12]} in another worker")
+            while await self.leases.held(key):
+                await asyncio.sleep(self.poll_interval)
+            result = await recheck()
+            if result is not None:
+                return result
+        try:
+            return await fn()
+        finally:
+            await self.leases.release(key)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Shared generation {key[:12]} failed: {str(task.exception())}")
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "remote_waits": self.remote_waits,
+        }
+
+
+plan_single_flight = SingleFlight(
+    LeaseStore(config.SHARED_STATE_DB_PATH, ttl=config.SINGLE_FLIGHT_LEASE_TTL) if config.SHARED_STATE_DB_PATH else None
+)
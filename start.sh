@@ -4,8 +4,6 @@
 echo "🚀 Starting FitPlanner - LlamaIndex Edition"
 echo "=========================================="
 
-cd src
-
 # Check if .env file exists
 if [ ! -f ".env" ]; then
     echo "⚠️  .env file not found. Creating from template..."
@@ -24,5 +22,5 @@ echo ""
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-# Start the FastAPI server
-python main.py
+# Start the FastAPI server (WEB_CONCURRENCY worker processes, see gunicorn.conf.py)
+exec gunicorn -c gunicorn.conf.py main:app
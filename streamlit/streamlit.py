@@ -1,7 +1,11 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+import hashlib
 import json
-from typing import Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
 import time
 
 # Page configuration
@@ -45,17 +49,124 @@ st.markdown("""
 
 # API Configuration
 API_BASE_URL = "http://localhost:5000/api"
+# Single requests stay under the proxies' 60 s cut-off; long generations go through jobs or streaming
+REQUEST_TIMEOUT = (5, 55)
+# Each run polls a pending job once, long-polling the API for up to this many seconds,
+# so widget changes still take effect within a couple of seconds
+JOB_POLL_WAIT = 2
+JOB_MAX_SECONDS = 600
+PLAN_MEMO_TTL = 3600
+PLAN_MEMO_MAX_ENTRIES = 256
+FALLBACK_MESSAGE = "Plan generated with fallback data"
+DELIVERY_MODES = ["Stream sections as they are generated", "Background job (poll until ready)", "Single request"]
+
+class PlanMemo:
+    """Final plan responses by request hash, whatever delivery mode produced them
+
+    Fallback plans are shown but never stored, so the next try asks the model again.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[Any, Any]]]" = OrderedDict()
+        # Each browser session runs the script in its own thread
+        self._lock = threading.Lock()
+
+    def get(self, profile_key: str) -> Optional[Dict[Any, Any]]:
+        with self._lock:
+            entry = self._entries.get(profile_key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[profile_key]
+                return None
+            self._entries.move_to_end(profile_key)
+            return entry[1]
+
+    def put(self, profile_key: str, response: Dict[Any, Any]):
+        if response.get("status") != "200" or not response.get("data") or response.get("message") == FALLBACK_MESSAGE:
+            return
+        with self._lock:
+            self._entries[profile_key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(profile_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One pooled keep-alive session per server process, shared by all reruns and browser sessions"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def get_plan_memo() -> PlanMemo:
+    """One plan memo per server process, shared by all reruns and browser sessions"""
+    return PlanMemo(PLAN_MEMO_TTL, PLAN_MEMO_MAX_ENTRIES)
+
+def profile_hash(request_data: Dict[Any, Any]) -> str:
+    return hashlib.sha256(json.dumps(request_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+def describe_error(error: requests.exceptions.RequestException) -> str:
+    response = getattr(error, "response", None)
+    if response is not None and response.status_code in (429, 503):
+        return f"The API is busy, please try again in {response.headers.get('Retry-After', 'a few')} seconds."
+    return f"API request failed: {str(error)}"
 
 def make_api_request(endpoint: str, data: Dict[Any, Any]) -> Dict[Any, Any]:
     """Make API request with error handling"""
     try:
-        response = requests.post(f"{API_BASE_URL}{endpoint}", json=data, timeout=30)
+        response = get_http_session().post(f"{API_BASE_URL}{endpoint}", json=data, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        st.error(f"API request failed: {str(e)}")
+        st.error(describe_error(e))
         return None
 
+def submit_plan_job(request_data: Dict[Any, Any]) -> Optional[str]:
+    job = make_api_request("/jobs", request_data)
+    return job["job_id"] if job else None
+
+def poll_plan_job(pending_job: Dict[str, Any], status) -> Tuple[bool, Optional[Dict[Any, Any]]]:
+    """Poll a pending job once: (finished, plan response or None if it failed or took too long)"""
+    if time.time() > pending_job["deadline"]:
+        st.error("Plan generation is taking too long. Please try again later.")
+        return True, None
+    try:
+        response = get_http_session().get(
+            f"{API_BASE_URL}/jobs/{pending_job['job_id']}", params={"wait": JOB_POLL_WAIT}, timeout=(5, JOB_POLL_WAIT + 10)
+        )
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        st.error(describe_error(e))
+        return True, None
+    job = response.json()
+    if job["status"] == "succeeded":
+        return True, job["result"]
+    if job["status"] == "failed":
+        st.error(f"Plan generation failed: {job.get('error') or 'unknown error'}")
+        return True, None
+    status.info(f"⏳ Your plan is {job['status']}... you can keep using the page while it is generated.")
+    return False, None
+
+def stream_api_request(endpoint: str, data: Dict[Any, Any]) -> Iterator[Tuple[str, Dict[Any, Any]]]:
+    """Yield (event, payload) pairs from a server-sent event stream"""
+    try:
+        with get_http_session().post(f"{API_BASE_URL}{endpoint}", json=data, stream=True, timeout=(5, 60)) as response:
+            response.raise_for_status()
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:") and event:
+                    yield event, json.loads(line[len("data:"):].strip())
+                    event = None
+    except requests.exceptions.RequestException as e:
+        st.error(describe_error(e))
+
 def display_meal_plan(meal_plan: Dict[Any, Any]):
     """Display meal plan in a formatted way"""
     st.markdown("### 🍽️ Personalized Meal Plan")
@@ -184,6 +295,68 @@ def display_workout_plan(workout_plan: Dict[Any, Any]):
         for tip in safety_tips:
             st.write(f"• {tip}")
 
+def create_plan_slots() -> Dict[str, Any]:
+    """Reserve placeholders so plan sections can be (re)drawn as they arrive"""
+    return {
+        "meal_plan": st.empty(),
+        "workout_plan": st.empty(),
+        "extras": st.empty(),
+    }
+
+def display_plan(plan_data: Dict[Any, Any], slots: Dict[str, Any]):
+    """Render a complete or partially streamed plan into its placeholders"""
+    # Display meal plan
+    meal_plan = plan_data.get("meal_plan")
+    if meal_plan:
+        with slots["meal_plan"].container():
+            display_meal_plan(meal_plan)
+            st.markdown("---")
+    
+    # Display workout plan
+    workout_plan = plan_data.get("workout_plan")
+    if workout_plan:
+        with slots["workout_plan"].container():
+            display_workout_plan(workout_plan)
+            st.markdown("---")
+    
+    with slots["extras"].container():
+        # General Recommendations
+        general_recommendations = plan_data.get("general_recommendations", [])
+        if general_recommendations:
+            st.markdown("### 💡 General Recommendations")
+            for rec in general_recommendations:
+                st.write(f"• {rec}")
+        
+        # Progress Tracking
+        progress_tracking = plan_data.get("progress_tracking", {})
+        if progress_tracking:
+            st.markdown("### 📊 Progress Tracking")
+            for key, value in progress_tracking.items():
+                st.write(f"**{key.title()}:** {value}")
+
+def stream_plan(request_data: Dict[Any, Any], slots: Dict[str, Any]) -> Dict[Any, Any]:
+    """Render plan sections progressively and return the final API payload"""
+    partial_plan = {"workout_plan": {"weekly_schedule": []}}
+    status = st.empty()
+    status.info("⏳ Generating your plan, sections will appear as they are ready...")
+    
+    for event, payload in stream_api_request("/generate-plan/stream", request_data):
+        if event == "section":
+            section = payload.get("section")
+            if section == "workout_day":
+                partial_plan["workout_plan"]["weekly_schedule"].append(payload["data"])
+            elif section == "workout_plan":
+                partial_plan["workout_plan"].update(payload["data"])
+            else:
+                partial_plan[section] = payload["data"]
+            display_plan(partial_plan, slots)
+        elif event == "complete":
+            status.empty()
+            return payload
+    
+    status.empty()
+    return None
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">💪 FitPlanner - AI Fitness Coach</h1>', unsafe_allow_html=True)
@@ -243,102 +416,107 @@ def main():
         
         # AI Provider Selection
         st.markdown("**AI Provider**")
-        ai_provider = st.selectbox("Choose AI Model", ["gemini", "anthropic", "groq"])
+        ai_provider = st.selectbox("Choose AI Model", ["gemini", "anthropic", "groq", "local"], help="local builds an instant rule-based plan without an AI model")
+        delivery = st.radio("Delivery", DELIVERY_MODES)
         
         # Generate Plan Button
         generate_button = st.button("🚀 Generate My Fitness Plan", type="primary")
     
-    # Main content area
+    # Prepare user profile data
+    user_profile = {
+        "age": age,
+        "gender": gender,
+        "height": height,
+        "weight": weight,
+        "activity_level": activity_level,
+        "goal": goal,
+        "goal_weight": goal_weight,
+        "meal_preference": meal_preference,
+        "meal_type": meal_type,
+        "allergies": allergies,
+        "medical_conditions": medical_conditions,
+        "food_restrictions": food_restrictions,
+        "workout_days": workout_days,
+        "workout_location": workout_location,
+        "workout_split": workout_split,
+        "workout_experience": workout_experience,
+        "equipment_available": equipment_available,
+        "time_per_session": time_per_session
+    }
+    
+    request_data = {
+        "user_profile": user_profile,
+        "ai_provider": ai_provider
+    }
+    profile_key = profile_hash(request_data)
+    
+    # Every widget interaction reruns this script: the plan lives in session_state,
+    # so reruns redraw it without calling the API again
+    job_status = st.empty()
+    notice = st.empty()
+    slots = create_plan_slots()
+    plan_memo = get_plan_memo()
+    response = None
+    
     if generate_button:
-        # Prepare user profile data
-        user_profile = {
-            "age": age,
-            "gender": gender,
-            "height": height,
-            "weight": weight,
-            "activity_level": activity_level,
-            "goal": goal,
-            "goal_weight": goal_weight,
-            "meal_preference": meal_preference,
-            "meal_type": meal_type,
-            "allergies": allergies,
-            "medical_conditions": medical_conditions,
-            "food_restrictions": food_restrictions,
-            "workout_days": workout_days,
-            "workout_location": workout_location,
-            "workout_split": workout_split,
-            "workout_experience": workout_experience,
-            "equipment_available": equipment_available,
-            "time_per_session": time_per_session
-        }
-        
-        request_data = {
-            "user_profile": user_profile,
-            "ai_provider": ai_provider
-        }
-        
-        # Determine endpoint based on AI provider
-        endpoint_map = {
-            "gemini": "/generate-plan",
-            "anthropic": "/generate-plan-anthropic", 
-            "groq": "/generate-plan-groq"
-        }
+        # A plan already generated for this exact request is reused, whatever the delivery mode
+        st.session_state.pop("pending_job", None)
+        response = plan_memo.get(profile_key)
+        if response is None:
+            if delivery == DELIVERY_MODES[0]:
+                response = stream_plan(request_data, slots)
+            elif delivery == DELIVERY_MODES[1]:
+                job_id = submit_plan_job(request_data)
+                if job_id:
+                    st.session_state["pending_job"] = {
+                        "job_id": job_id, "profile_key": profile_key, "deadline": time.time() + JOB_MAX_SECONDS
+                    }
+            else:
+                # Show loading spinner
+                with st.spinner(f"Generating your personalized fitness plan using {ai_provider.title()}..."):
+                    response = make_api_request("/generate-plan", request_data)
+            if response:
+                plan_memo.put(profile_key, response)
         
-        endpoint = endpoint_map.get(ai_provider, "/generate-plan")
+        if response is None and "pending_job" not in st.session_state:
+            st.error("Failed to generate fitness plan. Please try again or check your API configuration.")
+    
+    # A job survives reruns: each run polls it once, then reruns the page until it is done
+    pending_job = st.session_state.get("pending_job")
+    if pending_job:
+        finished, job_response = poll_plan_job(pending_job, job_status)
+        if finished:
+            del st.session_state["pending_job"]
+            job_status.empty()
+            if job_response:
+                response, profile_key = job_response, pending_job["profile_key"]
+                plan_memo.put(profile_key, response)
+    
+    if response and response.get("status") == "200" and response.get("data"):
+        st.session_state["plan"] = {"profile_key": profile_key, "data": response["data"]}
+    
+    plan = st.session_state.get("plan")
+    if plan:
+        if plan["profile_key"] == profile_hash(request_data):
+            notice.markdown('<div class="success-box">✅ Your personalized fitness plan has been generated!</div>', unsafe_allow_html=True)
+        else:
+            notice.info("Your profile has changed since this plan was generated. Click Generate to update it.")
+        # Redraw from the final plan, it may be a fallback rather than what streamed
+        display_plan(plan["data"], slots)
         
-        # Show loading spinner
-        with st.spinner(f"Generating your personalized fitness plan using {ai_provider.title()}..."):
-            response = make_api_request(endpoint, request_data)
+        # Download option
+        st.markdown("---")
+        st.markdown("### 📥 Export Your Plan")
         
-        if response and response.get("status") == "200":
-            st.markdown('<div class="success-box">✅ Your personalized fitness plan has been generated!</div>', unsafe_allow_html=True)
-            
-            plan_data = response.get("data")
-            if plan_data:
-                # Display meal plan
-                meal_plan = plan_data.get("meal_plan")
-                if meal_plan:
-                    display_meal_plan(meal_plan)
-                
-                st.markdown("---")
-                
-                # Display workout plan
-                workout_plan = plan_data.get("workout_plan")
-                if workout_plan:
-                    display_workout_plan(workout_plan)
-                
-                st.markdown("---")
-                
-                # General Recommendations
-                general_recommendations = plan_data.get("general_recommendations", [])
-                if general_recommendations:
-                    st.markdown("### 💡 General Recommendations")
-                    for rec in general_recommendations:
-                        st.write(f"• {rec}")
-                
-                # Progress Tracking
-                progress_tracking = plan_data.get("progress_tracking", {})
-                if progress_tracking:
-                    st.markdown("### 📊 Progress Tracking")
-                    for key, value in progress_tracking.items():
-                        st.write(f"**{key.title()}:** {value}")
-                
-                # Download option
-                st.markdown("---")
-                st.markdown("### 📥 Export Your Plan")
-                
-                plan_json = json.dumps(plan_data, indent=2)
-                st.download_button(
-                    label="Download Plan as JSON",
-                    data=plan_json,
-                    file_name="my_fitness_plan.json",
-                    mime="application/json"
-                )
-            
-        else:
-            st.error("Failed to generate fitness plan. Please try again or check your API configuration.")
+        plan_json = json.dumps(plan["data"], indent=2)
+        st.download_button(
+            label="Download Plan as JSON",
+            data=plan_json,
+            file_name="my_fitness_plan.json",
+            mime="application/json"
+        )
     
-    else:
+    elif not generate_button and "pending_job" not in st.session_state:
         # Welcome message and instructions
         st.markdown("### Welcome to FitPlanner! 🎯")
         st.write("""
@@ -364,6 +542,9 @@ def main():
         
         with col3:
             st.markdown('<div class="metric-card"><h4>📈 Comprehensive</h4><p>Complete nutrition and workout guidance</p></div>', unsafe_allow_html=True)
+    
+    if "pending_job" in st.session_state:
+        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,121 @@
 from models.user_model import UserProfile
+from models.plan_model import MealPlan, WorkoutDay, WorkoutPlan, WorkoutOverview, PlanExtras
+from models.plan_schema import schema_outline
+from services.nutrition import calculate_targets
+from config.env_config import config
+from typing import List, NamedTuple, Sequence, Tuple, Type
+import json
+from pydantic import BaseModel
+
+class PlanPrompt(NamedTuple):
+    """What a provider sends for one plan
+
+    Verbose prompts are a single user message with the JSON schema spelled out.
+    Structured prompts split a static `system` prefix (cacheable, identical for
+    every user) from the per-user `user` part; the provider supplies the schema
+    through its native structured-output feature.
+    """
+    user: str
+    system: str = ""
+    structured: bool = False
+
+# Static instructions for structured mode, kept byte-identical across requests so
+# providers can cache the prefix
+PLAN_SYSTEM_PROMPT = """You are an expert fitness and nutrition coach. Create a personalized fitness plan for the user profile you are given.
+
+Meal plan: use the computed calorie target and macronutrient breakdown exactly as given (do not recalculate), sample meals for breakfast, lunch, dinner and snacks that respect the diet, allergies and restrictions, nutrition tips and supplement recommendations.
+
+Workout plan: one weekly_schedule entry per workout day, each with exercises (name, sets, reps, rest, form notes), duration, warm-up and cool-down; progression notes and safety tips suited to the experience level, location and equipment.
+
+Also give general recommendations (progress tracking, lifestyle, recovery) and how to track weight, measurements and performance.
+
+Keep the plan realistic, safe and tailored to the user's needs and constraints. Be concise: short phrases, no filler."""
 
 class PromptTemplates:
+    @staticmethod
+    def build_plan_prompt(user_profile: UserProfile, seeds: Sequence[dict] = ()) -> PlanPrompt:
+        """Plan prompt in the configured PROMPT_MODE, with optional example plans for similar profiles"""
+        if config.PROMPT_MODE == "compact":
+            return PlanPrompt(
+                user=PromptTemplates.compact_profile_prompt(user_profile) + PromptTemplates.seed_plans_prompt(seeds),
+                system=PLAN_SYSTEM_PROMPT,
+                structured=True
+            )
+        return PlanPrompt(user=PromptTemplates.generate_fitness_plan_prompt(user_profile) + PromptTemplates.seed_plans_prompt(seeds))
+
+    @staticmethod
+    def seed_plans_prompt(seeds: Sequence[dict]) -> str:
+        """Plans generated for the most similar stored profiles, to adapt rather than write from scratch"""
+        if not seeds:
+            return ""
+        examples = "\n".join(json.dumps(seed, separators=(",", ":")) for seed in seeds)
+        return f"""
+
+Plans written for very similar profiles (same goal, diet, split and schedule) follow. Use them as a starting point: keep what fits this user, adjust exercises, volume and meals where the profile differs, and use this user's own calorie and macro targets.
+{examples}"""
+
+    @staticmethod
+    def compact_profile_prompt(user_profile: UserProfile) -> str:
+        targets = calculate_targets(user_profile)
+        goal_weight = f" (target {user_profile.goal_weight} kg)" if user_profile.goal_weight else ""
+        return f"""Profile: {user_profile.age}y {user_profile.gender}, {user_profile.height} cm, {user_profile.weight} kg{goal_weight}, {user_profile.activity_level}, goal {user_profile.goal}
+Diet: {user_profile.meal_preference}, {user_profile.meal_type}; allergies {user_profile.allergies}; medical {user_profile.medical_conditions}; restrictions {user_profile.food_restrictions}
+Training: {user_profile.workout_days} days/week, {user_profile.workout_location}, {user_profile.workout_split}, {user_profile.workout_experience}, equipment {user_profile.equipment_available}, {user_profile.time_per_session} min
+Targets: BMR {targets.bmr}, TDEE {targets.tdee}, {targets.calorie_target} kcal; protein {targets.protein_pct}% ({targets.protein_g} g), carbs {targets.carbs_pct}% ({targets.carbs_g} g), fats {targets.fats_pct}% ({targets.fats_g} g), fiber {targets.fiber_g} g"""
+
+    @staticmethod
+    def section_prompt(user_profile: UserProfile, task: str, section_model: Type[BaseModel]) -> PlanPrompt:
+        """Prompt for one section of a plan generated in parallel pieces"""
+        return PlanPrompt(user=f"""You are an expert fitness and nutrition coach. {task}
+
+{PromptTemplates.compact_profile_prompt(user_profile)}
+
+Respond with only a JSON object of this shape (? = optional):
+{schema_outline(section_model)}""")
+
+    @staticmethod
+    def meal_plan_prompt(user_profile: UserProfile) -> PlanPrompt:
+        task = ("Write the meal plan for this user: the computed calorie target and macronutrient breakdown exactly as given, "
+                "sample meals for breakfast, lunch, dinner and snacks that respect the diet, allergies and restrictions, "
+                "nutrition tips and supplement recommendations.")
+        return PromptTemplates.section_prompt(user_profile, task, MealPlan)
+
+    @staticmethod
+    def plan_extras_prompt(user_profile: UserProfile) -> PlanPrompt:
+        task = ("Give general recommendations for this user (lifestyle, recovery, sleep, consistency) and how to track "
+                "weight, measurements and performance.")
+        return PromptTemplates.section_prompt(user_profile, task, PlanExtras)
+
+    @staticmethod
+    def workout_plan_prompt(user_profile: UserProfile, skeleton: List[Tuple[str, str]]) -> PlanPrompt:
+        task = (f"Write the weekly workout plan with exactly these days: {PromptTemplates._days(skeleton)}. "
+                "Each day lists exercises (name, sets, reps, rest, form notes), duration, warm-up and cool-down. "
+                "Add progression notes and safety tips suited to the experience level, location and equipment.")
+        return PromptTemplates.section_prompt(user_profile, task, WorkoutPlan)
+
+    @staticmethod
+    def workout_overview_prompt(user_profile: UserProfile, skeleton: List[Tuple[str, str]]) -> PlanPrompt:
+        task = (f"Describe the workout plan built on this weekly schedule: {PromptTemplates._days(skeleton)}. "
+                "Give its goal, frequency and split, plus progression notes and safety tips suited to the experience "
+                "level. The individual days are written separately.")
+        return PromptTemplates.section_prompt(user_profile, task, WorkoutOverview)
+
+    @staticmethod
+    def workout_day_prompt(user_profile: UserProfile, skeleton: List[Tuple[str, str]], index: int) -> PlanPrompt:
+        day_name, focus = skeleton[index]
+        task = (f"Write one day of a weekly workout plan: {day_name}, focus {focus} "
+                f"(the whole week is {PromptTemplates._days(skeleton)}). List exercises (name, sets, reps, rest, "
+                "form notes) that fit the session length, location and equipment, plus duration, warm-up and cool-down. "
+                f'Use day_name "{day_name}" and focus "{focus}".')
+        return PromptTemplates.section_prompt(user_profile, task, WorkoutDay)
+
+    @staticmethod
+    def _days(skeleton: List[Tuple[str, str]]) -> str:
+        return "; ".join(f"{day_name} ({focus})" for day_name, focus in skeleton)
+
     @staticmethod
     def generate_fitness_plan_prompt(user_profile: UserProfile) -> str:
+        targets = calculate_targets(user_profile)
         return f"""
 You are an expert fitness and nutrition coach. Create a comprehensive, personalized fitness plan for the following user profile:
 
@@ -30,10 +143,19 @@ You are an expert fitness and nutrition coach. Create a comprehensive, personali
 - Equipment: {user_profile.equipment_available}
 - Session Duration: {user_profile.time_per_session} minutes
 
+**Computed Nutrition Targets (already calculated, use as given):**
+- BMR (Mifflin-St Jeor): {targets.bmr} kcal
+- TDEE: {targets.tdee} kcal
+- Daily Calorie Target: {targets.calorie_target} kcal
+- Protein: {targets.protein_pct}% ({targets.protein_g} g)
+- Carbohydrates: {targets.carbs_pct}% ({targets.carbs_g} g)
+- Fats: {targets.fats_pct}% ({targets.fats_g} g)
+- Fiber: {targets.fiber_g} g
+
 **Requirements:**
 1. Create a detailed meal plan with:
-   - Daily calorie target based on BMR and activity level
-   - Macronutrient breakdown (protein, carbs, fats)
+   - The computed daily calorie target (do not recalculate it)
+   - The computed macronutrient breakdown (protein, carbs, fats)
    - Sample meals for each meal time
    - Nutrition tips and supplement recommendations
 
@@ -106,16 +228,26 @@ Make sure the plan is realistic, safe, and tailored to the user's specific needs
 """
 
     @staticmethod
-    def validate_plan_prompt(plan_text: str) -> str:
-        return f"""
-Validate and improve the following fitness plan. Ensure it's:
+    def validate_plan_prompt(plan_text: str, user_profile: UserProfile, issues: Sequence[str]) -> PlanPrompt:
+        """Ask for a corrected plan after the local rule checks (services/plan_validator.py) found issues"""
+        problems = "\n".join(f"- {issue}" for issue in issues)
+        user = f"""
+Validate and correct the following fitness plan for this user. Ensure it's:
 1. Scientifically accurate
 2. Safe for the user
 3. Realistic and achievable
 4. Properly formatted as JSON
 
+{PromptTemplates.compact_profile_prompt(user_profile)}
+
+Automated checks found these problems:
+{problems}
+
 Plan to validate:
 {plan_text}
 
-If there are any issues, provide the corrected version. If it's good, return it as-is.
+Fix these problems and anything else that is wrong, keep the rest of the plan as it is, and return the complete corrected plan as a JSON object of the same shape.
 """
+        if config.PROMPT_MODE == "compact":
+            return PlanPrompt(user=user, system=PLAN_SYSTEM_PROMPT, structured=True)
+        return PlanPrompt(user=user)
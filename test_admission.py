@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from services import admission
+from services.admission import PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_JOB, AdmissionRejected, ProviderAdmission
+
+
+class Clock:
+    """Stands in for time.monotonic, advanced by the test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_disabled_admits_everything(clock):
+    gate = ProviderAdmission("test")
+
+    async def run():
+        for _ in range(100):
+            await gate.acquire(1000)
+
+    asyncio.run(run())
+    assert gate.stats()["rejected"] == 0
+
+
+def test_admits_within_quota(clock):
+    gate = ProviderAdmission("test", rpm=3, tpm=1000)
+
+    async def run():
+        for _ in range(3):
+            await gate.acquire(100)
+
+    asyncio.run(run())
+    assert gate.stats()["requests_in_window"] == 3
+    assert gate.stats()["tokens_in_window"] == 300
+    assert gate.queued == 0
+
+
+def test_rejects_a_wait_longer_than_max_wait(clock):
+    gate = ProviderAdmission("test", rpm=1, max_wait=5)
+
+    async def run():
+        await gate.acquire(10)
+        with pytest.raises(AdmissionRejected) as error:
+            await gate.acquire(10)
+        clock.now += admission.QUOTA_WINDOW
+        await gate.acquire(10)
+        return error.value
+
+    rejected = asyncio.run(run())
+    assert rejected.retry_after == pytest.approx(60)
+    assert (gate.admitted, gate.rejected) == (2, 1)
+
+
+def test_rejects_when_the_queue_is_full(clock):
+    gate = ProviderAdmission("test", rpm=1, max_queue=0, max_wait=120)
+
+    async def run():
+        await gate.acquire(10)
+        with pytest.raises(AdmissionRejected, match="queue is full"):
+            await gate.acquire(10)
+
+    asyncio.run(run())
+
+
+def test_token_quota_counts_settled_usage(clock):
+    gate = ProviderAdmission("test", tpm=1000, max_wait=0)
+
+    async def run():
+        ticket = await gate.acquire(900)
+        with pytest.raises(AdmissionRejected):
+            await gate.acquire(900)
+        # The call used far less than its estimate, which frees the rest of the window
+        gate.settle(ticket, 50)
+        await gate.acquire(900)
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def short_window(monkeypatch):
+    """A 50 ms quota window, so queued calls are dispatched without waiting a minute"""
+    monkeypatch.setattr(admission, "QUOTA_WINDOW", 0.05)
+
+
+def test_waiters_run_in_priority_then_arrival_order(short_window):
+    gate = ProviderAdmission("test", rpm=1, max_wait=5)
+    order = []
+
+    async def call(name, priority):
+        await gate.acquire(10, priority)
+        order.append(name)
+
+    async def run():
+        await gate.acquire(10)
+        tasks = [
+            asyncio.ensure_future(call("bulk", PRIORITY_BULK)),
+            asyncio.ensure_future(call("job", PRIORITY_JOB)),
+            asyncio.ensure_future(call("interactive 1", PRIORITY_INTERACTIVE)),
+            asyncio.ensure_future(call("interactive 2", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert gate.stats()["waiting"] == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["interactive 1", "interactive 2", "job", "bulk"]
+    assert gate.queued == 4
+
+
+def test_cancelled_waiter_leaves_the_queue(short_window):
+    gate = ProviderAdmission("test", rpm=1, max_wait=5)
+
+    async def run():
+        await gate.acquire(10)
+        waiter = asyncio.ensure_future(gate.acquire(10))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await gate.acquire(10)
+
+    asyncio.run(run())
+    assert gate.admitted == 2
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+
+from llm_models.json_extract import extract_json
+from models.plan_model import validate_plan
+
+FIXTURES = Path(__file__).parent / "benchmarks" / "fixtures" / "model_outputs"
+
+
+@pytest.mark.parametrize("name, repairs", [
+    ("01_clean.txt", []),
+    ("02_prose_wrapped.txt", []),
+    ("03_markdown_fence.txt", []),
+    ("04_fence_with_prose_braces.txt", ["markdown_fence"]),
+    ("05_stray_braces_in_prose.txt", ["skipped_stray_braces"]),
+    ("06_trailing_commas.txt", ["trailing_comma"]),
+    ("07_truncated_mid_string.txt", ["markdown_fence", "closed_truncated"]),
+    ("08_truncated_mid_array.txt", ["closed_truncated"]),
+    ("09_truncated_after_schedule.txt", ["closed_truncated"]),
+    ("10_compact_clean.txt", []),
+    ("11_truncated_in_last_day.txt", ["closed_truncated"]),
+    ("12_trailing_comma_and_truncation.txt", ["markdown_fence", "trailing_comma", "closed_truncated"]),
+])
+def test_recorded_outputs_yield_a_plan(name, repairs):
+    result = extract_json((FIXTURES / name).read_text())
+    assert result.repairs == repairs
+    validate_plan(result.data)
+
+
+def test_trailing_commas():
+    assert extract_json('{"a": [1, 2,], "b": {"c": 3,},}') == ({"a": [1, 2], "b": {"c": 3}}, ["trailing_comma"])
+
+
+def test_comma_inside_string_is_kept():
+    assert extract_json('{"a": "x,}", "b": 1,}').data == {"a": "x,}", "b": 1}
+
+
+def test_stray_braces_before_the_object():
+    text = 'Here is {your plan} as requested: {"a": {"b": 1}}'
+    assert extract_json(text) == ({"a": {"b": 1}}, ["skipped_stray_braces"])
+
+
+def test_markdown_fence():
+    result = extract_json('Sure! {see below}\n```json\n{"a": 1}\n```\nEnjoy {it}')
+    assert result == ({"a": 1}, ["markdown_fence"])
+
+
+def test_truncation_keeps_complete_values_only():
+    result = extract_json('{"a": [1, 2], "b": {"c": "complete", "d": "cut of')
+    assert result == ({"a": [1, 2], "b": {"c": "complete"}}, ["closed_truncated"])
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "{not: json}", "[1, 2]"])
+def test_unrecoverable(text):
+    assert extract_json(text).data is None
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from models.user_model import UserProfile
+from services.local_planner import build_local_plan
+from services.nutrition import calculate_targets
+from services.plan_regeneration import changed_fields, regenerate_plan
+
+PROFILE = dict(
+    age=28, gender="Male", height=178, weight=70, activity_level="Moderately Active", goal="Lean Bulk",
+    meal_preference="Non-Vegetarian", meal_type="High Protein", workout_days=3, workout_location="Gym",
+    workout_split="Full Body", workout_experience="Intermediate", time_per_session=60,
+)
+
+
+class SectionModel:
+    """Answers every section prompt with the local plan's fields, or fails every call"""
+
+    def __init__(self, user_profile: UserProfile, fail: bool = False):
+        plan = build_local_plan(user_profile)
+        self.answer = {
+            **plan.meal_plan.model_dump(),
+            **plan.workout_plan.model_dump(),
+            **plan.workout_plan.weekly_schedule[-1].model_dump(),
+            "general_recommendations": ["Regenerated"],
+            "progress_tracking": plan.progress_tracking,
+        }
+        self.fail = fail
+        self.calls = 0
+
+    async def generate_plan(self, prompt):
+        self.calls += 1
+        return None if self.fail else self.answer
+
+
+def regenerate(changes, fail=False):
+    previous = UserProfile(**PROFILE)
+    current = UserProfile(**{**PROFILE, **changes})
+    previous_plan = build_local_plan(previous)
+    model = SectionModel(current, fail)
+    plan, regenerated, failed = asyncio.run(regenerate_plan(previous_plan, previous, current, model, "test", build_local_plan))
+    return previous_plan, plan, regenerated, failed, model.calls
+
+
+def test_changed_fields_ignore_formatting():
+    previous = UserProfile(**PROFILE, allergies="None")
+    assert changed_fields(previous, UserProfile(**PROFILE, allergies="n/a")) == set()
+    assert changed_fields(previous, UserProfile(**{**PROFILE, "weight": 72})) == {"weight"}
+
+
+def test_no_change_reuses_everything():
+    previous_plan, plan, regenerated, failed, calls = regenerate({})
+    assert (regenerated, failed, calls) == ([], [], 0)
+    assert plan == previous_plan
+
+
+def test_body_metrics_only_recompute_targets():
+    previous_plan, plan, regenerated, failed, calls = regenerate({"weight": 80})
+    assert (regenerated, failed, calls) == (["targets"], [], 0)
+    assert plan.meal_plan.calorie_target == calculate_targets(UserProfile(**{**PROFILE, "weight": 80})).calorie_summary()
+    assert plan.meal_plan.sample_meals == previous_plan.meal_plan.sample_meals
+    assert plan.workout_plan == previous_plan.workout_plan
+
+
+def test_diet_change_reprompts_the_meal_plan_only():
+    previous_plan, plan, regenerated, failed, calls = regenerate({"meal_preference": "Vegetarian"})
+    assert (regenerated, failed, calls) == (["meal_plan"], [], 1)
+    assert plan.workout_plan == previous_plan.workout_plan
+    assert plan.general_recommendations == previous_plan.general_recommendations
+
+
+def test_goal_change_reprompts_every_section():
+    _, plan, regenerated, failed, calls = regenerate({"goal": "Weight Loss"})
+    assert sorted(regenerated) == ["extras", "meal_plan", "workout_plan"]
+    assert (failed, calls) == ([], 3)
+    assert plan.general_recommendations == ["Regenerated"]
+
+
+def test_added_workout_day_keeps_the_existing_days():
+    previous_plan, plan, regenerated, failed, calls = regenerate({"workout_days": 4})
+    assert (regenerated, failed, calls) == (["day_4"], [], 1)
+    schedule = plan.workout_plan.weekly_schedule
+    assert schedule[:3] == previous_plan.workout_plan.weekly_schedule
+    assert len(schedule) == 4
+    assert plan.workout_plan.frequency == "4 days per week"
+
+
+def test_removed_workout_day_prompts_nothing():
+    previous_plan, plan, regenerated, failed, calls = regenerate({"workout_days": 2})
+    assert (regenerated, failed, calls) == ([], [], 0)
+    assert plan.workout_plan.weekly_schedule == previous_plan.workout_plan.weekly_schedule[:2]
+
+
+@pytest.mark.parametrize("changes, part", [({"meal_preference": "Vegan"}, "meal_plan"), ({"workout_days": 4}, "day_4")])
+def test_failed_section_is_filled_from_the_fallback(changes, part):
+    _, plan, regenerated, failed, _ = regenerate(changes, fail=True)
+    assert regenerated == [f"{part}:fallback"]
+    assert failed == [part]
+    assert len(plan.workout_plan.weekly_schedule) == UserProfile(**{**PROFILE, **changes}).workout_days
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from llm_models.json_extract import extract_json
+from models.plan_model import validate_plan
+from models.user_model import UserProfile
+from services.local_planner import excluded_foods
+from services.plan_validator import check_plan, find_foods
+
+FIXTURES = Path(__file__).parent / "benchmarks" / "fixtures" / "model_outputs"
+
+# The profile the recorded plans were written for: a 2700-2750 kcal lean bulk, 4 x 60 min push/pull/legs
+PROFILE = dict(
+    age=28, gender="Male", height=178, weight=70, activity_level="Moderately Active", goal="Lean Bulk",
+    meal_preference="Non-Vegetarian", meal_type="High Protein", workout_days=4, workout_location="Gym",
+    workout_split="Push Pull Legs", workout_experience="Intermediate", time_per_session=60,
+)
+
+
+@pytest.fixture
+def plan():
+    return validate_plan(extract_json((FIXTURES / "01_clean.txt").read_text()).data)
+
+
+def test_recorded_plan_passes(plan):
+    assert check_plan(plan, UserProfile(**PROFILE)) == []
+
+
+@pytest.mark.parametrize("reps", ["400m", "5km", "1 mile", "800 meters", "1.5 km", "30 s"])
+def test_distance_and_time_reps_pass(plan, reps):
+    for exercise in plan.workout_plan.weekly_schedule[-1].exercises:
+        exercise.reps = reps
+    assert check_plan(plan, UserProfile(**PROFILE)) == []
+
+
+@pytest.mark.parametrize("reps", ["500", "lots", "0"])
+def test_bad_reps_fail(plan, reps):
+    plan.workout_plan.weekly_schedule[0].exercises[0].reps = reps
+    assert [issue.rule for issue in check_plan(plan, UserProfile(**PROFILE))] == ["sets_reps"]
+
+
+@pytest.mark.parametrize("notes", [
+    dict(medical_conditions="Sees a nutritionist monthly"),
+    dict(medical_conditions="Nutrition counselling for IBS"),
+    dict(food_restrictions="Eggplant"),
+])
+def test_look_alike_profile_text_excludes_nothing(plan, notes):
+    profile = UserProfile(**PROFILE, **notes)
+    assert excluded_foods(profile) == excluded_foods(UserProfile(**PROFILE))
+    assert check_plan(plan, profile) == []
+
+
+@pytest.mark.parametrize("notes", [dict(allergies="Nuts"), dict(allergies="eggs"), dict(food_restrictions="No egg")])
+def test_real_exclusions_still_apply(notes):
+    assert excluded_foods(UserProfile(**PROFILE, **notes)) != excluded_foods(UserProfile(**PROFILE))
+
+
+def test_find_foods_skips_substitutes_and_exclusions():
+    assert find_foods("Grilled chicken with dairy-free cheese and vegan sausages") == ["chicken"]
+    assert find_foods("Peanut butter toast") == ["peanut butter", "toast"]
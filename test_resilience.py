@@ -0,0 +1,99 @@
+import pytest
+
+from services import resilience
+from services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+    """Stands in for time.monotonic, advanced by the test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=30, half_open_max_calls=1)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 1
+
+
+def test_open_rejects_until_the_reset_timeout(breaker, clock):
+    trip(breaker)
+    assert not breaker.available()
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+    assert breaker.snapshot()["retry_in"] == 30
+
+    clock.now += 30
+    assert breaker.available()
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_lets_one_trial_through(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.available()
+    assert not breaker.allow()
+
+
+def test_half_open_trial_success_closes(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.available()
+
+
+def test_half_open_trial_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    clock.now += 29
+    assert not breaker.available()
+
+
+def test_release_gives_back_the_trial_slot(breaker, clock):
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()